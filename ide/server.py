@@ -7,9 +7,9 @@ from typing import List, Dict, Any, Optional
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse, JSONResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from intermediate.runner import generate_intermediate_code
-from intermediate.optimizer import TACOptimizer
+from intermediate.optimizer import TACOptimizer, DEFAULT_OPT_LEVEL, OPT_LEVELS
 # -------------------------------------------------------------------
 # Rutas / imports
 # -------------------------------------------------------------------
@@ -17,10 +17,9 @@ ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 
 # --- ANTLR imports ---
-from antlr4 import InputStream, CommonTokenStream
+from antlr4 import InputStream
 from antlr4.error.ErrorListener import ErrorListener
-from program.gen.CompiscriptLexer import CompiscriptLexer
-from program.gen.CompiscriptParser import CompiscriptParser
+from program.parsing import parse_program, get_parse_stats
 
 # --- Semántico / utilidades ---
 from semantic.semantic_visitor import run_semantic
@@ -53,7 +52,9 @@ app.mount("/static", StaticFiles(directory=str(STATIC_DIR), html=False), name="s
 class AnalyzeBody(BaseModel):
     source: str
     generate_tac: bool = False  # Opción para generar TAC
-    optimize_tac: bool = False  # Opción para optimizar TAC
+    optimize_tac: bool = False  # Opción para optimizar TAC (equivale a opt_level=2)
+    # Nivel -O0..-O3 (tiene prioridad sobre optimize_tac); fuera de rango -> 422
+    opt_level: Optional[int] = Field(None, ge=min(OPT_LEVELS), le=max(OPT_LEVELS))
 
 def _pick(obj: Any, names: List[str], default: Optional[Any] = None) -> Any:
     """Obtiene el primer atributo/clave disponible de 'names' en obj."""
@@ -72,15 +73,11 @@ def analyze(body: AnalyzeBody):
     try:
         # 1) Lexer/Parser
         input_stream = InputStream(body.source)
-        lexer = CompiscriptLexer(input_stream)
-        stream = CommonTokenStream(lexer)
-        parser = CompiscriptParser(stream)
-
         syn = SyntaxErrorCollector()
-        parser.removeErrorListeners()
-        parser.addErrorListener(syn)
 
-        tree = parser.program()
+        # SLL primero; LL completo solo si SLL falla
+        parsed = parse_program(input_stream, [syn])
+        tree = parsed.tree
 
         # 2) Errores sintácticos
         if syn.items:
@@ -88,7 +85,8 @@ def analyze(body: AnalyzeBody):
                 "ok": False, 
                 "errors": syn.items, 
                 "symbols": None,
-                "tac": None
+                "tac": None,
+                "parse_mode": parsed.mode
             }, status_code=422)
 
         # 3) Análisis semántico
@@ -155,12 +153,16 @@ def analyze(body: AnalyzeBody):
                     tac_program = tac_result.tac_program
                     
                     # Optimizar si se pidió
-                    if body.optimize_tac:
-                        optimizer = TACOptimizer(tac_program)
+                    opt_level = body.opt_level
+                    if opt_level is None:
+                        opt_level = DEFAULT_OPT_LEVEL if body.optimize_tac else 0
+                    if opt_level > 0:
+                        optimizer = TACOptimizer(tac_program, opt_level=opt_level)
                         tac_program = optimizer.optimize()
                     
                     tac_payload = {
                         "code": tac_program.to_list(),
+                        "opt_level": opt_level,
                         "stats": {
                             "instructions": len(tac_program.instructions),
                             "temporals": tac_program.temp_counter,
@@ -185,7 +187,8 @@ def analyze(body: AnalyzeBody):
             "ok": ok, 
             "errors": items, 
             "symbols": symbols_payload,
-            "tac": tac_payload
+            "tac": tac_payload,
+            "parse_mode": parsed.mode
         }, status_code=status)
 
     except Exception as e:
@@ -200,6 +203,13 @@ def analyze(body: AnalyzeBody):
             status_code=500
         )
 
+@app.get("/parse-stats")
+def parse_stats():
+    """
+    Contadores de modo de parsing (SLL vs LL) acumulados por este proceso.
+    """
+    return get_parse_stats()
+
 @app.post("/upload")
 async def upload(file: UploadFile = File(...)):
     """
@@ -96,7 +96,7 @@ function wireUI() {
   
   // Guardar preferencias de TAC
   const tacCheckbox = $('generateTAC');
-  const optCheckbox = $('optimizeTAC');
+  const optSelect = $('optLevel');
   
   if (tacCheckbox) {
     tacCheckbox.checked = localStorage.getItem('generateTAC') === 'true';
@@ -105,12 +105,12 @@ function wireUI() {
     });
   }
   
-  if (optCheckbox) {
-    optCheckbox.checked = localStorage.getItem('optimizeTAC') === 'true';
-    optCheckbox.addEventListener('change', () => {
-      localStorage.setItem('optimizeTAC', optCheckbox.checked);
+  if (optSelect) {
+    optSelect.value = localStorage.getItem('optLevel') || '0';
+    optSelect.addEventListener('change', () => {
+      localStorage.setItem('optLevel', optSelect.value);
       // Optimizar solo tiene sentido si TAC está activado
-      if (optCheckbox.checked && tacCheckbox && !tacCheckbox.checked) {
+      if (optSelect.value !== '0' && tacCheckbox && !tacCheckbox.checked) {
         tacCheckbox.checked = true;
         localStorage.setItem('generateTAC', 'true');
       }
@@ -157,7 +157,7 @@ function toast(text, kind='ok') {
 async function analyze() {
   const source = editor.getValue();
   const generateTAC = $('generateTAC')?.checked || false;
-  const optimizeTAC = $('optimizeTAC')?.checked || false;
+  const optLevel = parseInt($('optLevel')?.value || '0', 10);
 
   setStatus('Analizando…');
   let res;
@@ -168,7 +168,7 @@ async function analyze() {
       body: JSON.stringify({ 
         source,
         generate_tac: generateTAC,
-        optimize_tac: optimizeTAC
+        opt_level: optLevel
       })
     });
     res = await r.json();
@@ -0,0 +1,259 @@
+"""
+Grafo de flujo de control (CFG) sobre TAC
+Divide un TACProgram en regiones (cada FUNC_START..FUNC_END y el script
+principal) y cada región en bloques básicos con sus predecesores y
+sucesores, para que los pases del optimizador puedan hacer análisis
+globales en vez de recorrer la lista plana reseteando en cada etiqueta.
+
+FUNC_START queda en el bloque de entrada y FUNC_END al final del último
+bloque de la función: son marcadores de región, los pases no deben moverlos.
+
+Uso:
+    cfgs = build_cfgs(program.instructions)
+    for cfg in cfgs:
+        for b in cfg.reverse_postorder():
+            block = cfg.blocks[b]
+    instructions = flatten_cfgs(cfgs)
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .tac import TACInstruction, TACOp
+
+MAIN_REGION = "<main>"
+
+# Instrucciones que terminan un bloque básico
+JUMP_OPS = {TACOp.GOTO, TACOp.IF_TRUE, TACOp.IF_FALSE}
+EXIT_OPS = {TACOp.RETURN, TACOp.LEAVE, TACOp.FUNC_END}
+TERMINATOR_OPS = JUMP_OPS | EXIT_OPS
+
+
+def jump_target(inst: TACInstruction) -> Optional[str]:
+    """Etiqueta destino de un salto (como string), o None"""
+    if inst.op == TACOp.GOTO:
+        return str(inst.arg1)
+    if inst.op in (TACOp.IF_TRUE, TACOp.IF_FALSE):
+        return str(inst.arg2)
+    return None
+
+
+@dataclass
+class BasicBlock:
+    """Secuencia de instrucciones con una sola entrada y una sola salida"""
+    index: int
+    instructions: List[TACInstruction]
+    labels: List[str] = field(default_factory=list)   # etiquetas al inicio del bloque
+    succs: List[int] = field(default_factory=list)     # fallthrough primero, luego el salto
+    preds: List[int] = field(default_factory=list)
+
+    @property
+    def terminator(self) -> Optional[TACInstruction]:
+        """Última instrucción si es un salto/retorno (ignorando el FUNC_END)"""
+        for inst in reversed(self.instructions):
+            if inst.op == TACOp.FUNC_END:
+                continue
+            return inst if inst.op in TERMINATOR_OPS else None
+        return None
+
+    def __len__(self):
+        return len(self.instructions)
+
+
+@dataclass
+class FunctionCFG:
+    """CFG de una región (una función o el script principal)"""
+    name: str
+    blocks: List[BasicBlock]
+    label_to_block: Dict[str, int]
+
+    @property
+    def is_main(self) -> bool:
+        return self.name == MAIN_REGION
+
+    @property
+    def entry(self) -> int:
+        return 0
+
+    def instructions(self) -> List[TACInstruction]:
+        """Instrucciones de la región en el orden de los bloques"""
+        return [inst for b in self.blocks for inst in b.instructions]
+
+    def postorder(self) -> List[int]:
+        """Postorden de los bloques alcanzables desde la entrada (iterativo)"""
+        if not self.blocks:
+            return []
+        order: List[int] = []
+        visited = {self.entry}
+        stack: List[Tuple[int, int]] = [(self.entry, 0)]
+        while stack:
+            b, i = stack[-1]
+            succs = self.blocks[b].succs
+            if i < len(succs):
+                stack[-1] = (b, i + 1)
+                s = succs[i]
+                if s not in visited:
+                    visited.add(s)
+                    stack.append((s, 0))
+            else:
+                stack.pop()
+                order.append(b)
+        return order
+
+    def reverse_postorder(self) -> List[int]:
+        """Orden natural para análisis hacia adelante"""
+        return self.postorder()[::-1]
+
+    def reachable(self) -> List[bool]:
+        flags = [False] * len(self.blocks)
+        for b in self.postorder():
+            flags[b] = True
+        return flags
+
+    def exit_blocks(self) -> List[int]:
+        return [b.index for b in self.blocks if not b.succs]
+
+
+def split_regions(instructions: Sequence[TACInstruction]) -> List[Tuple[str, List[TACInstruction]]]:
+    """
+    (nombre, instrucciones) de cada función en orden, y al final el script
+    principal con todo el código que está fuera de funciones (el mismo
+    layout que usa el MIPSGenerator).
+    """
+    regions: List[Tuple[str, List[TACInstruction]]] = []
+    main: List[TACInstruction] = []
+    current: Optional[List[TACInstruction]] = None
+    for inst in instructions:
+        if inst.op == TACOp.FUNC_START:
+            current = []
+            regions.append((str(inst.arg1), current))
+        if current is not None:
+            current.append(inst)
+        else:
+            main.append(inst)
+        if inst.op == TACOp.FUNC_END:
+            current = None
+    if main:
+        regions.append((MAIN_REGION, main))
+    return regions
+
+
+def build_cfg(name: str, instructions: Sequence[TACInstruction]) -> FunctionCFG:
+    """Construye el CFG de una región"""
+    blocks: List[BasicBlock] = []
+    current: List[TACInstruction] = []
+    current_labels: List[str] = []
+
+    def close():
+        nonlocal current, current_labels
+        if current:
+            blocks.append(BasicBlock(len(blocks), current, current_labels))
+        current, current_labels = [], []
+
+    for inst in instructions:
+        if inst.op == TACOp.FUNC_END and not current and blocks:
+            # El marcador de fin va en el último bloque (no forma uno propio)
+            blocks[-1].instructions.append(inst)
+            continue
+        if inst.op == TACOp.LABEL:
+            # Una etiqueta abre bloque (salvo que el bloque actual sean solo etiquetas)
+            if any(i.op != TACOp.LABEL for i in current):
+                close()
+            current_labels.append(str(inst.arg1))
+        current.append(inst)
+        if inst.op in TERMINATOR_OPS:
+            close()
+    close()
+
+    label_to_block = {label: b.index for b in blocks for label in b.labels}
+
+    for b in blocks:
+        term = b.terminator
+        succs: List[int] = []
+        if term is None or term.op in (TACOp.IF_TRUE, TACOp.IF_FALSE):
+            if b.index + 1 < len(blocks):
+                succs.append(b.index + 1)
+        if term is not None and term.op in JUMP_OPS:
+            target = label_to_block.get(jump_target(term))
+            if target is not None and target not in succs:
+                succs.append(target)
+        b.succs = succs
+    for b in blocks:
+        for s in b.succs:
+            blocks[s].preds.append(b.index)
+
+    return FunctionCFG(name, blocks, label_to_block)
+
+
+def dominators(cfg: FunctionCFG, rpo: Optional[List[int]] = None) -> List[Optional[int]]:
+    """
+    Dominador inmediato de cada bloque alcanzable (Cooper, Harvey, Kennedy);
+    la entrada es su propio idom y los inalcanzables quedan en None.
+    """
+    if rpo is None:
+        rpo = cfg.reverse_postorder()
+    n = len(cfg.blocks)
+    order = {b: k for k, b in enumerate(rpo)}
+    idom: List[Optional[int]] = [None] * n
+    if not rpo:
+        return idom
+    entry = rpo[0]
+    idom[entry] = entry
+
+    def intersect(a: int, b: int) -> int:
+        while a != b:
+            while order[a] > order[b]:
+                a = idom[a]
+            while order[b] > order[a]:
+                b = idom[b]
+        return a
+
+    changed = True
+    while changed:
+        changed = False
+        for b in rpo[1:]:
+            new = None
+            for p in cfg.blocks[b].preds:
+                if idom[p] is None:
+                    continue
+                new = p if new is None else intersect(p, new)
+            if new is not None and idom[b] != new:
+                idom[b] = new
+                changed = True
+    return idom
+
+
+def dominates(idom: Sequence[Optional[int]], a: int, b: int) -> bool:
+    """True si el bloque a domina al bloque b (según el árbol de idom)"""
+    while True:
+        if b == a:
+            return True
+        parent = idom[b]
+        if parent is None or parent == b:
+            return False
+        b = parent
+
+
+def build_cfgs(instructions: Sequence[TACInstruction]) -> List[FunctionCFG]:
+    """Un CFG por región (funciones y luego el script principal)"""
+    return [build_cfg(name, insts) for name, insts in split_regions(instructions)]
+
+
+def flatten_cfgs(cfgs: Sequence[FunctionCFG]) -> List[TACInstruction]:
+    """Reconstruye la lista plana de instrucciones"""
+    return [inst for cfg in cfgs for inst in cfg.instructions()]
+
+
+def format_cfg(cfg: FunctionCFG) -> str:
+    """Representación legible (para --format cfg)"""
+    lines = [f"=== {cfg.name} ({len(cfg.blocks)} bloques) ==="]
+    rpo = cfg.reverse_postorder()
+    reachable = set(rpo)
+    for b in cfg.blocks:
+        preds = ", ".join(f"B{p}" for p in b.preds) or "-"
+        succs = ", ".join(f"B{s}" for s in b.succs) or "-"
+        flag = "" if b.index in reachable else "  (inalcanzable)"
+        lines.append(f"B{b.index}: preds [{preds}]  succs [{succs}]{flag}")
+        for inst in b.instructions:
+            lines.append(f"    {inst}")
+    lines.append("RPO: " + " ".join(f"B{b}" for b in rpo))
+    return "\n".join(lines)
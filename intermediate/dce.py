@@ -0,0 +1,79 @@
+"""
+Eliminación de código muerto con cadenas def-use sobre el SSA
+
+Mark and sweep por región: se marcan como vivas las instrucciones con
+efectos (saltos, llamadas, prints, returns, pushes, escrituras al heap o a
+globales...) y, con un worklist, la definición de cada versión SSA que usa
+una instrucción viva (a través de los phis). Lo que define un temporal o un
+slot del frame y no quedó marcado se borra.
+
+Como los slots FP[...] están en el SSA, esto también elimina los stores
+muertos a locales: 'FP[-8] = t3' que se pisa antes de leerse, o que nadie
+lee antes de salir de la función.
+
+Casos conservadores: los operandos 'this' leen FP[8] sin pasar por el SSA,
+así que si aparecen las escrituras a FP[8] se consideran vivas; los bloques
+inalcanzables no se tocan (de eso se encarga SCCP).
+"""
+from typing import List, Set, Tuple
+
+from .tac import TACOp
+from .ssa import SSAFunction, SSAName
+
+# Instrucciones sin efectos: se pueden borrar si nadie usa lo que definen
+_REMOVABLE = {
+    TACOp.ADD, TACOp.SUB, TACOp.MUL, TACOp.DIV, TACOp.MOD,
+    TACOp.LT, TACOp.LE, TACOp.GT, TACOp.GE, TACOp.EQ, TACOp.NE,
+    TACOp.AND, TACOp.OR, TACOp.NEG, TACOp.NOT,
+    TACOp.ASSIGN, TACOp.DEREF, TACOp.FIELD_ACCESS, TACOp.ARRAY_ACCESS, TACOp.NEW,
+}
+
+
+def dead_instructions(ssa: SSAFunction) -> Set[int]:
+    """ids de las instrucciones muertas de la región"""
+    blocks = ssa.cfg.blocks
+    sites = ssa.def_sites()
+    reads_this = any(str(op) == "this"
+                     for block in blocks for inst in block.instructions
+                     for op in (inst.result, inst.arg1, inst.arg2) if op is not None)
+
+    live_insts: Set[Tuple[int, int]] = set()
+    live_phis: Set[Tuple[int, int]] = set()
+    work: List[SSAName] = []
+
+    def mark(b: int, i: int):
+        if (b, i) not in live_insts:
+            live_insts.add((b, i))
+            work.extend(ssa.uses[b][i].values())
+
+    # Raíces: instrucciones con efectos
+    for b, block in enumerate(blocks):
+        if not ssa.reachable[b]:
+            continue
+        for i, inst in enumerate(block.instructions):
+            d = ssa.defs[b][i]
+            if inst.op not in _REMOVABLE or d is None or (reads_this and d[0] == "FP[8]"):
+                mark(b, i)
+
+    # Worklist: la definición de cada versión usada por algo vivo
+    while work:
+        name = work.pop()
+        site = sites.get(name)
+        if site is None:
+            continue                 # versión 0: valor de entrada
+        kind, b, k = site
+        if kind == "inst":
+            mark(b, k)
+        elif (b, k) not in live_phis:
+            live_phis.add((b, k))
+            phi = ssa.phis[b][k]
+            work.extend((phi.var, v) for v in phi.args.values())
+
+    dead: Set[int] = set()
+    for b, block in enumerate(blocks):
+        if not ssa.reachable[b]:
+            continue
+        for i, inst in enumerate(block.instructions):
+            if (b, i) not in live_insts:
+                dead.add(id(inst))
+    return dead
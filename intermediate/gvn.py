@@ -0,0 +1,190 @@
+"""
+Global value numbering sobre el SSA
+
+Se recorre el árbol de dominadores en preorden con una tabla con alcance
+(scoped): cada versión SSA tiene un número de valor (VN) y cada expresión
+sin efectos se identifica por (op, VN de los operandos). Si una expresión ya
+se calculó en un bloque que domina al actual y alguna variable que guarda
+ese valor todavía tiene la misma versión, la instrucción se reemplaza por la
+copia 'result = esa variable' (copy propagation y DCE limpian después).
+
+  - Las copias (t = x, t = @FP[k]) no crean valores: el destino toma el VN
+    de la fuente. Así 't2 = @FP[8]' repetido para 'this' se reconoce.
+  - ADD/MUL/EQ/NE/AND/OR son conmutativas (salvo concatenaciones de strings,
+    que no se numeran: cada una crea un string nuevo).
+  - Los phis y la versión de entrada reciben un VN nuevo.
+
+Memoria: las cargas (obj.campo con offset, arr[i], globales 0x...) incluyen
+en la clave la "generación" de lo que leen. FIELD_ASSIGN al offset k mata
+los campos en k, ARRAY_ASSIGN mata los elementos de arrays, escribir un
+global lo mata a él, y un CALL mata toda la memoria. Al entrar a un bloque
+al que también se llega por otro camino que su idom (joins y cabeceras de
+loop) la memoria se considera cambiada.
+
+gvn_rewrites(ssa) devuelve id(inst) -> copia que la reemplaza.
+"""
+from itertools import count
+from typing import Dict, List, Optional, Tuple
+
+from .tac import TACInstruction, TACOp, TACOperand, is_string_concat
+from .ssa import SSAFunction, SSAName
+
+_BINARY = {
+    TACOp.ADD, TACOp.SUB, TACOp.MUL, TACOp.DIV, TACOp.MOD,
+    TACOp.LT, TACOp.LE, TACOp.GT, TACOp.GE, TACOp.EQ, TACOp.NE,
+    TACOp.AND, TACOp.OR,
+}
+_COMMUTATIVE = {TACOp.ADD, TACOp.MUL, TACOp.EQ, TACOp.NE, TACOp.AND, TACOp.OR}
+
+
+class _State:
+    """Tablas visibles en un bloque (se copian al bajar por el árbol de dominadores)"""
+
+    def __init__(self, parent: Optional["_State"] = None):
+        self.exprs: Dict[Tuple, int] = dict(parent.exprs) if parent else {}
+        self.holders: Dict[int, List[SSAName]] = dict(parent.holders) if parent else {}
+        self.current: Dict[str, int] = dict(parent.current) if parent else {}
+        self.memory: Dict[object, int] = dict(parent.memory) if parent else {"*": 0}
+
+    def hold(self, vn: int, name: SSAName):
+        self.holders[vn] = self.holders.get(vn, []) + [name]
+
+    def holder(self, vn: int) -> Optional[SSAName]:
+        """Variable que todavía guarda el valor vn (la más reciente)"""
+        for var, version in reversed(self.holders.get(vn, ())):
+            if self.current.get(var, 0) == version:
+                return var, version
+        return None
+
+
+def gvn_rewrites(ssa: SSAFunction) -> Dict[int, Optional[TACInstruction]]:
+    """Instrucciones redundantes de la región -> copia desde el valor ya calculado"""
+    changes: Dict[int, Optional[TACInstruction]] = {}
+    blocks = ssa.cfg.blocks
+    if not blocks or not any(ssa.reachable):
+        return changes
+
+    fresh = count(1)
+    vn_of: Dict[SSAName, int] = {}
+    consts: Dict[Tuple, int] = {}
+    operands: Dict[SSAName, TACOperand] = {}
+
+    def vn_name(name: SSAName) -> int:
+        if name not in vn_of:
+            vn_of[name] = next(fresh)
+        return vn_of[name]
+
+    def operand_key(state: _State, inst: TACInstruction, slot: str, uses) -> Optional[Tuple]:
+        op = getattr(inst, slot)
+        if op is None:
+            return None
+        if getattr(op, "is_constant", False):
+            key = ("c", type(op.value).__name__, op.value)
+            if key not in consts:
+                consts[key] = next(fresh)
+            return ("vn", consts[key])
+        name = uses.get(slot)
+        if name is not None:
+            operands.setdefault(name, op)
+            return ("vn", vn_name(name))
+        text = str(op)
+        if text.startswith("0x"):
+            return ("global", text, state.memory["*"], state.memory.get(("global", text), 0))
+        return None        # 'this', nombres sueltos: no se numeran
+
+    def expression(state: _State, inst: TACInstruction, uses) -> Optional[Tuple]:
+        op = inst.op
+        if op in _BINARY:
+            if is_string_concat(inst):
+                return None
+            a, b = operand_key(state, inst, "arg1", uses), operand_key(state, inst, "arg2", uses)
+            if a is None or b is None:
+                return None
+            if op in _COMMUTATIVE and b < a:
+                a, b = b, a
+            return (op, a, b)
+        if op in (TACOp.NEG, TACOp.NOT):
+            a = operand_key(state, inst, "arg1", uses)
+            return None if a is None else (op, a)
+        if op == TACOp.FIELD_ACCESS:
+            prop = inst.arg2
+            if not (getattr(prop, "is_constant", False) and isinstance(prop.value, int)):
+                return None     # dirección de método: la resuelve el backend por tipo
+            a = operand_key(state, inst, "arg1", uses)
+            gen = (state.memory["*"], state.memory.get(("field", prop.value), 0))
+            return None if a is None else (op, a, prop.value, gen)
+        if op == TACOp.ARRAY_ACCESS:
+            a, b = operand_key(state, inst, "arg1", uses), operand_key(state, inst, "arg2", uses)
+            gen = (state.memory["*"], state.memory.get("array", 0))
+            return None if a is None or b is None else (op, a, b, gen)
+        return None
+
+    def kill(state: _State, what):
+        state.memory[what] = next(fresh)
+
+    def visit(b: int, state: _State):
+        preds = [p for p in blocks[b].preds if ssa.reachable[p]]
+        if preds != [ssa.idom[b]]:
+            kill(state, "*")        # se puede llegar sin pasar por el idom
+        for phi in ssa.phis[b]:
+            state.current[phi.var] = phi.dest
+            vn_name((phi.var, phi.dest))
+        for i, inst in enumerate(blocks[b].instructions):
+            uses = ssa.uses[b][i]
+            d = ssa.defs[b][i]
+            vn: Optional[int] = None
+
+            if inst.op in (TACOp.ASSIGN, TACOp.DEREF):
+                src = operand_key(state, inst, "arg1", uses)
+                if src is not None:
+                    vn = src[1] if src[0] == "vn" else None
+                    if vn is None:
+                        # Lectura de un global: se numera como expresión
+                        vn = state.exprs.get(src)
+                        if vn is None:
+                            vn = state.exprs[src] = next(fresh)
+            else:
+                key = expression(state, inst, uses)
+                if key is not None:
+                    vn = state.exprs.get(key)
+                    if vn is not None and d is not None:
+                        holder = state.holder(vn)
+                        if holder is not None:
+                            if holder[0] == d[0]:
+                                changes[id(inst)] = None      # x = x
+                            else:
+                                changes[id(inst)] = TACInstruction(TACOp.ASSIGN, inst.result,
+                                                                   operands[holder])
+                    if vn is None:
+                        vn = state.exprs[key] = next(fresh)
+
+            # Efectos sobre la memoria
+            if inst.op == TACOp.CALL:
+                kill(state, "*")
+            elif inst.op == TACOp.FIELD_ASSIGN:
+                prop = inst.arg1
+                if getattr(prop, "is_constant", False) and isinstance(prop.value, int):
+                    kill(state, ("field", prop.value))
+                else:
+                    kill(state, "*")
+            elif inst.op == TACOp.ARRAY_ASSIGN:
+                kill(state, "array")
+            elif inst.result is not None and str(inst.result).startswith("0x") and d is None \
+                    and inst.op not in (TACOp.FIELD_ASSIGN, TACOp.ARRAY_ASSIGN):
+                kill(state, ("global", str(inst.result)))
+
+            if d is not None:
+                state.current[d[0]] = d[1]
+                operands.setdefault(d, inst.result)
+                vn_of[d] = vn if vn is not None else next(fresh)
+                state.hold(vn_of[d], d)
+
+    entry = next(b for b, r in enumerate(ssa.reachable) if r)
+    stack: List[Tuple[int, _State]] = [(entry, _State())]
+    while stack:
+        b, parent = stack.pop()
+        state = _State(parent)
+        visit(b, state)
+        for c in reversed(ssa.dom_children[b]):
+            stack.append((c, state))
+    return changes
@@ -0,0 +1,221 @@
+"""
+Reducción de fuerza de variables de inducción en accesos a arrays
+
+Una variable de inducción básica de un loop es un temporal o slot del frame
+cuyas únicas definiciones dentro del loop son incrementos constantes:
+
+    i = i + c                      (foreach: índice en un temporal)
+    t = i + c; ...; i = t          (for/while: 'i = i + 1' sobre un slot)
+
+Para cada acceso B[i] o B[i + k] del loop con la base B invariante se crea
+un puntero derivado p = B + 4*i en el preheader, que se incrementa en 4*c
+justo después de cada incremento de i. El acceso pasa a ser p[k] con índice
+constante, que el backend emite como un solo 'lw/sw 4k(p)' en vez de
+sll + add + lw sobre el índice recién cargado.
+
+Todos los accesos con la misma base y la misma variable comparten el
+puntero. Como p se actualiza en el mismo punto que i, p == B + 4*i vale en
+todo el loop sin importar por qué camino se llegue al acceso.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .tac import TACInstruction, TACOp, TACOperand
+from .cfg import FunctionCFG
+from .liveness import temp_name
+from .loops import Loop, find_loops
+
+_SLOT_RE = re.compile(r"FP\[-?\d+\]$")
+
+_WRITES_RESULT = {
+    TACOp.ADD, TACOp.SUB, TACOp.MUL, TACOp.DIV, TACOp.MOD,
+    TACOp.LT, TACOp.LE, TACOp.GT, TACOp.GE, TACOp.EQ, TACOp.NE,
+    TACOp.AND, TACOp.OR, TACOp.ASSIGN, TACOp.NEG, TACOp.NOT, TACOp.DEREF,
+    TACOp.POP, TACOp.NEW, TACOp.CALL, TACOp.FIELD_ACCESS, TACOp.ARRAY_ACCESS,
+}
+
+NewTemp = Callable[[object], TACOperand]
+
+
+@dataclass
+class IVRewrite:
+    """Cambios sobre las instrucciones de una región"""
+    before: Dict[int, List[TACInstruction]] = field(default_factory=dict)   # preheaders
+    replace: Dict[int, TACInstruction] = field(default_factory=dict)       # accesos
+    after: Dict[int, List[TACInstruction]] = field(default_factory=dict)    # incrementos del puntero
+    pointers: int = 0
+    accesses: int = 0
+
+
+def _variable(op) -> Optional[str]:
+    """Nombre si el operando es un temporal o un slot del frame"""
+    if op is None or getattr(op, "is_constant", False):
+        return None
+    name = temp_name(op)
+    if name is not None:
+        return name
+    name = str(op)
+    return name if _SLOT_RE.match(name) else None
+
+
+def _int_const(op) -> Optional[int]:
+    if getattr(op, "is_constant", False) and isinstance(op.value, int) and not isinstance(op.value, bool):
+        return op.value
+    return None
+
+
+def _offset_of(inst: TACInstruction, var: str) -> Optional[int]:
+    """k si inst calcula 'var + k' (o 'var - k', 'k + var'), si no None"""
+    if inst.op == TACOp.ADD:
+        if _variable(inst.arg1) == var and _int_const(inst.arg2) is not None:
+            return _int_const(inst.arg2)
+        if _variable(inst.arg2) == var and _int_const(inst.arg1) is not None:
+            return _int_const(inst.arg1)
+    if inst.op == TACOp.SUB and _variable(inst.arg1) == var and _int_const(inst.arg2) is not None:
+        return -_int_const(inst.arg2)
+    return None
+
+
+def loop_defs(cfg: FunctionCFG, loop: Loop) -> Dict[str, int]:
+    """Cantidad de definiciones de cada temporal/slot dentro del loop"""
+    defs: Dict[str, int] = {}
+    for b in loop.blocks:
+        for inst in cfg.blocks[b].instructions:
+            if inst.op in _WRITES_RESULT:
+                name = _variable(inst.result)
+                if name is not None:
+                    defs[name] = defs.get(name, 0) + 1
+    return defs
+
+
+def basic_ivs(cfg: FunctionCFG, loop: Loop, defs: Dict[str, int]) -> Dict[str, Dict[int, int]]:
+    """Variables de inducción básicas: variable -> {id(instrucción que la incrementa): paso}"""
+    candidates: Dict[str, Dict[int, int]] = {}
+    rejected: Set[str] = set()
+    for b in loop.blocks:
+        insts = cfg.blocks[b].instructions
+        for k, inst in enumerate(insts):
+            if inst.op not in _WRITES_RESULT:
+                continue
+            var = _variable(inst.result)
+            if var is None:
+                continue
+            step = _offset_of(inst, var)                       # i = i + c
+            if step is None and inst.op == TACOp.ASSIGN:
+                src = temp_name(inst.arg1)                     # t = i + c; ...; i = t
+                for j in range(k - 1, -1, -1):
+                    prev = insts[j]
+                    if prev.op not in _WRITES_RESULT:
+                        continue
+                    defined = _variable(prev.result)
+                    if defined == src:
+                        step = _offset_of(prev, var)
+                        break
+                    if defined == var:
+                        break
+            if step is None:
+                rejected.add(var)
+            else:
+                candidates.setdefault(var, {})[id(inst)] = step
+    return {v: incs for v, incs in candidates.items()
+            if v not in rejected and len(incs) == defs.get(v, 0)}
+
+
+def _index_of(insts: List[TACInstruction], k: int, index_op,
+              ivs: Dict[str, Dict[int, int]], defs: Dict[str, int]) -> Optional[Tuple[str, int]]:
+    """(variable de inducción, desplazamiento) del índice del acceso insts[k]"""
+    name = _variable(index_op)
+    if name is None:
+        return None
+    if name in ivs:
+        return name, 0
+    if temp_name(index_op) is None or defs.get(name, 0) != 1:
+        return None
+    # Índice derivado: u = i + k en el mismo bloque, sin redefinir i ni u en el medio
+    for j in range(k - 1, -1, -1):
+        prev = insts[j]
+        if prev.op not in _WRITES_RESULT:
+            continue
+        defined = _variable(prev.result)
+        if defined == name:
+            for var in ivs:
+                off = _offset_of(prev, var)
+                if off is not None:
+                    return var, off
+            return None
+        if defined in ivs:
+            return None
+    return None
+
+
+def _reduce_loop(cfg: FunctionCFG, loop: Loop, rewrite: IVRewrite, new_temp: NewTemp):
+    blocks = cfg.blocks
+    defs = loop_defs(cfg, loop)
+    ivs = basic_ivs(cfg, loop, defs)
+    if not ivs:
+        return
+
+    pointers: Dict[Tuple[str, str], TACOperand] = {}
+    preheader: List[TACInstruction] = []
+    iv_ops: Dict[str, object] = {}
+    for b in sorted(loop.blocks):
+        insts = blocks[b].instructions
+        for k, inst in enumerate(insts):
+            if id(inst) in rewrite.replace:
+                continue
+            if inst.op == TACOp.ARRAY_ACCESS:
+                base, index = inst.arg1, inst.arg2
+            elif inst.op == TACOp.ARRAY_ASSIGN:
+                base, index = inst.result, inst.arg1
+            else:
+                continue
+            base_name = _variable(base)
+            if base_name is None or defs.get(base_name, 0):
+                continue
+            found = _index_of(insts, k, index, ivs, defs)
+            if found is None:
+                continue
+            var, offset = found
+            key = (base_name, var)
+            p = pointers.get(key)
+            if p is None:
+                p = pointers[key] = new_temp(None)
+                scaled = new_temp(None)
+                iv_op = iv_ops.setdefault(var, _iv_operand(cfg, loop, var))
+                preheader.append(TACInstruction(TACOp.MUL, scaled, iv_op, TACOperand(4, is_constant=True)))
+                preheader.append(TACInstruction(TACOp.ADD, p, base, scaled))
+                for inc_id, step in ivs[var].items():
+                    rewrite.after.setdefault(inc_id, []).append(
+                        TACInstruction(TACOp.ADD, p, p, TACOperand(4 * step, is_constant=True)))
+                rewrite.pointers += 1
+            const = TACOperand(offset, is_constant=True, typ="integer")
+            if inst.op == TACOp.ARRAY_ACCESS:
+                rewrite.replace[id(inst)] = TACInstruction(TACOp.ARRAY_ACCESS, inst.result, p, const)
+            else:
+                rewrite.replace[id(inst)] = TACInstruction(TACOp.ARRAY_ASSIGN, p, const, inst.arg2)
+            rewrite.accesses += 1
+
+    if preheader:
+        first = blocks[loop.header].instructions[0]
+        rewrite.before.setdefault(id(first), []).extend(preheader)
+
+
+def _iv_operand(cfg: FunctionCFG, loop: Loop, var: str):
+    """Un operando del loop que nombra a la variable (para leerla en el preheader)"""
+    for b in loop.blocks:
+        for inst in cfg.blocks[b].instructions:
+            for op in (inst.result, inst.arg1, inst.arg2):
+                if _variable(op) == var:
+                    return op
+    raise KeyError(var)
+
+
+def reduce_induction_variables(cfg: FunctionCFG, new_temp: NewTemp) -> IVRewrite:
+    """Punteros derivados para los accesos a arrays de los loops de una región"""
+    rewrite = IVRewrite()
+    forest = find_loops(cfg)
+    for loop in forest.innermost_first():
+        if forest.preheader_pred(loop) is not None:
+            _reduce_loop(cfg, loop, rewrite, new_temp)
+    return rewrite
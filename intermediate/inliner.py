@@ -0,0 +1,361 @@
+"""
+Inlining de funciones y métodos pequeños (-O3)
+
+Una llamada directa la emite el generador siempre con la misma forma:
+
+    push aN ... push a1        (a1 queda en FP[8], a2 en FP[12], ...)
+    t = call f, N
+    SP = SP + 4N
+
+Si 'f' es chica (hasta 'threshold' instrucciones), no es recursiva y su
+cuerpo solo usa el frame de las formas conocidas, la secuencia se reemplaza
+por una copia del cuerpo sin prólogo ni epílogo:
+
+  - las lecturas de parámetros (@FP[8+4k], 'this') pasan a ser el operando
+    del argumento (o una copia en un temporal nuevo si el parámetro se
+    reasigna o el argumento es un global),
+  - los locales FP[-k] del callee pasan a ser temporales nuevos,
+  - temporales y etiquetas se renombran para no chocar con los del caller,
+  - 'return x' pasa a ser 't = x; goto Lfin'.
+
+Las llamadas a métodos (t = obj."m"; push ...; call t, N) se resuelven
+estáticamente por el tipo de 'obj', igual que hacen el MIPSGenerator y la
+VM, y se inlinean con las mismas reglas. Las funciones se procesan de las
+hojas hacia arriba, así el cuerpo que se copia ya tiene inlineadas sus
+propias llamadas.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from .tac import TACInstruction, TACOp, TACOperand, TACProgram
+
+DEFAULT_INLINE_THRESHOLD = 24
+
+_FP_RE = re.compile(r"FP\[(-?\d+)\]$")
+_TEMP_RE = re.compile(r"t(\d+)$")
+
+# Instrucciones del callee que no se copian (marcadores y prólogo)
+_SKIPPED = {TACOp.FUNC_START, TACOp.FUNC_END, TACOp.ENTER, TACOp.PARAM}
+
+
+@dataclass
+class InlineStats:
+    """Resumen del inlining para el reporte del optimizador"""
+    sites: int = 0                                   # llamadas inlineadas
+    growth: int = 0                                  # instrucciones agregadas (neto)
+    functions: Dict[str, int] = field(default_factory=dict)   # callee -> veces
+
+
+class _Abort(Exception):
+    """El cuerpo usa algo que el inliner no sabe remapear"""
+
+
+def _fp_offset(op) -> Optional[int]:
+    if op is None or getattr(op, "is_constant", False) or getattr(op, "is_temp", False):
+        return None
+    m = _FP_RE.match(str(op))
+    return int(m.group(1)) if m else None
+
+
+def _call_name(inst: TACInstruction) -> Optional[str]:
+    """Nombre de la función de una llamada directa"""
+    target = inst.arg1
+    if target is None or getattr(target, "is_temp", False):
+        return None
+    return str(target)
+
+
+def _function_spans(instructions: Sequence[TACInstruction]) -> Dict[str, Tuple[int, int]]:
+    """nombre -> (índice de FUNC_START, índice de FUNC_END)"""
+    spans: Dict[str, Tuple[int, int]] = {}
+    start: Optional[int] = None
+    for i, inst in enumerate(instructions):
+        if inst.op == TACOp.FUNC_START:
+            start = i
+        elif inst.op == TACOp.FUNC_END and start is not None:
+            spans[str(instructions[start].arg1)] = (start, i)
+            start = None
+    return spans
+
+
+def _max_number(instructions: Sequence[TACInstruction]) -> Tuple[int, int]:
+    """(mayor número de temporal, mayor número de etiqueta) usados"""
+    max_temp = max_label = 0
+    for inst in instructions:
+        for op in (inst.result, inst.arg1, inst.arg2):
+            if op is None or getattr(op, "is_constant", False):
+                continue
+            if getattr(op, "is_label", False) and isinstance(op.value, int):
+                max_label = max(max_label, op.value)
+                continue
+            m = _TEMP_RE.match(str(op))
+            if m:
+                max_temp = max(max_temp, int(m.group(1)))
+    return max_temp, max_label
+
+
+class Inliner:
+    """Reemplaza llamadas a funciones chicas por una copia de su cuerpo"""
+
+    def __init__(self, program: TACProgram, threshold: int = DEFAULT_INLINE_THRESHOLD):
+        self.program = program
+        self.threshold = threshold
+        self.stats = InlineStats()
+        self._bodies: Dict[str, List[TACInstruction]] = {}
+        self._candidates: Set[str] = set()
+        self._next_temp = 0
+
+    # -------- API --------
+    def run(self, instructions: List[TACInstruction]) -> List[TACInstruction]:
+        spans = _function_spans(instructions)
+        if not spans or self.threshold <= 0:
+            return instructions
+        self._bodies = {name: list(instructions[s:e + 1]) for name, (s, e) in spans.items()}
+        max_temp, max_label = _max_number(instructions)
+        self._next_temp = max_temp + 1
+        self.program.label_counter = max(self.program.label_counter, max_label + 1)
+
+        graph = {name: self._callees(body) for name, body in self._bodies.items()}
+        recursive = {name for name in graph if self._reaches(graph, name, name)}
+
+        # Hojas primero: cada cuerpo se inlinea con sus callees ya procesados
+        for name in self._bottom_up(graph):
+            if name not in recursive and not self._has_nested(self._bodies[name]):
+                self._bodies[name] = self._inline_into(self._bodies[name], name)
+            if name not in recursive and self._size(self._bodies[name]) <= self.threshold:
+                self._candidates.add(name)
+
+        result: List[TACInstruction] = []
+        segment: List[TACInstruction] = []
+        starts = {s: (name, e) for name, (s, e) in spans.items()}
+        i = 0
+        while i < len(instructions):
+            if i in starts:
+                result.extend(self._inline_into(segment, None))
+                segment = []
+                name, end = starts[i]
+                result.extend(self._bodies[name])
+                i = end + 1
+                continue
+            segment.append(instructions[i])
+            i += 1
+        result.extend(self._inline_into(segment, None))
+        return result
+
+    # -------- grafo de llamadas --------
+    def _callees(self, body: Sequence[TACInstruction]) -> Set[str]:
+        names = set()
+        for k, inst in enumerate(body):
+            if inst.op != TACOp.CALL:
+                continue
+            name = _call_name(inst) or self._method_target(body, k)
+            if name in self._bodies:
+                names.add(name)
+        return names
+
+    @staticmethod
+    def _reaches(graph: Dict[str, Set[str]], src: str, dst: str) -> bool:
+        stack, seen = list(graph.get(src, ())), set()
+        while stack:
+            n = stack.pop()
+            if n == dst:
+                return True
+            if n not in seen:
+                seen.add(n)
+                stack.extend(graph.get(n, ()))
+        return False
+
+    @staticmethod
+    def _bottom_up(graph: Dict[str, Set[str]]) -> List[str]:
+        order: List[str] = []
+        seen: Set[str] = set()
+
+        def visit(n: str):
+            seen.add(n)
+            for c in sorted(graph.get(n, ())):
+                if c not in seen:
+                    visit(c)
+            order.append(n)
+
+        for n in graph:
+            if n not in seen:
+                visit(n)
+        return order
+
+    @staticmethod
+    def _has_nested(body: Sequence[TACInstruction]) -> bool:
+        return any(inst.op == TACOp.FUNC_START for inst in body[1:])
+
+    @staticmethod
+    def _size(body: Sequence[TACInstruction]) -> int:
+        return sum(1 for inst in body if inst.op not in _SKIPPED
+                   and inst.op not in (TACOp.LABEL, TACOp.LEAVE))
+
+    def _method_target(self, seq: Sequence[TACInstruction], call_at: int) -> Optional[str]:
+        """Función que resuelve una llamada indirecta 'call tK' si tK = obj."m" en el mismo bloque"""
+        target = seq[call_at].arg1
+        if not getattr(target, "is_temp", False):
+            return None
+        name = str(target)
+        for k in range(call_at - 1, -1, -1):
+            inst = seq[k]
+            if inst.op in (TACOp.LABEL, TACOp.GOTO, TACOp.IF_TRUE, TACOp.IF_FALSE,
+                           TACOp.CALL, TACOp.FUNC_START):
+                return None
+            if str(inst.result) != name:
+                continue
+            prop = inst.arg2
+            if inst.op != TACOp.FIELD_ACCESS or not getattr(prop, "is_constant", False) \
+                    or not isinstance(prop.value, str):
+                return None
+            member = prop.value
+            exact = f"{getattr(inst.arg1, 'typ', None)}.{member}"
+            if exact in self._bodies:
+                return exact
+            # Heredado: solo si hay una única implementación con ese nombre
+            matches = [f for f in self._bodies if f.endswith(f".{member}")]
+            return matches[0] if len(matches) == 1 else None
+        return None
+
+    # -------- inlining --------
+    def _inline_into(self, seq: List[TACInstruction], owner: Optional[str]) -> List[TACInstruction]:
+        out: List[TACInstruction] = []
+        i = 0
+        while i < len(seq):
+            inst = seq[i]
+            if inst.op == TACOp.CALL:
+                expansion = self._try_inline(seq, i, out, owner)
+                if expansion is not None:
+                    n_args, body = expansion
+                    del out[len(out) - n_args:]
+                    out.extend(body)
+                    i += 2 if n_args else 1   # también se consume el 'SP = SP + 4N'
+                    continue
+            out.append(inst)
+            i += 1
+        return out
+
+    def _try_inline(self, seq: List[TACInstruction], i: int, out: List[TACInstruction],
+                    owner: Optional[str]) -> Optional[Tuple[int, List[TACInstruction]]]:
+        call = seq[i]
+        name = _call_name(call) or self._method_target(seq, i)
+        if name is None or name == owner or name not in self._candidates or "toString" in name:
+            return None
+        count = call.arg2
+        if not (getattr(count, "is_constant", False) and isinstance(count.value, int)):
+            return None
+        n = count.value
+        if len(out) < n or any(p.op != TACOp.PUSH for p in out[len(out) - n:]):
+            return None
+        if n:
+            cleanup = seq[i + 1] if i + 1 < len(seq) else None
+            if cleanup is None or cleanup.op != TACOp.ADD_SP or \
+                    getattr(cleanup.arg1, "value", None) != 4 * n:
+                return None
+        # El último push es el primer argumento (FP[8])
+        args = [p.arg1 for p in reversed(out[len(out) - n:])]
+        try:
+            body = self._expand(self._bodies[name], args, call.result)
+        except _Abort:
+            return None
+        self.stats.sites += 1
+        self.stats.growth += len(body) - (n + 2 if n else 1)   # pushes + call + SP
+        self.stats.functions[name] = self.stats.functions.get(name, 0) + 1
+        return n, body
+
+    def _fresh_temp(self, like) -> TACOperand:
+        t = TACOperand(self._next_temp, is_temp=True, typ=getattr(like, "typ", None))
+        self._next_temp += 1
+        return t
+
+    def _expand(self, body: List[TACInstruction], args: List, result) -> List[TACInstruction]:
+        """Copia del cuerpo con parámetros, locales, temporales y etiquetas remapeados"""
+        # Parámetros que el callee reasigna: necesitan su propia copia
+        written: Set[int] = set()
+        for inst in body:
+            off = _fp_offset(inst.result)
+            if off is not None and off >= 8 and inst.op not in (TACOp.ARRAY_ASSIGN, TACOp.FIELD_ASSIGN):
+                written.add(off)
+
+        prologue: List[TACInstruction] = []
+        params: Dict[int, object] = {}
+        for k, arg in enumerate(args):
+            off = 8 + 4 * k
+            direct = getattr(arg, "is_constant", False) or getattr(arg, "is_temp", False) \
+                or _fp_offset(arg) is not None
+            if direct and off not in written:
+                params[off] = arg
+            else:
+                copy = self._fresh_temp(arg)
+                prologue.append(TACInstruction(TACOp.ASSIGN, copy, arg))
+                params[off] = copy
+
+        temps: Dict[str, TACOperand] = {}
+        locals_: Dict[int, TACOperand] = {}
+        # Las etiquetas se reconocen por nombre: los saltos no siempre las marcan is_label
+        labels: Dict[str, Optional[TACOperand]] = {
+            str(inst.arg1): None for inst in body if inst.op == TACOp.LABEL
+        }
+        end_label = self.program.new_label()
+
+        def remap(op):
+            if op is None or getattr(op, "is_constant", False):
+                return op
+            name = str(op)
+            if name in labels:
+                if labels[name] is None:
+                    labels[name] = self.program.new_label()
+                return labels[name]
+            if getattr(op, "is_temp", False) or _TEMP_RE.match(name):
+                if name not in temps:
+                    temps[name] = self._fresh_temp(op)
+                return temps[name]
+            if name == "this":
+                name = "FP[8]"
+            off = _fp_offset(name)
+            if off is None:
+                return op          # globales, nombres de función
+            if off >= 8:
+                if off not in params or (off - 8) % 4:
+                    raise _Abort()
+                return params[off]
+            if off < 0:
+                if off not in locals_:
+                    locals_[off] = self._fresh_temp(op)
+                return locals_[off]
+            raise _Abort()
+
+        def exit_with(value) -> List[TACInstruction]:
+            code = []
+            if result is not None:
+                if value is None:
+                    value = TACOperand(0, is_constant=True, typ=result.typ)
+                code.append(TACInstruction(TACOp.ASSIGN, result, value))
+            return code
+
+        code: List[TACInstruction] = []
+        for inst in body:
+            op = inst.op
+            if op in _SKIPPED:
+                continue
+            if op == TACOp.POP:
+                raise _Abort()
+            if op in (TACOp.RETURN, TACOp.LEAVE):
+                code.extend(exit_with(remap(inst.arg1) if op == TACOp.RETURN else None))
+                code.append(TACInstruction(TACOp.GOTO, arg1=end_label))
+                continue
+            if op == TACOp.LABEL:
+                code.append(TACInstruction(TACOp.LABEL, arg1=remap(inst.arg1)))
+                continue
+            new_op = op
+            if op == TACOp.DEREF and _fp_offset(inst.arg1) is not None or \
+                    op == TACOp.DEREF and str(inst.arg1) == "this":
+                new_op = TACOp.ASSIGN    # leer un slot del frame es una copia
+            code.append(TACInstruction(new_op, remap(inst.result), remap(inst.arg1), remap(inst.arg2)))
+
+        # El último salto al final es un fallthrough
+        if code and code[-1].op == TACOp.GOTO and code[-1].arg1 is end_label:
+            code.pop()
+        code.append(TACInstruction(TACOp.LABEL, arg1=end_label))
+        return prologue + code
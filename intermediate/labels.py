@@ -0,0 +1,116 @@
+"""
+Índice de etiquetas del TAC
+
+Para cada etiqueta definida (LABEL) guarda su posición y las instrucciones
+que la nombran (saltos y cualquier otro operando con ese nombre). Se arma
+en una pasada y se actualiza en O(1) al borrar una instrucción o cambiar el
+destino de un salto, así los pases de saltos no tienen que volver a
+recorrer todo el programa por cada etiqueta.
+
+Uso:
+    index = LabelIndex(instructions)
+    index.references("L3")        # cuántas instrucciones la nombran
+    index.retarget(inst, label)    # cambia el destino de un salto
+    index.remove(inst)             # la instrucción deja de contar
+"""
+from typing import Dict, List, Optional, Sequence, Set
+
+from .tac import TACInstruction, TACOp, TACOperand
+
+
+class LabelIndex:
+    """Etiqueta -> posición de su LABEL e instrucciones que la usan"""
+
+    def __init__(self, instructions: Sequence[TACInstruction]):
+        self.instructions = instructions
+        self.position: Dict[str, int] = {}
+        self.uses: Dict[str, Set[int]] = {}       # etiqueta -> ids de instrucciones
+        for i, inst in enumerate(instructions):
+            if inst.op == TACOp.LABEL:
+                self.position.setdefault(str(inst.arg1), i)
+        for inst in instructions:
+            for name in self._names(inst):
+                self.uses.setdefault(name, set()).add(id(inst))
+
+    def _names(self, inst: TACInstruction) -> List[str]:
+        """Etiquetas definidas que nombra una instrucción (que no sea su LABEL)"""
+        if inst.op == TACOp.LABEL:
+            return []
+        names = []
+        for op in (inst.result, inst.arg1, inst.arg2):
+            if op is not None and not getattr(op, "is_constant", False):
+                name = str(op)
+                if name in self.position:
+                    names.append(name)
+        return names
+
+    def references(self, label: str) -> int:
+        return len(self.uses.get(label, ()))
+
+    def remove(self, inst: TACInstruction):
+        """La instrucción se borró: deja de referenciar sus etiquetas"""
+        for name in self._names(inst):
+            self.uses.get(name, set()).discard(id(inst))
+
+    def retarget(self, inst: TACInstruction, label: TACOperand) -> TACInstruction:
+        """Salto equivalente a 'inst' hacia 'label' (el índice queda actualizado)"""
+        self.remove(inst)
+        if inst.op == TACOp.GOTO:
+            new = TACInstruction(TACOp.GOTO, inst.result, label, inst.arg2)
+        else:
+            new = TACInstruction(inst.op, inst.result, inst.arg1, label)
+        for name in self._names(new):
+            self.uses.setdefault(name, set()).add(id(new))
+        return new
+
+    def thread_targets(self) -> Dict[str, TACOperand]:
+        """
+        Destino final de cada etiqueta seguida (salteando otras etiquetas) por
+        un GOTO: 'L1: goto L2 ... L2: goto L3' -> L1 y L2 van a L3. Lineal: cada
+        cadena se recorre una vez y se comprime.
+        """
+        insts = self.instructions
+        # Primera instrucción que no es LABEL desde cada posición
+        first_real: List[int] = [len(insts)] * (len(insts) + 1)
+        for i in range(len(insts) - 1, -1, -1):
+            first_real[i] = first_real[i + 1] if insts[i].op == TACOp.LABEL else i
+
+        final: Dict[str, Optional[TACOperand]] = {}
+
+        def resolve(label: str) -> Optional[TACOperand]:
+            chain: List[str] = []
+            seen: Set[str] = set()
+            target: Optional[TACOperand] = None
+            cycle = False
+            while label in self.position and label not in final:
+                if label in seen:
+                    cycle = True       # ciclo de gotos: se deja como está
+                    break
+                seen.add(label)
+                k = first_real[self.position[label]]
+                if k >= len(insts) or insts[k].op != TACOp.GOTO:
+                    break
+                chain.append(label)
+                target = insts[k].arg1
+                label = str(target)
+            if cycle:
+                target = None
+            elif label in final and final[label] is not None:
+                target = final[label]
+            for name in chain:
+                final[name] = target
+            return target
+
+        for label in self.position:
+            if label not in final:
+                resolve(label)
+        return {name: t for name, t in final.items() if t is not None}
+
+
+def jump_label(inst: TACInstruction) -> Optional[TACOperand]:
+    """Operando destino de un GOTO/IF, o None"""
+    if inst.op == TACOp.GOTO:
+        return inst.arg1
+    if inst.op in (TACOp.IF_TRUE, TACOp.IF_FALSE):
+        return inst.arg2
+    return None
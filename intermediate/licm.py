@@ -0,0 +1,165 @@
+"""
+Loop-invariant code motion
+
+Para cada loop natural con preheader (ver loops.py), del más interno al más
+externo, se sacan del loop las instrucciones 't = ...' cuyo valor no cambia
+entre iteraciones y se ponen justo antes de la cabecera. Una instrucción es
+invariante si:
+
+  - es una operación sin efectos: aritmética/relacional/lógica (DIV/MOD solo
+    con divisor constante distinto de 0, para no adelantar un error),
+    copia, negación, carga de un slot del frame o de un global, o la
+    dirección de un método (obj."m");
+  - cada operando es constante, una variable que el loop no escribe, o un
+    temporal definido por otra instrucción invariante ya sacada;
+  - define un temporal. Si el loop lo define una sola vez y no está vivo a
+    la entrada de la cabecera, la instrucción se mueve tal cual; si no (el
+    generador reutiliza temporales), el cálculo se hace en el preheader en
+    un temporal nuevo y en el loop queda la copia 't = tNuevo'.
+
+Alias: un global (0x...) se considera escrito si el loop tiene un CALL; los
+slots del frame solo por escrituras directas (ninguna llamada puede tocar el
+frame del caller). Las cargas del heap (arr[i], obj.campo) solo salen si el
+loop no tiene CALL, ARRAY_ASSIGN ni FIELD_ASSIGN y su bloque se ejecuta en
+toda iteración que sale del loop (no se adelanta un acceso que quizás nunca
+se hacía).
+"""
+import re
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .tac import TACInstruction, TACOp, TACOperand, is_string_concat
+from .liveness import FunctionLiveness, temp_name
+from .loops import Loop, LoopForest, find_loops
+from .ssa import use_slots
+
+_SLOT_RE = re.compile(r"FP\[-?\d+\]$")
+
+_ARITH = {
+    TACOp.ADD, TACOp.SUB, TACOp.MUL, TACOp.DIV, TACOp.MOD,
+    TACOp.LT, TACOp.LE, TACOp.GT, TACOp.GE, TACOp.EQ, TACOp.NE,
+    TACOp.AND, TACOp.OR,
+}
+_HEAP_WRITES = {TACOp.CALL, TACOp.ARRAY_ASSIGN, TACOp.FIELD_ASSIGN}
+
+# Operaciones que escriben 'result'
+_WRITES_RESULT = _ARITH | {
+    TACOp.ASSIGN, TACOp.NEG, TACOp.NOT, TACOp.DEREF, TACOp.POP, TACOp.NEW,
+    TACOp.CALL, TACOp.FIELD_ACCESS, TACOp.ARRAY_ACCESS,
+}
+
+# Valor de retorno: (insertar antes de id(inst) -> instrucciones,
+#                   id(inst) -> None si se sacó / copia que la reemplaza)
+Hoisting = Tuple[Dict[int, List[TACInstruction]], Dict[int, Optional[TACInstruction]]]
+NewTemp = Callable[[object], TACOperand]
+
+
+def _location(op) -> Optional[str]:
+    """Nombre de la ubicación que lee un operando (temporal, slot o global)"""
+    if op is None or getattr(op, "is_constant", False):
+        return None
+    name = str(op)
+    return "FP[8]" if name == "this" else name
+
+
+def _kind(inst: TACInstruction) -> Optional[str]:
+    """'pure' si se puede ejecutar de más sin efectos, 'heap' si lee el heap, None si no se mueve"""
+    op = inst.op
+    if op in _ARITH:
+        if is_string_concat(inst):
+            return None
+        if op in (TACOp.DIV, TACOp.MOD):
+            divisor = inst.arg2
+            if not (getattr(divisor, "is_constant", False) and isinstance(divisor.value, int)
+                    and not isinstance(divisor.value, bool) and divisor.value != 0):
+                return None
+        return "pure"
+    if op in (TACOp.ASSIGN, TACOp.NEG, TACOp.NOT):
+        return "pure"
+    if op == TACOp.DEREF:
+        loc = _location(inst.arg1)
+        return "pure" if loc and (_SLOT_RE.match(loc) or loc.startswith("0x")) else None
+    if op == TACOp.FIELD_ACCESS:
+        prop = inst.arg2
+        if getattr(prop, "is_constant", False) and isinstance(prop.value, str):
+            return "pure"       # dirección de un método: no lee memoria
+        return "heap"
+    if op == TACOp.ARRAY_ACCESS:
+        return "heap"
+    return None
+
+
+def _hoist_loop(info: FunctionLiveness, forest: LoopForest, loop: Loop, rpo: List[int],
+                changes: Dict[int, Optional[TACInstruction]], new_temp: NewTemp) -> List[TACInstruction]:
+    """Instrucciones para el preheader del loop, en orden de ejecución"""
+    blocks = info.cfg.blocks
+    defs: Dict[str, int] = {}
+    has_call = heap_write = False
+    for b in loop.blocks:
+        for inst in blocks[b].instructions:
+            if inst.op in _WRITES_RESULT:
+                name = _location(inst.result)
+                if name is not None:
+                    defs[name] = defs.get(name, 0) + 1
+            has_call = has_call or inst.op == TACOp.CALL
+            heap_write = heap_write or inst.op in _HEAP_WRITES
+
+    invariant_temps: Set[str] = set()
+
+    def invariant(op) -> bool:
+        name = _location(op)
+        if name is None:
+            return True
+        if temp_name(op) is not None:
+            return defs.get(name, 0) == 0 or name in invariant_temps
+        if _SLOT_RE.match(name):
+            return defs.get(name, 0) == 0
+        if name.startswith("0x"):
+            return defs.get(name, 0) == 0 and not has_call
+        return False
+
+    header_live = info.live_in[loop.header]
+    hoisted: List[TACInstruction] = []
+    for b in rpo:
+        if b not in loop.blocks:
+            continue
+        for inst in blocks[b].instructions:
+            if id(inst) in changes:
+                continue
+            kind = _kind(inst)
+            if kind is None:
+                continue
+            dest = temp_name(inst.result)
+            if dest is None:
+                continue
+            if kind == "heap" and (heap_write or not forest.dominates_exits(loop, b)):
+                continue
+            if not all(invariant(getattr(inst, slot)) for slot in use_slots(inst)):
+                continue
+            if defs.get(dest, 0) == 1 and not header_live & info.bit(dest):
+                invariant_temps.add(dest)
+                changes[id(inst)] = None
+                hoisted.append(inst)
+            elif inst.op != TACOp.ASSIGN:
+                # Temporal reutilizado: calcular en uno nuevo y dejar la copia
+                fresh = new_temp(inst.result)
+                hoisted.append(TACInstruction(inst.op, fresh, inst.arg1, inst.arg2))
+                changes[id(inst)] = TACInstruction(TACOp.ASSIGN, inst.result, fresh)
+    return hoisted
+
+
+def hoist_invariants(info: FunctionLiveness, new_temp: NewTemp) -> Hoisting:
+    """Cambios de LICM para una región (según su liveness)"""
+    inserts: Dict[int, List[TACInstruction]] = {}
+    changes: Dict[int, Optional[TACInstruction]] = {}
+    forest = find_loops(info.cfg)
+    if not forest.loops:
+        return inserts, changes
+    rpo = info.cfg.reverse_postorder()
+    for loop in forest.innermost_first():
+        if forest.preheader_pred(loop) is None:
+            continue
+        hoisted = _hoist_loop(info, forest, loop, rpo, changes, new_temp)
+        if hoisted:
+            first = info.cfg.blocks[loop.header].instructions[0]
+            inserts.setdefault(id(first), []).extend(hoisted)
+    return inserts, changes
@@ -0,0 +1,215 @@
+"""
+Análisis de liveness global de temporales (dataflow hacia atrás sobre el CFG)
+
+Cada conjunto de temporales es un bitset (int de Python: el bit k es el
+temporal temps[k]), así uniones/diferencias son operaciones de enteros sin
+importar cuántos temporales tenga la función. El sistema
+
+    live_out[B] = OR live_in[S]   (S sucesor de B)
+    live_in[B]  = use[B] | (live_out[B] & ~def[B])
+
+se resuelve con un worklist que arranca en postorden. Los resultados se
+guardan por región en un LivenessCache (en program.analysis_cache): si las
+instrucciones de una función son los mismos objetos que la última vez, se
+reutiliza su análisis; solo se recalculan las funciones que un pase cambió.
+"""
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from .tac import TACInstruction, TACOp, TACProgram
+from .cfg import FunctionCFG, build_cfg, split_regions
+
+_TEMP_RE = re.compile(r"t+\d+$")
+
+_BINARY_OPS = {
+    TACOp.ADD, TACOp.SUB, TACOp.MUL, TACOp.DIV, TACOp.MOD,
+    TACOp.LT, TACOp.LE, TACOp.GT, TACOp.GE, TACOp.EQ, TACOp.NE,
+    TACOp.AND, TACOp.OR,
+}
+
+
+def temp_name(op) -> Optional[str]:
+    """Nombre del temporal ('t5') si el operando es uno, si no None"""
+    if op is None or getattr(op, "is_constant", False):
+        return None
+    name = str(op)
+    return name if _TEMP_RE.match(name) else None
+
+
+def uses_and_defs(inst: TACInstruction) -> Tuple[Set[str], Set[str]]:
+    """(usos, definiciones) de temporales según cómo el backend lee cada operando"""
+    op = inst.op
+    uses: List[Optional[str]] = []
+    defs: List[Optional[str]] = []
+    if op in _BINARY_OPS or op == TACOp.ARRAY_ACCESS:
+        uses = [temp_name(inst.arg1), temp_name(inst.arg2)]
+        defs = [temp_name(inst.result)]
+    elif op in (TACOp.ASSIGN, TACOp.NEG, TACOp.NOT, TACOp.FIELD_ACCESS):
+        uses = [temp_name(inst.arg1)]
+        defs = [temp_name(inst.result)]
+    elif op in (TACOp.DEREF, TACOp.POP, TACOp.NEW):
+        defs = [temp_name(inst.result)]
+    elif op == TACOp.ARRAY_ASSIGN:
+        uses = [temp_name(inst.result), temp_name(inst.arg1), temp_name(inst.arg2)]
+    elif op == TACOp.FIELD_ASSIGN:
+        uses = [temp_name(inst.result), temp_name(inst.arg2)]
+    elif op in (TACOp.IF_TRUE, TACOp.IF_FALSE, TACOp.RETURN, TACOp.PUSH, TACOp.PRINT):
+        uses = [temp_name(inst.arg1)]
+    elif op == TACOp.CALL:
+        target = inst.arg1
+        # Llamada indirecta: el temporal tiene la dirección (toString se intercepta)
+        if target is not None and getattr(target, "is_temp", False) and "toString" not in str(target):
+            uses = [temp_name(target)]
+        defs = [temp_name(inst.result)]
+    return {u for u in uses if u}, {d for d in defs if d}
+
+
+def iter_bits(bits: int):
+    """Índices de los bits encendidos"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+@dataclass
+class FunctionLiveness:
+    """Liveness de una región: bitsets por bloque y use/def por instrucción"""
+    cfg: FunctionCFG
+    temps: List[str] = field(default_factory=list)
+    index: Dict[str, int] = field(default_factory=dict)
+    inst_use: List[List[int]] = field(default_factory=list)    # [bloque][instrucción]
+    inst_def: List[List[int]] = field(default_factory=list)
+    use: List[int] = field(default_factory=list)               # por bloque
+    defs: List[int] = field(default_factory=list)
+    live_in: List[int] = field(default_factory=list)
+    live_out: List[int] = field(default_factory=list)
+    iterations: int = 0
+
+    def to_set(self, bits: int) -> Set[str]:
+        return {self.temps[k] for k in iter_bits(bits)}
+
+    def bit(self, temp: str) -> int:
+        k = self.index.get(temp)
+        return 0 if k is None else 1 << k
+
+    def instruction_live_out(self, b: int) -> List[int]:
+        """Bitset vivo DESPUÉS de cada instrucción del bloque b"""
+        live = self.live_out[b]
+        n = len(self.cfg.blocks[b].instructions)
+        out = [0] * n
+        uses, defs = self.inst_use[b], self.inst_def[b]
+        for i in range(n - 1, -1, -1):
+            out[i] = live
+            live = (live & ~defs[i]) | uses[i]
+        return out
+
+    def instruction_live_in(self, b: int) -> List[int]:
+        """Bitset vivo ANTES de cada instrucción del bloque b"""
+        outs = self.instruction_live_out(b)
+        uses, defs = self.inst_use[b], self.inst_def[b]
+        return [(outs[i] & ~defs[i]) | uses[i] for i in range(len(outs))]
+
+
+def compute_liveness(cfg: FunctionCFG) -> FunctionLiveness:
+    """Resuelve el dataflow de liveness de una región"""
+    info = FunctionLiveness(cfg)
+    index = info.index
+
+    def bits_of(names: Set[str]) -> int:
+        bits = 0
+        for name in names:
+            k = index.get(name)
+            if k is None:
+                k = index[name] = len(info.temps)
+                info.temps.append(name)
+            bits |= 1 << k
+        return bits
+
+    for block in cfg.blocks:
+        b_use = b_def = 0
+        i_use: List[int] = []
+        i_def: List[int] = []
+        for inst in block.instructions:
+            u, d = uses_and_defs(inst)
+            ub, db = bits_of(u), bits_of(d)
+            b_use |= ub & ~b_def
+            b_def |= db
+            i_use.append(ub)
+            i_def.append(db)
+        info.inst_use.append(i_use)
+        info.inst_def.append(i_def)
+        info.use.append(b_use)
+        info.defs.append(b_def)
+
+    n = len(cfg.blocks)
+    info.live_in = list(info.use)
+    info.live_out = [0] * n
+
+    # Postorden primero (converge rápido hacia atrás), luego los inalcanzables
+    order = cfg.postorder()
+    seen = set(order)
+    order.extend(b for b in range(n) if b not in seen)
+    work = deque(order)
+    queued = [True] * n
+    blocks = cfg.blocks
+    while work:
+        b = work.popleft()
+        queued[b] = False
+        info.iterations += 1
+        out = 0
+        for s in blocks[b].succs:
+            out |= info.live_in[s]
+        info.live_out[b] = out
+        new_in = info.use[b] | (out & ~info.defs[b])
+        if new_in != info.live_in[b]:
+            info.live_in[b] = new_in
+            for p in blocks[b].preds:
+                if not queued[p]:
+                    queued[p] = True
+                    work.append(p)
+    return info
+
+
+class LivenessCache:
+    """Liveness por región, reutilizada mientras sus instrucciones no cambien"""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Tuple[TACInstruction, ...], FunctionLiveness]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str, instructions: Sequence[TACInstruction]) -> FunctionLiveness:
+        entry = self._entries.get(name)
+        if entry is not None:
+            cached, info = entry
+            if len(cached) == len(instructions) and all(a is b for a, b in zip(cached, instructions)):
+                self.hits += 1
+                return info
+        self.misses += 1
+        info = compute_liveness(build_cfg(name, instructions))
+        # Guardar las instrucciones (no sus id()) evita falsos hits por reuso de memoria
+        self._entries[name] = (tuple(instructions), info)
+        return info
+
+    def analyze(self, instructions: Sequence[TACInstruction]) -> List[FunctionLiveness]:
+        """Liveness de todas las regiones de una lista plana de instrucciones"""
+        return [self.get(name, insts) for name, insts in split_regions(instructions)]
+
+    def invalidate(self, names: Optional[Sequence[str]] = None):
+        """Descarta el análisis de las regiones dadas (o de todas)"""
+        if names is None:
+            self._entries.clear()
+            return
+        for name in names:
+            self._entries.pop(name, None)
+
+
+def liveness_cache(program: TACProgram) -> LivenessCache:
+    """Caché de liveness asociada al programa"""
+    cache = program.analysis_cache.get("liveness")
+    if cache is None:
+        cache = program.analysis_cache["liveness"] = LivenessCache()
+    return cache
@@ -0,0 +1,118 @@
+"""
+Loops naturales sobre el CFG del TAC
+
+Una arista B -> H es de retroceso si H domina a B; el loop natural de esa
+arista es H más todos los bloques que llegan a B sin pasar por H. Las
+aristas de retroceso con la misma cabecera se juntan en un solo loop (el
+'continue' de un while salta a la cabecera igual que el final del cuerpo).
+
+El generador emite los loops como 'Lh: <condición> ... goto Lh' con la
+entrada por fallthrough desde el bloque anterior, así que el preheader no
+se crea como bloque aparte: es la posición justo antes de la primera
+instrucción de la cabecera, que solo se ejecuta al entrar desde afuera.
+preheader_pred() dice si un loop tiene esa forma.
+
+Uso:
+    forest = find_loops(cfg)
+    for loop in forest.innermost_first():
+        if forest.preheader_pred(loop) is not None: ...
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from .tac import TACOp
+from .cfg import FunctionCFG, dominators, dominates
+
+
+@dataclass
+class Loop:
+    """Loop natural: cabecera, bloques y aristas que salen"""
+    header: int
+    blocks: Set[int]
+    latches: List[int] = field(default_factory=list)     # orígenes de las aristas de retroceso
+    exits: List[int] = field(default_factory=list)       # bloques del loop con un sucesor afuera
+    parent: Optional["Loop"] = None
+    depth: int = 1
+
+    def __contains__(self, b: int) -> bool:
+        return b in self.blocks
+
+
+@dataclass
+class LoopForest:
+    """Todos los loops de una región con su anidamiento"""
+    cfg: FunctionCFG
+    idom: List[Optional[int]]
+    loops: List[Loop] = field(default_factory=list)
+
+    def innermost_first(self) -> List[Loop]:
+        return sorted(self.loops, key=lambda l: (-l.depth, l.header))
+
+    def loop_of(self, b: int) -> Optional[Loop]:
+        """Loop más interno que contiene al bloque b"""
+        best = None
+        for loop in self.loops:
+            if b in loop.blocks and (best is None or loop.depth > best.depth):
+                best = loop
+        return best
+
+    def preheader_pred(self, loop: Loop) -> Optional[int]:
+        """
+        Único predecesor de afuera de la cabecera si entra por fallthrough
+        (el bloque anterior en el layout); None si el loop no tiene esa forma.
+        """
+        outside = [p for p in self.cfg.blocks[loop.header].preds if p not in loop.blocks]
+        if len(outside) != 1 or outside[0] != loop.header - 1:
+            return None
+        term = self.cfg.blocks[outside[0]].terminator
+        if term is not None and term.op not in (TACOp.IF_TRUE, TACOp.IF_FALSE):
+            return None
+        return outside[0]
+
+    def dominates_exits(self, loop: Loop, b: int) -> bool:
+        """True si b se ejecuta en toda iteración que sale del loop"""
+        return all(dominates(self.idom, b, e) for e in loop.exits)
+
+
+def find_loops(cfg: FunctionCFG) -> LoopForest:
+    """Detecta los loops naturales de una región"""
+    idom = dominators(cfg)
+    forest = LoopForest(cfg, idom)
+    by_header: Dict[int, Loop] = {}
+
+    for block in cfg.blocks:
+        b = block.index
+        if idom[b] is None:
+            continue  # inalcanzable
+        for h in block.succs:
+            if idom[h] is None or not dominates(idom, h, b):
+                continue
+            loop = by_header.get(h)
+            if loop is None:
+                loop = by_header[h] = Loop(h, {h})
+            loop.latches.append(b)
+            # Subir por predecesores desde el latch hasta la cabecera
+            stack = [b]
+            while stack:
+                x = stack.pop()
+                if x in loop.blocks:
+                    continue
+                loop.blocks.add(x)
+                stack.extend(p for p in cfg.blocks[x].preds if idom[p] is not None)
+
+    loops = sorted(by_header.values(), key=lambda l: len(l.blocks))
+    for k, loop in enumerate(loops):
+        loop.exits = sorted(b for b in loop.blocks
+                            if any(s not in loop.blocks for s in cfg.blocks[b].succs))
+        # El padre es el loop más chico que lo contiene
+        for outer in loops[k + 1:]:
+            if loop.header in outer.blocks and loop.blocks <= outer.blocks and outer is not loop:
+                loop.parent = outer
+                break
+    for loop in loops:
+        depth, p = 1, loop.parent
+        while p is not None:
+            depth, p = depth + 1, p.parent
+        loop.depth = depth
+    forest.loops = loops
+    return forest
@@ -1,10 +1,28 @@
 """
 Optimizador de código intermedio TAC
 Implementa optimizaciones locales básicas + optimizaciones quirúrgicas avanzadas
+
+Niveles (los mismos en mips_driver, program/Driver.py y el IDE):
+  -O0  sin optimización
+  -O1  pases locales baratos, una sola vuelta
+  -O2  + pases con dataflow global (liveness, SCCP y GVN sobre SSA), iterados hasta punto fijo,
+       y recursión de cola convertida en loop
+  -O3  + inlining, optimización de loops y asignación de registros en el backend
 """
-from typing import List, Set, Dict, Optional
-from dataclasses import dataclass
-from .tac import TACOp, TACOperand, TACInstruction, TACProgram
+from typing import List, Set, Dict, Optional, Tuple
+from .tac import TACOp, TACOperand, TACInstruction, TACProgram, is_string_concat
+from .cfg import MAIN_REGION
+from .liveness import FunctionLiveness, uses_and_defs, temp_name, iter_bits
+from .pass_manager import PassManager, Pass, Fixpoint, Stage, DEFAULT_MAX_ITERATIONS
+from .sccp import sccp_rewrites
+from .gvn import gvn_rewrites
+from .labels import LabelIndex, jump_label
+from .dce import dead_instructions
+from .inliner import Inliner, InlineStats, DEFAULT_INLINE_THRESHOLD
+from .tail_recursion import TailRecursion
+from .licm import hoist_invariants
+from .induction import reduce_induction_variables
+from .unroll import unroll_loops, DEFAULT_UNROLL_FACTOR, DEFAULT_UNROLL_THRESHOLD
 
 # --------- helpers seguros ---------
 def _is_const(x) -> bool:
@@ -34,98 +52,204 @@ def _is_temp_name(x) -> bool:
         # Esto falla para "toString", "t_loop", "t_ptr_t4"
         return False
 
-@dataclass
-class LivenessInfo:
-    """Información de vida de un temporal"""
-    first_def: int
-    last_use: int
-    uses: Set[int]
-    defs: Set[int]
+def _wrap32(v: int) -> int:
+    """Entero con la semántica de 32 bits de MIPS"""
+    v &= 0xFFFFFFFF
+    return v - (1 << 32) if v & 0x80000000 else v
+
+def _fold_int(op: TACOp, a: int, b: int) -> Optional[int]:
+    """Evalúa una operación entera como lo haría MIPS (div/rem truncan hacia 0)"""
+    if op == TACOp.ADD:
+        return _wrap32(a + b)
+    if op == TACOp.SUB:
+        return _wrap32(a - b)
+    if op == TACOp.MUL:
+        return _wrap32(a * b)
+    if b == 0:
+        return None
+    q = abs(a) // abs(b)
+    if (a < 0) != (b < 0):
+        q = -q
+    if op == TACOp.DIV:
+        return _wrap32(q)
+    if op == TACOp.MOD:
+        return _wrap32(a - q * b)
+    return None
+
+def _operand_named(name: str, like=None) -> TACOperand:
+    """Operando para el nombre 'name' ('t5', 'FP[-4]', '0x1000'), con el tipo de 'like'"""
+    typ = getattr(like, "typ", None)
+    if _is_temp_name(name):
+        return TACOperand(value=int(name[1:]), is_temp=True, typ=typ)
+    return TACOperand(value=name, typ=typ)
+
+def _kill_copies(copy_map: Dict[str, str], name: str):
+    """'name' se redefine: deja de ser copia de algo y nadie sigue siendo copia suya"""
+    copy_map.pop(name, None)
+    for dst in [d for d, src in copy_map.items() if src == name]:
+        del copy_map[dst]
 
+OPT_LEVELS = (0, 1, 2, 3)
+DEFAULT_OPT_LEVEL = 2
 
 class TACOptimizer:
     """Optimizador de código TAC"""
     
-    def __init__(self, program: TACProgram):
+    def __init__(self, program: TACProgram, opt_level: int = DEFAULT_OPT_LEVEL,
+                 print_after: Optional[Set[str]] = None,
+                 max_iterations: int = DEFAULT_MAX_ITERATIONS,
+                 inline_threshold: int = DEFAULT_INLINE_THRESHOLD,
+                 unroll_factor: int = DEFAULT_UNROLL_FACTOR,
+                 unroll_threshold: int = DEFAULT_UNROLL_THRESHOLD):
+        if opt_level not in OPT_LEVELS:
+            raise ValueError(f"Nivel de optimización inválido: {opt_level} (0-3)")
         self.program = program
+        self.opt_level = opt_level
         self.optimized_instructions: List[TACInstruction] = []
+        # -O1 hace una sola vuelta de cada grupo
+        self.max_iterations = max_iterations if opt_level >= 2 else 1
+        self.pass_manager = PassManager(program, print_after=print_after)
+        self.inline_threshold = inline_threshold
+        self.unroll_factor = unroll_factor
+        self.unroll_threshold = unroll_threshold
+        self.inline_stats = InlineStats()
+        self.tail_calls: Dict[str, int] = {}
+        self.hoisted = 0
+        self.derived_pointers = 0
+        self.redundant = 0
+        self.unrolled = [0, 0]      # completos, por factor
     
-    def optimize(self) -> TACProgram:
-        instructions = self.program.instructions.copy()
-        
-        # Validar y corregir TAC malformado
-        instructions = self.validate_tac(instructions)
-
-        # ========== FASE 1: Pase algebraico inicial ==========
-        print("📊 Fase 1: Constant folding y propagación...")
-        instructions = self.constant_folding(instructions)
-        instructions = self.enhanced_constant_folding(instructions)
-        instructions = self.constant_propagation(instructions)
-        instructions = self.constant_folding(instructions)
-        instructions = self.algebraic_simplification(instructions)
-        
-        # ========== FASE 2: Optimizaciones quirúrgicas ==========
-        print("🔧 Fase 2: Optimizaciones quirúrgicas...")
-        original_count = len(instructions)
-        instructions = self._surgical_optimize(instructions)
-        surgical_count = len(instructions)
-        print(f"   Eliminadas {original_count - surgical_count} instrucciones redundantes")
-        
-# ========== FASE 3: Limpieza y pases finales ==========
-        print("🧹 Fase 3: Limpieza final...")
-        
-        print("   -> (3.1) Copy propagation...")
-        instructions = self.copy_propagation(instructions)
-        
-        print("   -> (3.2) Constant cleanup...")
-        instructions = self.constant_cleanup(instructions)
-        
-        print("   -> (3.3) Remove unused constant loads...")
-        instructions = self.remove_unused_constant_loads(instructions)
+    def pipeline(self) -> List[Tuple[str, List[Stage]]]:
+        """Fases del optimizador según el nivel: (mensaje, pases)"""
+        if self.opt_level == 0:
+            return []
+        global_passes = self.opt_level >= 2
         
-        print("   -> (3.4) Optimize memory loads...")
-        instructions = self.optimize_memory_loads(instructions)
+        constants: List[Pass] = [
+            Pass("constant_folding", self.constant_folding),
+            Pass("enhanced_constant_folding", self.enhanced_constant_folding),
+            Pass("constant_propagation", self.constant_propagation),
+        ]
+        if global_passes:
+            constants.append(Pass("sccp", self.sccp, requires=("ssa",)))
+        constants.append(Pass("algebraic_simplification", self.algebraic_simplification))
         
-        print("   -> (3.5) Eliminate copy chains...")
-        instructions = self.eliminate_copy_chains(instructions)
+        surgical: List[Stage] = [Pass("load_forwarding", self._opt_load_forwarding)]
+        if global_passes:
+            surgical = [
+                Pass("gvn", self.gvn, requires=("ssa",)),
+                Pass("single_use", self._opt_single_use, requires=("liveness",)),
+                *surgical,
+                Pass("temp_renaming", self._opt_temp_renaming, requires=("liveness",)),
+            ]
         
-        print("   -> (3.6) Remove redundant stores...")
-        instructions = self.remove_redundant_stores(instructions)
+        cleanup = [
+            Pass("copy_propagation", self.copy_propagation),
+            Pass("constant_cleanup", self.constant_cleanup),
+        ]
+        if global_passes:
+            cleanup.append(Pass("remove_unused_constant_loads", self.remove_unused_constant_loads,
+                                requires=("liveness",)))
+        cleanup += [
+            Pass("optimize_memory_loads", self.optimize_memory_loads),
+            Pass("eliminate_copy_chains", self.eliminate_copy_chains),
+            Pass("remove_redundant_stores", self.remove_redundant_stores),
+        ]
+        if global_passes:
+            cleanup.append(Pass("dead_code_elimination", self.dead_code_elimination, requires=("ssa",)))
+        cleanup.append(Pass("remove_redundant_moves", self.remove_redundant_moves))
         
-        print("   -> (3.7) Dead code elimination...")
-        instructions = self.dead_code_elimination(instructions)
-        
-        print("   -> (3.8) Remove redundant moves...")
-        instructions = self.remove_redundant_moves(instructions)
-        
-        print("   -> (3.9) Strength reduction...")
-        instructions = self.strength_reduction(instructions)
-        
-        print("   -> (3.10) Remove redundant jumps...")
-        instructions = self.remove_redundant_jumps(instructions)
+        phases = [
+            ("🔎 Validando TAC...", [
+                Pass("validate_tac", self.validate_tac),
+            ]),
+        ]
+        calls: List[Stage] = []
+        if global_passes:
+            calls.append(Pass("tail_recursion", self.tail_recursion))
+        if self.opt_level >= 3:
+            calls.append(Pass("inline", self.inline))
+        if calls:
+            phases.append(("📥 Fase 0: Llamadas (recursión de cola, inlining)...", calls))
+        phases.append(("📊 Fase 1: Constant folding y propagación...", [
+            Fixpoint("constantes", constants, self.max_iterations),
+        ]))
+        if self.opt_level >= 3:
+            phases.append(("🔄 Fase 1.5: Optimización de loops...", [
+                Pass("unroll", self.loop_unrolling),
+                Fixpoint("constantes", constants, self.max_iterations),
+                Fixpoint("loops", [
+                    Pass("licm", self.loop_invariant_code_motion, requires=("liveness",)),
+                    Pass("iv_strength_reduction", self.induction_variables),
+                    Pass("copy_propagation", self.copy_propagation),
+                ], self.max_iterations),
+            ]))
+        return phases + [
+            ("🔧 Fase 2: Optimizaciones quirúrgicas...", surgical),
+            ("🧹 Fase 3: Limpieza final...", [
+                Fixpoint("limpieza", cleanup, self.max_iterations),
+                Pass("strength_reduction", self.strength_reduction),
+                Pass("remove_redundant_jumps", self.remove_redundant_jumps),
+            ]),
+        ]
+    
+    def pass_names(self) -> List[str]:
+        """Nombres válidos para --print-after"""
+        names: List[str] = []
+        for _, stages in self.pipeline():
+            for stage in stages:
+                for p in (stage.passes if isinstance(stage, Fixpoint) else [stage]):
+                    if p.name not in names:
+                        names.append(p.name)
+        return names
+    
+    def optimize(self) -> TACProgram:
+        instructions = self.program.instructions.copy()
         
-        print("   -> (3.11) Limpieza final terminada.")
+        print(f"⚙️  Nivel de optimización: -O{self.opt_level}")
+        for message, stages in self.pipeline():
+            print(message)
+            before = len(instructions)
+            instructions = self.pass_manager.run(instructions, stages)
+            removed = before - len(instructions)
+            if removed >= 0:
+                print(f"   Eliminadas {removed} instrucciones redundantes")
+            else:
+                print(f"   Agregadas {-removed} instrucciones")
 
         out = TACProgram()
         out.instructions = instructions
         
         # Contar temporales usados
-        max_temp = 0
-        for inst in instructions:
-            for op in [inst.result, inst.arg1, inst.arg2]:
-                if op and _is_temp_name(op):
-                    try:
-                        num = int(str(op).replace('t', ''))
-                        max_temp = max(max_temp, num)
-                    except:
-                        pass
+        max_temp = self._count_temps(instructions)
         
         out.temp_counter = max_temp
         out.label_counter = self.program.label_counter
         
+        if self.tail_calls:
+            converted = ", ".join(f"{name}×{n}" for name, n in self.tail_calls.items())
+            print(f"🔁 Recursión de cola: {sum(self.tail_calls.values())} llamadas "
+                  f"convertidas en saltos ({converted})")
+        if self.hoisted:
+            print(f"🔄 LICM: {self.hoisted} instrucciones invariantes sacadas de loops")
+        if any(self.unrolled):
+            full, partial = self.unrolled
+            print(f"🔄 Unrolling: {full} loops desenrollados completos, "
+                  f"{partial} por un factor de {self.unroll_factor}")
+        if self.redundant:
+            print(f"🧮 GVN: {self.redundant} instrucciones redundantes eliminadas")
+        if self.derived_pointers:
+            print(f"🔄 Variables de inducción: {self.derived_pointers} punteros derivados para accesos a arrays")
+        if self.inline_stats.sites:
+            inlined = ", ".join(f"{name}×{n}" for name, n in self.inline_stats.functions.items())
+            print(f"📥 Inlining: {self.inline_stats.sites} llamadas ({inlined}), "
+                  f"{self.inline_stats.growth:+d} instrucciones")
         print(f"✅ Optimización completa: {self.program.temp_counter} → {max_temp} temporales")
         return out
     
+    def format_timing(self) -> str:
+        return self.pass_manager.format_timing()
+    
     def _copy_operand_with_type(self, operand):  
         """Crea una copia de un operando preservando su tipo."""
         if operand is None:
@@ -141,164 +265,271 @@ class TACOptimizer:
         else:
             return TACOperand(operand)
 
-    def _surgical_optimize(self, instructions: List[TACInstruction]) -> List[TACInstruction]:
-        """Aplica optimizaciones quirúrgicas específicas"""
-        liveness = self._compute_liveness(instructions)
-        
-        # Optimización 1: Eliminar temporales de uso único
-        instructions = self._opt_single_use(instructions, liveness)
-        liveness = self._compute_liveness(instructions)
+    def _liveness(self, instructions: List[TACInstruction]) -> List[FunctionLiveness]:
+        """Liveness por región; solo se recalcula para las funciones que cambiaron"""
+        return self.pass_manager.analysis("liveness").analyze(instructions)
+    
+    def tail_recursion(self, instructions: List[TACInstruction]) -> List[TACInstruction]:
+        """Auto-llamadas en posición de cola -> asignar parámetros y saltar al inicio"""
+        tco = TailRecursion(self.program)
+        result = tco.run(instructions)
+        self.tail_calls = tco.stats
+        return result
+    
+    def inline(self, instructions: List[TACInstruction]) -> List[TACInstruction]:
+        """Inlining de funciones/métodos chicos no recursivos (ver inliner.py)"""
+        inliner = Inliner(self.program, self.inline_threshold)
+        result = inliner.run(instructions)
+        self.inline_stats = inliner.stats
+        return result
+    
+    def loop_invariant_code_motion(self, instructions: List[TACInstruction]) -> List[TACInstruction]:
+        """Saca las instrucciones invariantes de cada loop a su preheader (ver licm.py)"""
+        new_temp = self._temp_factory(instructions)
+        inserts: Dict[int, List[TACInstruction]] = {}
+        changes: Dict[int, Optional[TACInstruction]] = {}
+        for info in self._liveness(instructions):
+            region_inserts, region_changes = hoist_invariants(info, new_temp)
+            inserts.update(region_inserts)
+            changes.update(region_changes)
+        if not changes:
+            return instructions
         
-        # Optimización 2: Load forwarding
-        instructions = self._opt_load_forwarding(instructions, liveness)
-        liveness = self._compute_liveness(instructions)
+        result = []
+        for inst in instructions:
+            result.extend(inserts.get(id(inst), ()))
+            if id(inst) in changes:
+                inst = changes[id(inst)]
+                if inst is None:
+                    continue
+            result.append(inst)
+        self.hoisted += len(changes)
+        return result
+    
+    def _temp_factory(self, instructions: List[TACInstruction]):
+        """new_temp(like) que crea temporales que no aparecen en 'instructions'"""
+        names = (temp_name(op) for inst in instructions for op in (inst.result, inst.arg1, inst.arg2))
+        next_temp = max((int(n.lstrip("t")) for n in names if n), default=0) + 1
         
-        # Optimización 3: Renumeración óptima
-        instructions = self._opt_temp_renaming(instructions, liveness)
+        def new_temp(like) -> TACOperand:
+            nonlocal next_temp
+            next_temp += 1
+            return TACOperand(next_temp - 1, is_temp=True, typ=getattr(like, "typ", None))
+        return new_temp
+    
+    def loop_unrolling(self, instructions: List[TACInstruction]) -> List[TACInstruction]:
+        """Desenrolla loops con cantidad de iteraciones constante (ver unroll.py)"""
+        replace: Dict[int, List[TACInstruction]] = {}
+        remove: Set[int] = set()
+        for info in self._liveness(instructions):
+            unrolling = unroll_loops(info.cfg, self.program.new_label,
+                                     self.unroll_factor, self.unroll_threshold)
+            replace.update(unrolling.replace)
+            remove |= unrolling.remove
+            self.unrolled[0] += unrolling.full
+            self.unrolled[1] += unrolling.partial
+        if not replace:
+            return instructions
         
-        return instructions
+        result = []
+        for inst in instructions:
+            if id(inst) in replace:
+                result.extend(replace[id(inst)])
+            elif id(inst) not in remove:
+                result.append(inst)
+        return result
     
-    def _compute_liveness(self, instructions: List[TACInstruction]) -> Dict[str, LivenessInfo]:
-        """Calcula información de vida de temporales"""
-        info = {}
+    def induction_variables(self, instructions: List[TACInstruction]) -> List[TACInstruction]:
+        """Accesos arr[i] en loops -> puntero derivado con índice constante (ver induction.py)"""
+        new_temp = self._temp_factory(instructions)
+        before: Dict[int, List[TACInstruction]] = {}
+        replace: Dict[int, TACInstruction] = {}
+        after: Dict[int, List[TACInstruction]] = {}
+        for info in self._liveness(instructions):
+            rewrite = reduce_induction_variables(info.cfg, new_temp)
+            before.update(rewrite.before)
+            replace.update(rewrite.replace)
+            after.update(rewrite.after)
+            self.derived_pointers += rewrite.pointers
+        if not replace:
+            return instructions
         
-        for i, inst in enumerate(instructions):
-            # Definiciones
-            if inst.result and _is_temp_name(inst.result):
-                name = str(inst.result)
-                if name not in info:
-                    info[name] = LivenessInfo(i, i, set(), set())
-                info[name].defs.add(i)
-                info[name].first_def = min(info[name].first_def, i)
-            
-            # Usos
-            for arg in [inst.arg1, inst.arg2]:
-                if arg and _is_temp_name(arg):
-                    name = str(arg)
-                    if name not in info:
-                        info[name] = LivenessInfo(0, i, set(), set())
-                    info[name].uses.add(i)
-                    info[name].last_use = max(info[name].last_use, i)
+        result = []
+        for inst in instructions:
+            result.extend(before.get(id(inst), ()))
+            result.append(replace.get(id(inst), inst))
+            result.extend(after.get(id(inst), ()))
+        return result
+    
+    def gvn(self, instructions: List[TACInstruction]) -> List[TACInstruction]:
+        """
+        Global value numbering: una expresión ya calculada en un bloque
+        dominante se reemplaza por una copia del valor (ver gvn.py).
+        """
+        changes: Dict[int, Optional[TACInstruction]] = {}
+        for ssa in self.pass_manager.analysis("ssa").analyze(instructions):
+            changes.update(gvn_rewrites(ssa))
+        if not changes:
+            return instructions
+        self.redundant += len(changes)
         
-        return info
+        result = []
+        for inst in instructions:
+            if id(inst) in changes:
+                inst = changes[id(inst)]
+                if inst is None:
+                    continue
+            result.append(inst)
+        return result
     
-    def _opt_single_use(self, instructions: List[TACInstruction], 
-                        liveness: Dict[str, LivenessInfo]) -> List[TACInstruction]:
-        """Elimina temporales de uso único"""
+    def sccp(self, instructions: List[TACInstruction]) -> List[TACInstruction]:
+        """
+        Sparse conditional constant propagation sobre SSA: propaga constantes
+        a través de ramas y loops, poda IFs constantes y borra bloques
+        que nunca se ejecutan.
+        """
+        changes: Dict[int, Optional[TACInstruction]] = {}
+        for ssa in self.pass_manager.analysis("ssa").analyze(instructions):
+            changes.update(sccp_rewrites(ssa))
+        if not changes:
+            return instructions
+        
         result = []
-        single_use = {}
+        for inst in instructions:
+            if id(inst) in changes:
+                inst = changes[id(inst)]
+                if inst is None:
+                    continue
+            result.append(inst)
+        return result
+    
+    def _region_indices(self, instructions: List[TACInstruction]) -> List[Tuple[str, List[int]]]:
+        """Índices de cada región, en el mismo orden que cfg.split_regions"""
+        regions: List[Tuple[str, List[int]]] = []
+        main: List[int] = []
+        current: Optional[List[int]] = None
+        for i, inst in enumerate(instructions):
+            if inst.op == TACOp.FUNC_START:
+                current = []
+                regions.append((str(inst.arg1), current))
+            if current is not None:
+                current.append(i)
+            else:
+                main.append(i)
+            if inst.op == TACOp.FUNC_END:
+                current = None
+        if main:
+            regions.append((MAIN_REGION, main))
+        return regions
+    
+    def _opt_single_use(self, instructions: List[TACInstruction]) -> List[TACInstruction]:
+        """
+        Elimina temporales de uso único: t = @FP[8]; ...; push t  →  push FP[8]
+        Solo si la fuente no se reescribe entre la definición y el uso.
+        """
+        skip_indices: Set[int] = set()
+        replacements: Dict[int, Dict[str, TACOperand]] = {}  # idx -> {slot: operando}
+        barriers = (TACOp.LABEL, TACOp.CALL, TACOp.GOTO, TACOp.IF_TRUE, TACOp.IF_FALSE)
         
-        # Identificar candidatos
-        for name, info in liveness.items():
-            if len(info.uses) == 1 and len(info.defs) == 1:
-                def_idx = list(info.defs)[0]
-                use_idx = list(info.uses)[0]
-                
+        for _, idxs in self._region_indices(instructions):
+            defs: Dict[str, List[int]] = {}
+            uses: Dict[str, List[int]] = {}
+            for i in idxs:
+                u, d = uses_and_defs(instructions[i])
+                for t in u:
+                    uses.setdefault(t, []).append(i)
+                for t in d:
+                    defs.setdefault(t, []).append(i)
+            pos = {i: k for k, i in enumerate(idxs)}
+            
+            for name, def_list in defs.items():
+                use_list = uses.get(name, [])
+                if len(def_list) != 1 or len(use_list) != 1:
+                    continue
+                def_idx, use_idx = def_list[0], use_list[0]
                 # Solo si están cerca y no cruzan boundaries
-                if 0 < use_idx - def_idx <= 5:
-                    # Verificar que no hay labels/calls entre medio
-                    safe = True
-                    for j in range(def_idx + 1, use_idx):
-                        if instructions[j].op in [TACOp.LABEL, TACOp.CALL, 
-                                                   TACOp.GOTO, TACOp.IF_TRUE, TACOp.IF_FALSE]:
-                            safe = False
-                            break
-                    
-                    if safe:
-                        single_use[name] = def_idx
-        
-        skip_indices = set()
-        replacements = {}
-        
-        for i, inst in enumerate(instructions):
-            if (inst.result and str(inst.result) in single_use and
-                single_use[str(inst.result)] == i):
-                
-                # Solo optimizar casos seguros
-                if inst.op == TACOp.DEREF:
-                    replacements[str(inst.result)] = inst.arg1
-                    skip_indices.add(i)
+                if not 0 < pos[use_idx] - pos[def_idx] <= 5:
                     continue
-                elif inst.op == TACOp.ASSIGN and inst.arg1:
-                    # Solo si arg1 no es un temporal que va a morir
-                    if not _is_temp_name(inst.arg1) or str(inst.arg1) not in single_use:
-                        replacements[str(inst.result)] = inst.arg1
-                        skip_indices.add(i)
-                        continue
+                def_inst = instructions[def_idx]
+                if def_inst.op not in (TACOp.DEREF, TACOp.ASSIGN) or def_inst.arg1 is None:
+                    continue
+                src = def_inst.arg1
+                if temp_name(src):
+                    continue  # las cadenas de copias las resuelve copy propagation
+                between = [instructions[j] for j in idxs[pos[def_idx] + 1:pos[use_idx]]]
+                if any(b.op in barriers for b in between):
+                    continue
+                src_name = str(src)
+                if any(b.result is not None and str(b.result) == src_name for b in between):
+                    continue
+                use_inst = instructions[use_idx]
+                if use_inst.op == TACOp.CALL or use_idx in replacements or use_idx in skip_indices:
+                    continue
+                slots = {slot: getattr(use_inst, slot) for slot in ("result", "arg1", "arg2")
+                         if temp_name(getattr(use_inst, slot)) == name}
+                if not slots or (use_inst.op not in (TACOp.ARRAY_ASSIGN, TACOp.FIELD_ASSIGN)
+                                 and "result" in slots):
+                    continue
+                skip_indices.add(def_idx)
+                replacements[use_idx] = {
+                    slot: self._substitute_operand(src, old) for slot, old in slots.items()
+                }
         
-        # Aplicar reemplazos
+        result = []
         for i, inst in enumerate(instructions):
             if i in skip_indices:
                 continue
-            
-            a1 = inst.arg1
-            a2 = inst.arg2
-            
-            if a1 and str(a1) in replacements:
-                a1 = replacements[str(a1)]
-            if a2 and str(a2) in replacements:
-                a2 = replacements[str(a2)]
-            
-            result.append(TACInstruction(inst.op, self._copy_operand_with_type(inst.result), 
-                                         self._copy_operand_with_type(a1), 
-                                         self._copy_operand_with_type(a2)))
-        
+            if i in replacements:
+                r = replacements[i]
+                inst = TACInstruction(inst.op, r.get("result", inst.result),
+                                      r.get("arg1", inst.arg1), r.get("arg2", inst.arg2))
+            result.append(inst)
         return result
     
-    def _opt_load_forwarding(self, instructions: List[TACInstruction],
-                            liveness: Dict[str, LivenessInfo]) -> List[TACInstruction]:
-        """Forward de cargas desde memoria - versión mejorada"""
+    def _substitute_operand(self, src: TACOperand, old: TACOperand) -> TACOperand:
+        """Copia de 'src' para reemplazar a 'old', conservando el tipo del uso"""
+        typ = getattr(old, "typ", None)
+        return TACOperand(
+            value=src.value,
+            is_temp=src.is_temp,
+            is_constant=src.is_constant,
+            is_label=src.is_label,
+            typ=typ if typ is not None else src.typ
+        )
+    
+    def _opt_load_forwarding(self, instructions: List[TACInstruction]) -> List[TACInstruction]:
+        """Forward de cargas desde memoria: 0x1000 = t1; ...; t2 = @0x1000  →  t2 = t1"""
         result = []
-        memory_map = {}  # addr -> (temp, idx)
+        memory_map: Dict[str, TACOperand] = {}  # addr -> temporal guardado ahí
         
-        for i, inst in enumerate(instructions):
+        for inst in instructions:
             # Invalidar en operaciones peligrosas
             if inst.op in [TACOp.CALL, TACOp.FIELD_ASSIGN, TACOp.ARRAY_ASSIGN,
-                          TACOp.LABEL, TACOp.GOTO, TACOp.IF_TRUE, TACOp.IF_FALSE]:
+                          TACOp.LABEL, TACOp.GOTO, TACOp.IF_TRUE, TACOp.IF_FALSE,
+                          TACOp.FUNC_START, TACOp.FUNC_END, TACOp.RETURN, TACOp.LEAVE]:
                 memory_map.clear()
                 result.append(inst)
                 continue
             
-            # Store: addr = temp
-            if (inst.op == TACOp.ASSIGN and 
-                inst.result and str(inst.result).startswith("0x") and
-                inst.arg1 and _is_temp_name(inst.arg1)):
-                
-                memory_map[str(inst.result)] = (str(inst.arg1), i)
-                result.append(inst)
-                continue
-            
             # Load: temp = @addr
-            if (inst.op == TACOp.DEREF and
-                inst.arg1 and str(inst.arg1).startswith("0x")):
-                
-                addr = str(inst.arg1)
-                
-                if addr in memory_map:
-                    prev_temp, write_idx = memory_map[addr]
-                    
-                    # Verificar que el temporal siga vivo
-                    if prev_temp in liveness:
-                        info = liveness[prev_temp]
-                        
-                        # Forwarding si el temporal está vivo Y no fue modificado
-                        if info.last_use >= i and write_idx < i:
-                            # Caso especial: si es el mismo temporal, eliminar la carga
-                            if str(inst.result) == prev_temp:
-                                continue
-                            else:
-                                # Forwarding: usar el temporal directamente
-                                result.append(TACInstruction(
-                                    TACOp.ASSIGN, 
-                                    self._copy_operand_with_type(inst.result), 
-                                    self._copy_operand_with_type(TACOperand(prev_temp, typ=inst.arg1.typ if hasattr(inst.arg1, 'typ') else None))
-                                ))
-                                continue
-                
-                result.append(inst)
-                continue
-            
+            if inst.op == TACOp.DEREF and inst.arg1 is not None and str(inst.arg1) in memory_map:
+                prev = memory_map[str(inst.arg1)]
+                if str(inst.result) == str(prev):
+                    continue  # el temporal ya tiene ese valor
+                inst = TACInstruction(TACOp.ASSIGN, inst.result,
+                                      self._substitute_operand(prev, inst.arg1))
             result.append(inst)
+            
+            # Lo que esta instrucción escribe invalida las entradas afectadas
+            if inst.result is not None:
+                written = str(inst.result)
+                memory_map.pop(written, None)
+                for addr in [a for a, t in memory_map.items() if str(t) == written]:
+                    del memory_map[addr]
+                
+                # Store: addr = temp
+                if inst.op == TACOp.ASSIGN and written.startswith("0x") and temp_name(inst.arg1):
+                    memory_map[written] = inst.arg1
         
         return result
 
@@ -334,12 +565,14 @@ class TACOptimizer:
                 a1 = const_temps[str(a1)]
             if a2 and str(a2) in const_temps:
                 a2 = const_temps[str(a2)]
-            new_inst = TACInstruction(
-                inst.op, 
-                self._copy_operand_with_type(inst.result), 
-                self._copy_operand_with_type(a1), 
-                self._copy_operand_with_type(a2)
-            )
+            new_inst = inst
+            if a1 is not inst.arg1 or a2 is not inst.arg2:
+                new_inst = TACInstruction(
+                    inst.op, 
+                    self._copy_operand_with_type(inst.result), 
+                    self._copy_operand_with_type(a1), 
+                    self._copy_operand_with_type(a2)
+                )
             
             # Si redefinimos el temp, removerlo del mapa
             if new_inst.result and str(new_inst.result) in const_temps:
@@ -351,76 +584,56 @@ class TACOptimizer:
 
     def remove_unused_constant_loads(self, instructions: List[TACInstruction]) -> List[TACInstruction]:
         """
-        Elimina cargas de constantes que nunca se usan si son redefinidas antes de cualquier uso.
+        Elimina cargas de constantes (t = const) cuyo temporal no está vivo
+        después de la instrucción (redefinido o nunca usado en ningún camino).
         """
-        defs: Dict[str, List[int]] = {}
-        uses: Dict[str, Set[int]] = {}
-        
-        for i, inst in enumerate(instructions):
-            # Registrar definiciones
-            if inst.result and _is_temp_name(inst.result):
-                temp = str(inst.result)
-                defs.setdefault(temp, []).append(i)
-            # Registrar usos
-            for arg in [inst.arg1, inst.arg2]:
-                if arg and _is_temp_name(arg):
-                    temp = str(arg)
-                    uses.setdefault(temp, set()).add(i)
-        
-        # Identificar definiciones muertas
-        dead_indices: Set[int] = set()
-        for temp, def_indices in defs.items():
-            if len(def_indices) > 1:
-                for i, def_idx in enumerate(def_indices[:-1]):
-                    inst = instructions[def_idx]
-                    if inst.op == TACOp.ASSIGN and _is_const(inst.arg1):
-                        next_def = def_indices[i + 1]
-                        used_between = any(def_idx < use_idx < next_def for use_idx in uses.get(temp, set()))
-                        if not used_between:
-                            dead_indices.add(def_idx)
+        liveness = self._liveness(instructions)
+        dead: Set[int] = set()
+        for info in liveness:
+            for b, block in enumerate(info.cfg.blocks):
+                outs = info.instruction_live_out(b)
+                for k, inst in enumerate(block.instructions):
+                    defined = info.inst_def[b][k]
+                    if (inst.op == TACOp.ASSIGN and _is_const(inst.arg1)
+                            and defined and not defined & outs[k]):
+                        dead.add(id(inst))
         
         # Filtrar
-        result: List[TACInstruction] = []
-        for i, inst in enumerate(instructions):
-            if i not in dead_indices:
-                result.append(inst)
-        return result
+        return [inst for inst in instructions if id(inst) not in dead]
 
     def optimize_memory_loads(self, instructions: List[TACInstruction]) -> List[TACInstruction]:
         """
         Optimiza cargas consecutivas de la misma dirección mientras la memoria no cambie.
         """
         result: List[TACInstruction] = []
-        last_load: Dict[str, tuple] = {}
+        last_load: Dict[str, TACOperand] = {}  # addr -> temporal con su valor
         
-        for i, inst in enumerate(instructions):
-            # Invalidar en escrituras o calls
-            if inst.op in [TACOp.CALL, TACOp.ASSIGN]:
-                if inst.result and (str(inst.result).startswith("0x") or str(inst.result).startswith("FP[")):
-                    addr = str(inst.result)
-                    if addr in last_load:
-                        del last_load[addr]
-            
-            # Invalidar todo en boundaries peligrosos
+        for inst in instructions:
+            # Invalidar todo en boundaries peligrosos (una llamada puede escribir globales)
             if inst.op in [TACOp.LABEL, TACOp.GOTO, TACOp.IF_TRUE, TACOp.IF_FALSE,
-                           TACOp.FUNC_START, TACOp.FUNC_END]:
+                           TACOp.CALL, TACOp.FUNC_START, TACOp.FUNC_END]:
                 last_load.clear()
             
             # Detectar load: temp = @addr
-            if inst.op == TACOp.DEREF and inst.arg1 is not None:
-                addr = str(inst.arg1)
-                if addr in last_load:
-                    prev_temp, prev_idx = last_load[addr]
-                    result.append(TACInstruction(
-                        TACOp.ASSIGN, 
+            if inst.op == TACOp.DEREF and inst.arg1 is not None and str(inst.arg1) in last_load:
+                prev = last_load[str(inst.arg1)]
+                if str(prev) != str(inst.result):
+                    inst = TACInstruction(
+                        TACOp.ASSIGN,
                         self._copy_operand_with_type(inst.result),
-                        self._copy_operand_with_type(TACOperand(prev_temp, typ=inst.arg1.typ if hasattr(inst.arg1, 'typ') else None))
-                    ))
-                    last_load[addr] = (str(inst.result), i)
-                    continue
-                last_load[addr] = (str(inst.result), i)
-            
+                        self._substitute_operand(prev, inst.arg1)
+                    )
             result.append(inst)
+            
+            # Lo escrito invalida la dirección y los temporales redefinidos
+            if inst.result is not None:
+                written = str(inst.result)
+                last_load.pop(written, None)
+                for addr in [a for a, t in last_load.items() if str(t) == written]:
+                    del last_load[addr]
+            
+            if inst.op == TACOp.DEREF and inst.arg1 is not None and temp_name(inst.result):
+                last_load[str(inst.arg1)] = inst.result
         
         return result
 
@@ -470,7 +683,9 @@ class TACOptimizer:
                 dst = str(inst.result)
                 while src in copy_map and copy_map[src] != src:
                     src = copy_map[src]
-                copy_map[dst] = src
+                _kill_copies(copy_map, dst)
+                if src != dst:
+                    copy_map[dst] = src
                 result.append(inst)
                 continue
             
@@ -478,37 +693,24 @@ class TACOptimizer:
             a1 = inst.arg1
             a2 = inst.arg2
             
-            # --- ***** INICIO DEL ARREGLO ***** ---
             if a1 is not None and str(a1) in copy_map:
-                new_name = copy_map[str(a1)] # e.g., "t1" o "FP[-4]"
-                
-                a1 = TACOperand(
-                    value=new_name, # <-- Usar el new_name (string)
-                    is_temp=_is_temp_name(new_name), # <-- Recalcular is_temp
-                    typ=a1.typ if hasattr(a1, 'typ') else None
-                )
-            
+                a1 = _operand_named(copy_map[str(a1)], a1)
             if a2 is not None and str(a2) in copy_map:
-                new_name = copy_map[str(a2)] # e.g., "t2"
-                
-                a2 = TACOperand(
-                    value=new_name, # <-- Usar el new_name (string)
-                    is_temp=_is_temp_name(new_name), # <-- Recalcular is_temp
-                    typ=a2.typ if hasattr(a2, 'typ') else None
-                )
-            # --- ***** FIN DEL ARREGLO ***** ---
+                a2 = _operand_named(copy_map[str(a2)], a2)
             
             # Crear nueva instrucción preservando tipos
-            new_inst = TACInstruction(
-                inst.op, 
-                self._copy_operand_with_type(inst.result), 
-                self._copy_operand_with_type(a1), 
-                self._copy_operand_with_type(a2)
-            )
+            new_inst = inst
+            if a1 is not inst.arg1 or a2 is not inst.arg2:
+                new_inst = TACInstruction(
+                    inst.op, 
+                    self._copy_operand_with_type(inst.result), 
+                    self._copy_operand_with_type(a1), 
+                    self._copy_operand_with_type(a2)
+                )
             
-            # Si redefinimos el destino, invalidar
-            if new_inst.result and str(new_inst.result) in copy_map:
-                del copy_map[str(new_inst.result)]
+            # Si redefinimos el destino, invalidar (también las copias que lo leían)
+            if new_inst.result:
+                _kill_copies(copy_map, str(new_inst.result))
             
             result.append(new_inst)
         
@@ -533,7 +735,7 @@ class TACOptimizer:
         - t1 = const; uso inmediato de t1 → reemplazar
         """
         result = []
-        const_map: Dict[str, int] = {}
+        const_map: Dict[str, TACOperand] = {}
         
         for inst in instructions:
             # Resetear en boundaries
@@ -553,7 +755,7 @@ class TACOptimizer:
                 inst.result and _is_temp_name(inst.result) and
                 inst.arg1 and _is_const(inst.arg1)):
                 
-                const_map[str(inst.result)] = _const_val(inst.arg1)
+                const_map[str(inst.result)] = inst.arg1
                 result.append(inst)
                 continue
             
@@ -562,22 +764,25 @@ class TACOptimizer:
             a2 = inst.arg2
             
             if a1 and _is_temp_name(a1) and str(a1) in const_map:
-                a1 = TACOperand(const_map[str(a1)], is_constant=True)
+                a1 = self._substitute_operand(const_map[str(a1)], a1)
             
             if a2 and _is_temp_name(a2) and str(a2) in const_map:
-                a2 = TACOperand(const_map[str(a2)], is_constant=True)
+                a2 = self._substitute_operand(const_map[str(a2)], a2)
             
-            new_inst = TACInstruction(inst.op, inst.result, a1, a2)
+            new_inst = inst
+            if a1 is not inst.arg1 or a2 is not inst.arg2:
+                new_inst = TACInstruction(inst.op, inst.result, a1, a2)
             
             # Si ahora ambos operandos son constantes, plegar (ej: ADD)
-            if new_inst.op == TACOp.ADD and _is_const(a1) and _is_const(a2):
+            if new_inst.op == TACOp.ADD and _is_const(a1) and _is_const(a2) and not is_string_concat(new_inst):
                 v1 = _const_val(a1)
                 v2 = _const_val(a2)
                 if isinstance(v1, int) and isinstance(v2, int):
                     new_inst = TACInstruction(
                         TACOp.ASSIGN, 
                         new_inst.result, 
-                        TACOperand(v1 + v2, is_constant=True)
+                        TACOperand(_wrap32(v1 + v2), is_constant=True,
+                                   typ=getattr(new_inst.result, "typ", None))
                     )
             
             # Invalidar si el temporal se redefine
@@ -599,7 +804,8 @@ class TACOptimizer:
         for inst in instructions:
             # Invalidar en boundaries
             if inst.op in [TACOp.CALL, TACOp.LABEL, TACOp.GOTO, 
-                           TACOp.IF_TRUE, TACOp.IF_FALSE]:
+                           TACOp.IF_TRUE, TACOp.IF_FALSE,
+                           TACOp.FUNC_START, TACOp.FUNC_END]:
                 last_store.clear()
             
             # Store: addr = temp
@@ -621,6 +827,15 @@ class TACOptimizer:
                         last_store[addr] = (temp, len(result))
                 else:
                     last_store[addr] = (temp, len(result))
+                result.append(inst)
+                continue
+            
+            # Si se redefine el valor guardado, el próximo store ya no es redundante
+            if inst.result is not None:
+                written = str(inst.result)
+                last_store.pop(written, None)
+                for addr in [a for a, (t, _) in last_store.items() if t == written]:
+                    del last_store[addr]
             
             result.append(inst)
         
@@ -658,67 +873,56 @@ class TACOptimizer:
         
         return result
     
-    def _opt_temp_renaming(self, instructions: List[TACInstruction],
-                          liveness: Dict[str, LivenessInfo]) -> List[TACInstruction]:
-        """Renumeración óptima usando graph coloring"""
+    def _opt_temp_renaming(self, instructions: List[TACInstruction]) -> List[TACInstruction]:
+        """
+        Renumeración óptima usando graph coloring, por función: dos temporales
+        interfieren si uno está vivo donde se define el otro.
+        """
+        liveness = self._liveness(instructions)
         if not liveness:
             return instructions
         
-        # Construir grafo de interferencia
-        interference = {name: set() for name in liveness.keys()}
-        
-        temps = list(liveness.keys())
-        for i in range(len(temps)):
-            for j in range(i + 1, len(temps)):
-                t1, t2 = temps[i], temps[j]
-                info1, info2 = liveness[t1], liveness[t2]
-                
-                # Interferencia si rangos se solapan
-                if not (info1.last_use < info2.first_def or 
-                        info2.last_use < info1.first_def):
-                    interference[t1].add(t2)
-                    interference[t2].add(t1)
-        
-        # Greedy coloring
-        coloring = {}
-        sorted_temps = sorted(temps, 
-                             key=lambda t: (len(interference[t]), liveness[t].first_def),
-                             reverse=True)
-        
-        for temp in sorted_temps:
-            used_colors = {coloring[n] for n in interference[temp] if n in coloring}
+        result = list(instructions)
+        for (_, idxs), info in zip(self._region_indices(instructions), liveness):
+            # Construir grafo de interferencia
+            n = len(info.temps)
+            interference: List[Set[int]] = [set() for _ in range(n)]
+            for b, block in enumerate(info.cfg.blocks):
+                outs = info.instruction_live_out(b)
+                for k, inst in enumerate(block.instructions):
+                    defined = info.inst_def[b][k]
+                    if not defined:
+                        continue
+                    live = outs[k]
+                    if inst.op == TACOp.ASSIGN:
+                        live &= ~info.inst_use[b][k]  # t = s: pueden compartir nombre
+                    for d in iter_bits(defined):
+                        for other in iter_bits(live & ~(1 << d)):
+                            interference[d].add(other)
+                            interference[other].add(d)
             
-            color = 1
-            while color in used_colors:
-                color += 1
+            # Greedy coloring (primero los de mayor grado)
+            coloring: Dict[str, int] = {}
+            for k in sorted(range(n), key=lambda k: (-len(interference[k]), k)):
+                used_colors = {coloring[info.temps[o]] for o in interference[k]
+                               if info.temps[o] in coloring}
+                color = 1
+                while color in used_colors:
+                    color += 1
+                coloring[info.temps[k]] = color
             
-            coloring[temp] = color
-        
-        # Aplicar renombramiento
-        result = []
-        for inst in instructions:
+            # Aplicar renombramiento
             def rename(op):
-                if op and _is_temp_name(op):
-                    name = str(op)
-                    if name in coloring:
-                        # CORRECCIÓN: Crear nuevo operando, pero COPIAR el tipo del original
-                        new_color_num = coloring[name]
-                        new_name_str = f"t{new_color_num}" # Convertir 1 -> "t1"
-
-                        return TACOperand(
-                            value=new_name_str, # Usar el STRING "t1"
-                            is_temp=True,
-                            typ=op.typ if hasattr(op, 'typ') else None
-                        )
-                # Devolver una copia segura del operando original si no se renombra
-                return self._copy_operand_with_type(op)
+                name = temp_name(op)
+                if name is None or name not in coloring:
+                    return op
+                return TACOperand(value=coloring[name], is_temp=True, typ=getattr(op, "typ", None))
             
-            result.append(TACInstruction(
-                inst.op,
-                rename(inst.result),
-                rename(inst.arg1),
-                rename(inst.arg2)
-            ))
+            for i in idxs:
+                inst = result[i]
+                new_ops = (rename(inst.result), rename(inst.arg1), rename(inst.arg2))
+                if any(a is not b for a, b in zip(new_ops, (inst.result, inst.arg1, inst.arg2))):
+                    result[i] = TACInstruction(inst.op, *new_ops)
         
         return result
     
@@ -746,18 +950,9 @@ class TACOptimizer:
                 if _is_const(inst.arg1) and _is_const(inst.arg2):
                     val1 = _const_val(inst.arg1)
                     val2 = _const_val(inst.arg2)
-                    if isinstance(val1, int) and isinstance(val2, int):
-                        if inst.op == TACOp.ADD:
-                            v = val1 + val2
-                        elif inst.op == TACOp.SUB:
-                            v = val1 - val2
-                        elif inst.op == TACOp.MUL:
-                            v = val1 * val2
-                        elif inst.op == TACOp.DIV and val2 != 0:
-                            v = val1 // val2
-                        elif inst.op == TACOp.MOD and val2 != 0:
-                            v = val1 % val2
-                        else:
+                    if isinstance(val1, int) and isinstance(val2, int) and not is_string_concat(inst):
+                        v = _fold_int(inst.op, val1, val2)
+                        if v is None:
                             result.append(inst); continue
                         # CORRECCIÓN: Asignar el tipo del resultado (ej: t1) al nuevo operando constante
                         new_const = TACOperand(v, is_constant=True, typ=inst.result.typ if hasattr(inst.result, 'typ') else None)
@@ -846,14 +1041,18 @@ class TACOptimizer:
                 reset()
                 continue
 
-            # NUNCA sustituir en un DEREF, la dirección debe preservarse
+            # NUNCA sustituir en un DEREF, la dirección debe preservarse;
+            # el resultado se recarga, ya no vale la constante anterior
             if inst.op == TACOp.DEREF:
+                consts.pop(str(inst.result), None)
                 out.append(inst)
                 continue
 
             a1 = subst(inst.arg1)
             a2 = subst(inst.arg2)
-            new_inst = TACInstruction(inst.op, inst.result, a1, a2)
+            new_inst = inst
+            if a1 is not inst.arg1 or a2 is not inst.arg2:
+                new_inst = TACInstruction(inst.op, inst.result, a1, a2)
 
             if new_inst.op == TACOp.ASSIGN and _is_const(new_inst.arg1):
                 if new_inst.result is not None:
@@ -880,8 +1079,8 @@ class TACOptimizer:
             if inst.op in control_ops:
                 result.append(inst); continue
 
-            # x + 0 = x, 0 + x = x
-            if inst.op == TACOp.ADD:
+            # x + 0 = x, 0 + x = x  (no en concatenación: "a" + 0 es "a0")
+            if inst.op == TACOp.ADD and not is_string_concat(inst):
                 if self._is_zero(inst.arg2):
                     result.append(TACInstruction(TACOp.ASSIGN, inst.result, inst.arg1))
                 elif self._is_zero(inst.arg1):
@@ -955,31 +1154,16 @@ class TACOptimizer:
 
             # Proteger DEREF: NUNCA sustituir el arg1 de un DEREF
             if inst.op != TACOp.DEREF:
-                if a1 is not None and not _is_const(a1):
-                    new_name = root(str(a1))
-                    
-                    # --- ***** INICIO DE CORRECCIÓN ***** ---
-                    a1 = TACOperand(
-                        value=new_name, # <-- Usar el new_name (string)
-                        is_temp=_is_temp_name(new_name), # <-- Recalcular
-                    # --- ***** FIN DE CORRECCIÓN ***** ---
-                        typ=a1.typ if hasattr(a1, 'typ') else None
-                    )
+                if a1 is not None and not _is_const(a1) and str(a1) in alias:
+                    a1 = _operand_named(root(str(a1)), a1)
 
             # arg2 siempre es seguro de sustituir
-            if a2 is not None and not _is_const(a2):
-                new_name = root(str(a2))
+            if a2 is not None and not _is_const(a2) and str(a2) in alias:
+                a2 = _operand_named(root(str(a2)), a2)
 
-                # --- ***** INICIO DE CORRECCIÓN ***** ---
-                a2 = TACOperand(
-                    value=new_name, # <-- Usar el new_name (string)
-                    is_temp=_is_temp_name(new_name), # <-- Recalcular
-                # --- ***** FIN DE CORRECCIÓN ***** ---
-                    typ=a2.typ if hasattr(a2, 'typ') else None
-                )
-            
-            # --- (El resto de la función es igual) ---
-            new_inst = TACInstruction(inst.op, self._copy_operand_with_type(inst.result), a1, a2)
+            new_inst = inst
+            if a1 is not inst.arg1 or a2 is not inst.arg2:
+                new_inst = TACInstruction(inst.op, self._copy_operand_with_type(inst.result), a1, a2)
 
             if new_inst.result is not None:
                 break_aliases_pointing_to(str(new_inst.result))
@@ -990,49 +1174,16 @@ class TACOptimizer:
         return out
     
     def dead_code_elimination(self, instructions: List[TACInstruction]) -> List[TACInstruction]:
-        """Elimina código muerto (conservador, intra-bloque)"""
-        used_vars: Set[str] = set()
-
-        # 1) Marcar usos directos
-        for inst in instructions:
-            op = inst.op
-            if op in (TACOp.PRINT, TACOp.RETURN, TACOp.IF_TRUE, TACOp.IF_FALSE, TACOp.PARAM):
-                if inst.arg1 is not None:
-                    used_vars.add(str(inst.arg1))
-            if inst.arg1 is not None and op != TACOp.ASSIGN:
-                used_vars.add(str(inst.arg1))
-            if inst.arg2 is not None:
-                used_vars.add(str(inst.arg2))
-            if op in (TACOp.ARRAY_ASSIGN, TACOp.FIELD_ASSIGN):
-                if inst.result is not None:
-                    used_vars.add(str(inst.result))
-
-        # 2) Propagar hacia atrás
-        changed = True
-        while changed:
-            changed = False
-            for inst in reversed(instructions):
-                if inst.result is not None and str(inst.result) in used_vars:
-                    if inst.arg1 is not None and str(inst.arg1) not in used_vars:
-                        used_vars.add(str(inst.arg1)); changed = True
-                    if inst.arg2 is not None and str(inst.arg2) not in used_vars:
-                        used_vars.add(str(inst.arg2)); changed = True
-
-        # 3) Conservar side-effects/flujo siempre
-        keep_ops = {
-            TACOp.LABEL, TACOp.GOTO, TACOp.IF_TRUE, TACOp.IF_FALSE,
-            TACOp.PRINT, TACOp.RETURN, TACOp.PARAM, TACOp.CALL,
-            TACOp.FUNC_START, TACOp.FUNC_END, TACOp.ARRAY_ASSIGN, TACOp.FIELD_ASSIGN,
-            TACOp.PUSH, TACOp.POP, TACOp.ENTER, TACOp.LEAVE, TACOp.ADD_SP
-        }
-
-        result: List[TACInstruction] = []
-        for inst in instructions:
-            if inst.op in keep_ops:
-                result.append(inst)
-            elif inst.result is not None and str(inst.result) in used_vars:
-                result.append(inst)
-        return result
+        """
+        Mark and sweep desde las instrucciones con efectos siguiendo las
+        cadenas def-use del SSA; incluye stores muertos a locales (ver dce.py)
+        """
+        dead: Set[int] = set()
+        for ssa in self.pass_manager.analysis("ssa").analyze(instructions):
+            dead |= dead_instructions(ssa)
+        if not dead:
+            return instructions
+        return [inst for inst in instructions if id(inst) not in dead]
     
     def remove_redundant_moves(self, instructions):
         out = []
@@ -1044,31 +1195,46 @@ class TACOptimizer:
         return out
     
     def remove_redundant_jumps(self, instructions: List[TACInstruction]) -> List[TACInstruction]:
-        """Elimina saltos redundantes"""
-        result: List[TACInstruction] = []
+        """
+        Limpieza de saltos en tiempo lineal (con un LabelIndex):
+          - jump threading: un salto a 'L1: goto L2' va directo a L2
+          - código inalcanzable después de GOTO/RETURN hasta la próxima etiqueta usada
+          - GOTO/IF a la etiqueta siguiente y etiquetas que nadie usa
+        """
+        index = LabelIndex(instructions)
+        final = index.thread_targets()
+        threaded: List[TACInstruction] = []
+        for inst in instructions:
+            target = jump_label(inst)
+            if target is not None and str(target) in final and str(final[str(target)]) != str(target):
+                inst = index.retarget(inst, final[str(target)])
+            threaded.append(inst)
         
-        for i, inst in enumerate(instructions):
-            # Eliminar GOTO a la etiqueta inmediata siguiente
-            if inst.op == TACOp.GOTO:
-                if i + 1 < len(instructions) and instructions[i + 1].op == TACOp.LABEL:
-                    if str(inst.arg1) == str(instructions[i + 1].arg1):
-                        continue
-            
-            # Eliminar etiquetas no referenciadas
-            if inst.op == TACOp.LABEL:
-                label_name = str(inst.arg1)
-                referenced = False
-                for other in instructions:
-                    if other is inst: 
-                        continue
-                    if other.arg1 is not None and str(other.arg1) == label_name:
-                        referenced = True; break
-                    if other.arg2 is not None and str(other.arg2) == label_name:
-                        referenced = True; break
-                if not referenced:
+        # Etiquetas que empiezan en cada posición (para 'goto' a la siguiente)
+        following: List[Set[str]] = [set() for _ in range(len(threaded) + 1)]
+        for i in range(len(threaded) - 1, -1, -1):
+            if threaded[i].op == TACOp.LABEL:
+                following[i] = following[i + 1] | {str(threaded[i].arg1)}
+        
+        result: List[TACInstruction] = []
+        reachable = True
+        for i, inst in enumerate(threaded):
+            if inst.op in (TACOp.FUNC_START, TACOp.FUNC_END):
+                reachable = True
+            elif inst.op == TACOp.LABEL:
+                if index.references(str(inst.arg1)) == 0:
                     continue
-            
+                reachable = True
+            if not reachable:
+                index.remove(inst)
+                continue
+            target = jump_label(inst)
+            if target is not None and str(target) in following[i + 1]:
+                index.remove(inst)          # salta a donde igual iba a caer
+                continue
             result.append(inst)
+            if inst.op in (TACOp.GOTO, TACOp.RETURN):
+                reachable = False
         
         return result
     
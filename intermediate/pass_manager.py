@@ -0,0 +1,187 @@
+"""
+Pass manager del optimizador TAC
+
+Cada pase es una función List[TACInstruction] -> List[TACInstruction] que
+declara los análisis que necesita (requires) y los que deja obsoletos cuando
+cambia algo (invalidates). Un pipeline es una lista de pases y de grupos
+Fixpoint: un grupo se repite hasta que una vuelta completa no cambia nada, o
+hasta max_iterations.
+
+Por cada pase se acumulan ejecuciones, instrucciones eliminadas y tiempo
+(--time-passes en mips_driver), y se puede volcar el TAC después de un pase
+dado (--print-after=<pase>).
+
+Uso:
+    pm = PassManager(program, print_after={"copy_propagation"})
+    instructions = pm.run(instructions, [
+        Pass("constant_folding", opt.constant_folding),
+        Fixpoint("limpieza", [Pass("dead_code_elimination", opt.dead_code_elimination)]),
+    ])
+    print(pm.format_timing())
+"""
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from .tac import TACInstruction, TACProgram
+from .cfg import split_regions
+from .liveness import liveness_cache
+from .ssa import ssa_cache
+
+DEFAULT_MAX_ITERATIONS = 4
+
+# Análisis que el pass manager sabe construir (nombre -> constructor sobre el programa)
+ANALYSES: Dict[str, Callable[[TACProgram], object]] = {
+    "liveness": liveness_cache,
+    "ssa": ssa_cache,
+}
+ALL_ANALYSES: Tuple[str, ...] = tuple(ANALYSES)
+
+
+@dataclass
+class Pass:
+    """Un pase del pipeline"""
+    name: str
+    run: Callable[[List[TACInstruction]], List[TACInstruction]]
+    requires: Tuple[str, ...] = ()
+    invalidates: Tuple[str, ...] = ALL_ANALYSES
+
+
+@dataclass
+class Fixpoint:
+    """Grupo de pases que se repite hasta que no cambia nada"""
+    name: str
+    passes: List[Pass]
+    max_iterations: int = DEFAULT_MAX_ITERATIONS
+
+
+Stage = Union[Pass, Fixpoint]
+
+
+@dataclass
+class PassStats:
+    """Contadores acumulados de un pase"""
+    name: str
+    runs: int = 0
+    changed: int = 0      # ejecuciones que modificaron el TAC
+    removed: int = 0      # instrucciones eliminadas (neto)
+    seconds: float = 0.0
+
+
+@dataclass
+class FixpointStats:
+    name: str
+    iterations: int = 0
+    max_iterations: int = DEFAULT_MAX_ITERATIONS
+    converged: bool = False
+
+
+def _same(before: Sequence[TACInstruction], after: Sequence[TACInstruction]) -> bool:
+    """True si el pase no cambió nada (mismos objetos o mismo texto)"""
+    if len(before) != len(after):
+        return False
+    return all(a is b or str(a) == str(b) for a, b in zip(before, after))
+
+
+def _changed_regions(before: Sequence[TACInstruction], after: Sequence[TACInstruction]) -> List[str]:
+    """Regiones (funciones / <main>) cuyas instrucciones ya no son las mismas"""
+    old = dict(split_regions(before))
+    new = dict(split_regions(after))
+    changed = []
+    for name in set(old) | set(new):
+        a, b = old.get(name), new.get(name)
+        if a is None or b is None or len(a) != len(b) or any(x is not y for x, y in zip(a, b)):
+            changed.append(name)
+    return changed
+
+
+class PassManager:
+    """Ejecuta pipelines de pases con estadísticas, punto fijo e invalidación"""
+
+    def __init__(self, program: TACProgram, print_after: Optional[Set[str]] = None,
+                 out=None):
+        self.program = program
+        self.print_after = set(print_after or ())
+        self.out = out if out is not None else sys.stderr
+        self.stats: Dict[str, PassStats] = {}
+        self.fixpoints: List[FixpointStats] = []
+
+    # -------- análisis --------
+    def analysis(self, name: str):
+        """Análisis cacheado en el programa (p.ej. 'liveness')"""
+        return ANALYSES[name](self.program)
+
+    def _invalidate(self, names: Sequence[str], regions: List[str]):
+        for name in names:
+            cache = self.program.analysis_cache.get(name)
+            if cache is not None:
+                cache.invalidate(regions)
+
+    # -------- ejecución --------
+    def run(self, instructions: List[TACInstruction], pipeline: Sequence[Stage]) -> List[TACInstruction]:
+        for stage in pipeline:
+            if isinstance(stage, Fixpoint):
+                instructions = self._run_fixpoint(instructions, stage)
+            else:
+                instructions, _ = self._run_pass(instructions, stage)
+        return instructions
+
+    def _run_fixpoint(self, instructions: List[TACInstruction], group: Fixpoint) -> List[TACInstruction]:
+        fs = FixpointStats(group.name, max_iterations=group.max_iterations)
+        self.fixpoints.append(fs)
+        while fs.iterations < group.max_iterations:
+            fs.iterations += 1
+            any_change = False
+            for p in group.passes:
+                instructions, changed = self._run_pass(instructions, p, fs.iterations)
+                any_change = any_change or changed
+            if not any_change:
+                fs.converged = True
+                break
+        return instructions
+
+    def _run_pass(self, instructions: List[TACInstruction], p: Pass,
+                  iteration: Optional[int] = None) -> Tuple[List[TACInstruction], bool]:
+        for name in p.requires:
+            self.analysis(name)  # asegura que la caché exista antes del pase
+        st = self.stats.get(p.name)
+        if st is None:
+            st = self.stats[p.name] = PassStats(p.name)
+
+        t0 = time.perf_counter()
+        result = p.run(instructions)
+        st.seconds += time.perf_counter() - t0
+        st.runs += 1
+
+        changed = not _same(instructions, result)
+        if changed:
+            st.changed += 1
+            st.removed += len(instructions) - len(result)
+            if p.invalidates:
+                self._invalidate(p.invalidates, _changed_regions(instructions, result))
+
+        if p.name in self.print_after or "all" in self.print_after:
+            suffix = f" (iteración {iteration})" if iteration is not None else ""
+            print(f"*** TAC después de {p.name}{suffix} ***", file=self.out)
+            for inst in result:
+                print(f"    {inst}", file=self.out)
+        return result, changed
+
+    # -------- reporte --------
+    def format_timing(self) -> str:
+        """Tabla estilo -time-passes"""
+        total = sum(s.seconds for s in self.stats.values()) or 1e-12
+        lines = ["=== Tiempo por pase (TAC) ===",
+                 f"  {'Pase':<30} {'Ejec.':>5} {'Cambió':>6} {'Elim.':>6} {'ms':>9} {'%':>6}"]
+        for s in sorted(self.stats.values(), key=lambda s: -s.seconds):
+            lines.append(f"  {s.name:<30} {s.runs:>5} {s.changed:>6} {s.removed:>6} "
+                         f"{s.seconds * 1000:>9.3f} {100 * s.seconds / total:>5.1f}%")
+        lines.append(f"  {'Total':<30} {sum(s.runs for s in self.stats.values()):>5} "
+                     f"{'':>6} {sum(s.removed for s in self.stats.values()):>6} "
+                     f"{total * 1000:>9.3f}")
+        for fs in self.fixpoints:
+            state = "convergió" if fs.converged else "límite alcanzado"
+            lines.append(f"  Punto fijo '{fs.name}': {fs.iterations}/{fs.max_iterations} "
+                         f"iteraciones ({state})")
+        return "\n".join(lines)
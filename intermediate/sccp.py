@@ -0,0 +1,296 @@
+"""
+Sparse conditional constant propagation (Wegman & Zadeck) sobre el SSA
+
+Cada versión SSA tiene un valor en el lattice TOP (aún sin valor) > constante
+entera > BOTTOM (desconocido). Se propagan a la vez valores y aristas
+ejecutables: un bloque solo se evalúa si alguna arista ejecutable llega a
+él, y un IF con condición constante solo marca la arista que toma. Así una
+constante asignada antes de un if/while llega a las ramas, y las ramas que
+nunca se toman no "contaminan" los phis de los joins.
+
+Las constantes se evalúan con la semántica de la VM/MIPS (32 bits, división
+truncada). Los strings, la memoria, los globales y los resultados de
+llamadas son BOTTOM. La versión 0 (valor de entrada) es BOTTOM.
+
+sccp_rewrites(ssa) devuelve los cambios a aplicar sobre las instrucciones
+originales (sustituir usos por constantes, plegar definiciones, convertir
+IFs constantes en GOTO o borrarlos, eliminar bloques no ejecutables).
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from .tac import TACInstruction, TACOp, TACOperand, is_string_concat
+from .cfg import jump_target
+from .ssa import ENTRY_EDGE, SSAFunction, SSAName
+
+
+class _Top:
+    def __repr__(self):
+        return "TOP"
+
+
+class _Bottom:
+    def __repr__(self):
+        return "BOTTOM"
+
+
+TOP = _Top()
+BOTTOM = _Bottom()
+Lattice = Union[_Top, _Bottom, int]
+
+
+def _wrap(v: int) -> int:
+    return ((v + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+
+
+def _fold(op: TACOp, a: int, b: int) -> Lattice:
+    """Operación binaria entera como la ejecuta la VM (BOTTOM si falla en runtime)"""
+    if op == TACOp.ADD:
+        return _wrap(a + b)
+    if op == TACOp.SUB:
+        return _wrap(a - b)
+    if op == TACOp.MUL:
+        return _wrap(a * b)
+    if op in (TACOp.DIV, TACOp.MOD):
+        if b == 0:
+            return BOTTOM  # el error de división se deja para runtime
+        q = abs(a) // abs(b)
+        q = q if (a < 0) == (b < 0) else -q
+        return _wrap(q) if op == TACOp.DIV else _wrap(a - b * q)
+    if op == TACOp.LT:
+        return int(a < b)
+    if op == TACOp.LE:
+        return int(a <= b)
+    if op == TACOp.GT:
+        return int(a > b)
+    if op == TACOp.GE:
+        return int(a >= b)
+    if op == TACOp.EQ:
+        return int(a == b)
+    if op == TACOp.NE:
+        return int(a != b)
+    if op == TACOp.AND:
+        return a & b
+    if op == TACOp.OR:
+        return a | b
+    return BOTTOM
+
+
+_BINARY = {
+    TACOp.ADD, TACOp.SUB, TACOp.MUL, TACOp.DIV, TACOp.MOD,
+    TACOp.LT, TACOp.LE, TACOp.GT, TACOp.GE, TACOp.EQ, TACOp.NE,
+    TACOp.AND, TACOp.OR,
+}
+
+# Instrucciones sin efectos cuyo resultado se puede reemplazar por 'result = c'
+_FOLDABLE = _BINARY | {TACOp.ASSIGN, TACOp.NEG, TACOp.NOT, TACOp.DEREF}
+
+# Campos donde el backend acepta una constante en lugar de la variable
+_CONST_SLOTS = {
+    TACOp.ASSIGN: ("arg1",), TACOp.NEG: ("arg1",), TACOp.NOT: ("arg1",),
+    TACOp.PUSH: ("arg1",), TACOp.PRINT: ("arg1",), TACOp.RETURN: ("arg1",),
+    TACOp.PARAM: ("arg1",), TACOp.ARRAY_ACCESS: ("arg2",),
+    TACOp.ARRAY_ASSIGN: ("arg1", "arg2"), TACOp.FIELD_ASSIGN: ("arg2",),
+}
+
+
+def _const_of(op) -> Lattice:
+    """Valor de lattice de un operando constante"""
+    value = getattr(op, "value", None)
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, int):
+        return value
+    return BOTTOM
+
+
+def _meet(a: Lattice, b: Lattice) -> Lattice:
+    if a is TOP:
+        return b
+    if b is TOP:
+        return a
+    if a is BOTTOM or b is BOTTOM or a != b:
+        return BOTTOM
+    return a
+
+
+@dataclass
+class SCCPResult:
+    values: Dict[SSAName, Lattice] = field(default_factory=dict)
+    executable: List[bool] = field(default_factory=list)
+    edges: Set[Tuple[int, int]] = field(default_factory=set)
+    visits: int = 0
+
+
+def solve(ssa: SSAFunction) -> SCCPResult:
+    """Punto fijo de SCCP sobre una región"""
+    blocks = ssa.cfg.blocks
+    res = SCCPResult(executable=[False] * len(blocks))
+    values = res.values
+    use_sites = ssa.use_sites()
+    flow: List[Tuple[int, int]] = []
+    ssa_work: List[SSAName] = []
+
+    def value(name: SSAName) -> Lattice:
+        if name[1] == 0:
+            return BOTTOM
+        return values.get(name, TOP)
+
+    def operand(b: int, i: int, slot: str) -> Lattice:
+        name = ssa.uses[b][i].get(slot)
+        if name is not None:
+            return value(name)
+        op = getattr(blocks[b].instructions[i], slot)
+        return _const_of(op) if getattr(op, "is_constant", False) else BOTTOM
+
+    def update(name: SSAName, new: Lattice):
+        old = value(name)
+        if old is new or (isinstance(old, int) and isinstance(new, int) and old == new):
+            return
+        values[name] = new
+        ssa_work.append(name)
+
+    def evaluate(b: int, i: int, inst: TACInstruction) -> Lattice:
+        op = inst.op
+        if op in (TACOp.ASSIGN, TACOp.DEREF):
+            if op == TACOp.DEREF and "arg1" not in ssa.uses[b][i]:
+                return BOTTOM  # carga de un global / dirección no rastreada
+            return operand(b, i, "arg1")
+        if op in _BINARY:
+            if is_string_concat(inst):
+                return BOTTOM
+            x, y = operand(b, i, "arg1"), operand(b, i, "arg2")
+            if x is BOTTOM or y is BOTTOM:
+                return BOTTOM
+            if x is TOP or y is TOP:
+                return TOP
+            return _fold(op, x, y)
+        if op in (TACOp.NEG, TACOp.NOT):
+            x = operand(b, i, "arg1")
+            if x is TOP or x is BOTTOM:
+                return x
+            return _wrap(-x) if op == TACOp.NEG else int(x == 0)
+        return BOTTOM
+
+    def branch_edges(b: int, i: int, inst: TACInstruction):
+        block = blocks[b]
+        cond = operand(b, i, "arg1")
+        if cond is TOP:
+            return  # todavía no se sabe qué rama toma
+        target = ssa.cfg.label_to_block.get(jump_target(inst))
+        fallthrough = b + 1 if b + 1 < len(blocks) else None
+        if cond is BOTTOM:
+            succs = block.succs
+        else:
+            jumps = (cond != 0) if inst.op == TACOp.IF_TRUE else (cond == 0)
+            succs = [target if jumps else fallthrough]
+        for s in succs:
+            if s is not None and (b, s) not in res.edges:
+                flow.append((b, s))
+
+    def visit_phi(b: int, phi):
+        new = TOP
+        for p, v in phi.args.items():
+            if p == ENTRY_EDGE or (p, b) in res.edges:
+                new = _meet(new, value((phi.var, v)))
+        update((phi.var, phi.dest), new)
+
+    def visit_inst(b: int, i: int):
+        res.visits += 1
+        inst = blocks[b].instructions[i]
+        d = ssa.defs[b][i]
+        if d is not None:
+            update(d, evaluate(b, i, inst))
+        if inst is blocks[b].terminator and inst.op in (TACOp.IF_TRUE, TACOp.IF_FALSE):
+            branch_edges(b, i, inst)
+
+    if blocks:
+        flow.append((ENTRY_EDGE, 0))
+    while flow or ssa_work:
+        while flow:
+            p, b = flow.pop()
+            if (p, b) in res.edges:
+                continue
+            res.edges.add((p, b))
+            for phi in ssa.phis[b]:
+                visit_phi(b, phi)
+            if not res.executable[b]:
+                res.executable[b] = True
+                for i in range(len(blocks[b].instructions)):
+                    visit_inst(b, i)
+                term = blocks[b].terminator
+                if term is None or term.op not in (TACOp.IF_TRUE, TACOp.IF_FALSE):
+                    for s in blocks[b].succs:
+                        flow.append((b, s))
+        while ssa_work:
+            name = ssa_work.pop()
+            for kind, b, k in use_sites.get(name, ()):
+                if not res.executable[b]:
+                    continue
+                if kind == "phi":
+                    visit_phi(b, ssa.phis[b][k])
+                else:
+                    visit_inst(b, k)
+    return res
+
+
+def _materialize(v: int, like) -> TACOperand:
+    """Operando constante para 'v' con el tipo del operando que reemplaza"""
+    typ = getattr(like, "typ", None)
+    return TACOperand(bool(v) if typ == "boolean" else v, is_constant=True, typ=typ)
+
+
+def sccp_rewrites(ssa: SSAFunction, res: Optional[SCCPResult] = None) -> Dict[int, Optional[TACInstruction]]:
+    """
+    Cambios sobre las instrucciones de la región: id(inst) -> nueva instrucción
+    (o None para borrarla). Las instrucciones que no aparecen quedan igual.
+    """
+    if res is None:
+        res = solve(ssa)
+    changes: Dict[int, Optional[TACInstruction]] = {}
+
+    def const(name: Optional[SSAName]) -> Optional[int]:
+        if name is None or name[1] == 0:
+            return None
+        v = res.values.get(name, TOP)
+        return v if isinstance(v, int) else None
+
+    for b, block in enumerate(ssa.cfg.blocks):
+        if not res.executable[b]:
+            for inst in block.instructions:
+                if inst.op != TACOp.FUNC_END:
+                    changes[id(inst)] = None
+            continue
+        for i, inst in enumerate(block.instructions):
+            uses = ssa.uses[b][i]
+            # IF constante: GOTO si salta, se borra si no
+            if inst.op in (TACOp.IF_TRUE, TACOp.IF_FALSE):
+                c = const(uses.get("arg1"))
+                if c is None and getattr(inst.arg1, "is_constant", False):
+                    c = _const_of(inst.arg1)
+                if isinstance(c, int):
+                    jumps = (c != 0) if inst.op == TACOp.IF_TRUE else (c == 0)
+                    changes[id(inst)] = TACInstruction(TACOp.GOTO, arg1=inst.arg2) if jumps else None
+                continue
+            # Definición constante: result = c
+            c = const(ssa.defs[b][i])
+            if c is not None and inst.op in _FOLDABLE:
+                if not (inst.op == TACOp.ASSIGN and getattr(inst.arg1, "is_constant", False)):
+                    changes[id(inst)] = TACInstruction(TACOp.ASSIGN, inst.result,
+                                                       _materialize(c, inst.result))
+                continue
+            # Usos constantes en los campos que aceptan inmediatos
+            slots = _CONST_SLOTS.get(inst.op, ("arg1", "arg2") if inst.op in _BINARY else ())
+            new_ops = {}
+            for slot in slots:
+                c = const(uses.get(slot))
+                if c is not None:
+                    new_ops[slot] = _materialize(c, getattr(inst, slot))
+            if new_ops:
+                changes[id(inst)] = TACInstruction(
+                    inst.op,
+                    new_ops.get("result", inst.result),
+                    new_ops.get("arg1", inst.arg1),
+                    new_ops.get("arg2", inst.arg2),
+                )
+    return changes
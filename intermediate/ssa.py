@@ -0,0 +1,333 @@
+"""
+Forma SSA de las funciones del TAC
+
+Las variables de una región son sus temporales (tK) y sus slots del frame
+(FP[-k] locales, FP[8+] parámetros): ninguna llamada puede escribir el frame
+de quien la hace, así que se comportan como escalares sin alias. Los globales
+(0x...) y la memoria de objetos/arrays no entran en SSA.
+
+La construcción es la clásica: dominadores (Cooper-Harvey-Kennedy sobre el
+RPO), fronteras de dominancia, phis en la frontera iterada de los bloques
+que definen cada variable (semi-pruned: solo variables vivas entre bloques)
+y renombrado en preorden del árbol de dominadores. La versión 0 de cada
+variable es su valor a la entrada de la función.
+
+Las versiones se guardan en tablas aparte (uses/defs por instrucción y phis
+por bloque); las instrucciones no se renombran. Mientras los pases solo
+sustituyan usos por constantes o borren código, el SSA sigue siendo
+"convencional" y salir de SSA es olvidar las versiones: to_tac() devuelve
+las instrucciones de los bloques alcanzables sin los phis.
+
+Uso:
+    ssa = build_ssa(build_cfg(name, instructions))
+    for phi in ssa.phis[b]: ...
+    print(format_ssa(ssa))
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from .tac import TACInstruction, TACOp, TACProgram
+from .cfg import FunctionCFG, build_cfg, split_regions, dominators
+from .liveness import temp_name
+
+_SLOT_RE = re.compile(r"FP\[-?\d+\]$")
+
+# Versión de una variable: ("t5", 3) -> se muestra como t5_3
+SSAName = Tuple[str, int]
+
+# "Predecesor" de la entrada en los phis del bloque de entrada (si es cabecera de loop)
+ENTRY_EDGE = -1
+
+_BINARY_OPS = {
+    TACOp.ADD, TACOp.SUB, TACOp.MUL, TACOp.DIV, TACOp.MOD,
+    TACOp.LT, TACOp.LE, TACOp.GT, TACOp.GE, TACOp.EQ, TACOp.NE,
+    TACOp.AND, TACOp.OR,
+}
+
+# Operaciones que escriben 'result'
+_DEF_OPS = _BINARY_OPS | {
+    TACOp.ASSIGN, TACOp.NEG, TACOp.NOT, TACOp.DEREF, TACOp.POP, TACOp.NEW,
+    TACOp.CALL, TACOp.FIELD_ACCESS, TACOp.ARRAY_ACCESS,
+}
+
+
+def var_name(op) -> Optional[str]:
+    """Nombre de la variable SSA del operando (temporal o slot del frame), o None"""
+    if op is None or getattr(op, "is_constant", False):
+        return None
+    name = temp_name(op)
+    if name is not None:
+        return name
+    name = str(op)
+    return name if _SLOT_RE.match(name) else None
+
+
+def use_slots(inst: TACInstruction) -> List[str]:
+    """Campos ('result'/'arg1'/'arg2') de la instrucción que se leen como valores"""
+    op = inst.op
+    if op in _BINARY_OPS or op == TACOp.ARRAY_ACCESS:
+        return ["arg1", "arg2"]
+    if op in (TACOp.ASSIGN, TACOp.NEG, TACOp.NOT, TACOp.FIELD_ACCESS, TACOp.DEREF,
+              TACOp.IF_TRUE, TACOp.IF_FALSE, TACOp.RETURN, TACOp.PUSH, TACOp.PRINT,
+              TACOp.PARAM):
+        return ["arg1"]
+    if op == TACOp.ARRAY_ASSIGN:
+        return ["result", "arg1", "arg2"]
+    if op == TACOp.FIELD_ASSIGN:
+        return ["result", "arg2"]
+    if op == TACOp.CALL:
+        target = inst.arg1
+        # Llamada indirecta: el temporal tiene la dirección (toString se intercepta)
+        if target is not None and getattr(target, "is_temp", False) and "toString" not in str(target):
+            return ["arg1"]
+    return []
+
+
+def def_var(inst: TACInstruction) -> Optional[str]:
+    """Variable que define la instrucción, o None"""
+    if inst.op in _DEF_OPS:
+        return var_name(inst.result)
+    return None
+
+
+@dataclass
+class Phi:
+    """v_dest = phi(v_a [pred a], v_b [pred b], ...)"""
+    var: str
+    dest: int
+    args: Dict[int, int] = field(default_factory=dict)   # bloque predecesor -> versión (ENTRY_EDGE: inicio)
+
+
+@dataclass
+class SSAFunction:
+    """SSA de una región sobre su CFG"""
+    cfg: FunctionCFG
+    reachable: List[bool]
+    idom: List[Optional[int]]
+    dom_children: List[List[int]]
+    frontier: List[Set[int]]
+    variables: List[str] = field(default_factory=list)
+    phis: List[List[Phi]] = field(default_factory=list)
+    uses: List[List[Dict[str, SSAName]]] = field(default_factory=list)   # [bloque][inst] campo -> versión
+    defs: List[List[Optional[SSAName]]] = field(default_factory=list)
+    versions: Dict[str, int] = field(default_factory=dict)              # variable -> nº de versiones
+
+    def instructions(self) -> List[TACInstruction]:
+        return self.cfg.instructions()
+
+    def to_tac(self) -> List[TACInstruction]:
+        """Sale de SSA: instrucciones de los bloques alcanzables (el FUNC_END siempre)"""
+        out: List[TACInstruction] = []
+        for b, block in enumerate(self.cfg.blocks):
+            if self.reachable[b]:
+                out.extend(block.instructions)
+            else:
+                out.extend(i for i in block.instructions if i.op == TACOp.FUNC_END)
+        return out
+
+    def def_sites(self) -> Dict[SSAName, Tuple]:
+        """Dónde se define cada versión: ('phi', b, k) o ('inst', b, i)"""
+        sites: Dict[SSAName, Tuple] = {}
+        for b, phis in enumerate(self.phis):
+            for k, phi in enumerate(phis):
+                sites[(phi.var, phi.dest)] = ("phi", b, k)
+        for b, defs in enumerate(self.defs):
+            for i, d in enumerate(defs):
+                if d is not None:
+                    sites[d] = ("inst", b, i)
+        return sites
+
+    def use_sites(self) -> Dict[SSAName, List[Tuple]]:
+        """Dónde se usa cada versión: ('phi', b, k) o ('inst', b, i)"""
+        sites: Dict[SSAName, List[Tuple]] = {}
+        for b, phis in enumerate(self.phis):
+            for k, phi in enumerate(phis):
+                for v in phi.args.values():
+                    sites.setdefault((phi.var, v), []).append(("phi", b, k))
+        for b, uses in enumerate(self.uses):
+            for i, slots in enumerate(uses):
+                for name in slots.values():
+                    sites.setdefault(name, []).append(("inst", b, i))
+        return sites
+
+
+def build_ssa(cfg: FunctionCFG) -> SSAFunction:
+    """Construye el SSA de una región"""
+    n = len(cfg.blocks)
+    rpo = cfg.reverse_postorder()
+    reachable = [False] * n
+    for b in rpo:
+        reachable[b] = True
+    idom = dominators(cfg, rpo)
+
+    children: List[List[int]] = [[] for _ in range(n)]
+    for b in rpo[1:]:
+        children[idom[b]].append(b)
+
+    # Fronteras de dominancia
+    frontier: List[Set[int]] = [set() for _ in range(n)]
+    for b in rpo:
+        preds = [p for p in cfg.blocks[b].preds if reachable[p]]
+        # La entrada tiene además la arista virtual desde el inicio de la función
+        if len(preds) + (1 if b == rpo[0] else 0) < 2:
+            continue
+        # El idom de la entrada es el inicio virtual: se sube hasta ella inclusive
+        stop = None if b == rpo[0] else idom[b]
+        for p in preds:
+            runner = p
+            while runner != stop:
+                frontier[runner].add(b)
+                if runner == rpo[0]:
+                    break
+                runner = idom[runner]
+
+    ssa = SSAFunction(cfg, reachable, idom, children, frontier)
+    ssa.phis = [[] for _ in range(n)]
+    ssa.uses = [[{} for _ in block.instructions] for block in cfg.blocks]
+    ssa.defs = [[None] * len(block.instructions) for block in cfg.blocks]
+
+    # Variables vivas entre bloques y bloques que las definen
+    def_blocks: Dict[str, Set[int]] = {}
+    crossing: Set[str] = set()
+    seen_vars: Dict[str, None] = {}
+    for b in rpo:
+        killed: Set[str] = set()
+        for inst in cfg.blocks[b].instructions:
+            for slot in use_slots(inst):
+                v = var_name(getattr(inst, slot))
+                if v is not None:
+                    seen_vars.setdefault(v)
+                    if v not in killed:
+                        crossing.add(v)
+            d = def_var(inst)
+            if d is not None:
+                seen_vars.setdefault(d)
+                killed.add(d)
+                def_blocks.setdefault(d, set()).add(b)
+    ssa.variables = list(seen_vars)
+
+    # Phis en la frontera de dominancia iterada
+    for v in ssa.variables:
+        if v not in crossing:
+            continue
+        placed: Set[int] = set()
+        work = list(def_blocks.get(v, ()))
+        while work:
+            b = work.pop()
+            for f in frontier[b]:
+                if f not in placed:
+                    placed.add(f)
+                    ssa.phis[f].append(Phi(v, -1))
+                    if f not in def_blocks.get(v, ()):
+                        work.append(f)
+
+    # Renombrado en preorden del árbol de dominadores
+    counter: Dict[str, int] = {v: 1 for v in ssa.variables}
+    stacks: Dict[str, List[int]] = {v: [0] for v in ssa.variables}
+
+    def new_version(v: str) -> int:
+        k = counter[v]
+        counter[v] = k + 1
+        stacks[v].append(k)
+        return k
+
+    if rpo:
+        for phi in ssa.phis[rpo[0]]:
+            phi.args[ENTRY_EDGE] = 0
+        stack: List[Tuple[int, bool, List[str]]] = [(rpo[0], False, [])]
+        while stack:
+            b, done, pushed = stack.pop()
+            if done:
+                for v in pushed:
+                    stacks[v].pop()
+                continue
+            pushed = []
+            for phi in ssa.phis[b]:
+                phi.dest = new_version(phi.var)
+                pushed.append(phi.var)
+            for i, inst in enumerate(cfg.blocks[b].instructions):
+                uses = ssa.uses[b][i]
+                for slot in use_slots(inst):
+                    v = var_name(getattr(inst, slot))
+                    if v is not None:
+                        uses[slot] = (v, stacks[v][-1])
+                d = def_var(inst)
+                if d is not None:
+                    ssa.defs[b][i] = (d, new_version(d))
+                    pushed.append(d)
+            for s in cfg.blocks[b].succs:
+                for phi in ssa.phis[s]:
+                    phi.args[b] = stacks[phi.var][-1]
+            stack.append((b, True, pushed))
+            for c in reversed(children[b]):
+                stack.append((c, False, []))
+
+    ssa.versions = counter
+    return ssa
+
+
+def ssa_name(name: SSAName) -> str:
+    return f"{name[0]}_{name[1]}"
+
+
+def format_ssa(ssa: SSAFunction) -> str:
+    """Representación legible (para --format ssa)"""
+    lines = [f"=== {ssa.cfg.name} (SSA, {len(ssa.variables)} variables) ==="]
+    for b, block in enumerate(ssa.cfg.blocks):
+        idom = ssa.idom[b]
+        dom = "-" if idom is None or idom == b else f"B{idom}"
+        flag = "" if ssa.reachable[b] else "  (inalcanzable)"
+        lines.append(f"B{b}: idom {dom}{flag}")
+        for phi in ssa.phis[b]:
+            args = ", ".join(f"{phi.var}_{v} [{'entrada' if p == ENTRY_EDGE else f'B{p}'}]"
+                             for p, v in sorted(phi.args.items()))
+            lines.append(f"    {phi.var}_{phi.dest} = phi({args})")
+        for i, inst in enumerate(block.instructions):
+            notes = [f"{slot}={ssa_name(v)}" for slot, v in ssa.uses[b][i].items()]
+            d = ssa.defs[b][i]
+            if d is not None:
+                notes.insert(0, f"def {ssa_name(d)}")
+            suffix = f"    ; {', '.join(notes)}" if notes else ""
+            lines.append(f"    {inst}{suffix}")
+    return "\n".join(lines)
+
+
+class SSACache:
+    """SSA por región, reutilizada mientras sus instrucciones no cambien"""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Tuple[TACInstruction, ...], SSAFunction]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str, instructions: Sequence[TACInstruction]) -> SSAFunction:
+        entry = self._entries.get(name)
+        if entry is not None:
+            cached, ssa = entry
+            if len(cached) == len(instructions) and all(a is b for a, b in zip(cached, instructions)):
+                self.hits += 1
+                return ssa
+        self.misses += 1
+        ssa = build_ssa(build_cfg(name, instructions))
+        self._entries[name] = (tuple(instructions), ssa)
+        return ssa
+
+    def analyze(self, instructions: Sequence[TACInstruction]) -> List[SSAFunction]:
+        """SSA de todas las regiones de una lista plana de instrucciones"""
+        return [self.get(name, insts) for name, insts in split_regions(instructions)]
+
+    def invalidate(self, names: Optional[Sequence[str]] = None):
+        if names is None:
+            self._entries.clear()
+            return
+        for name in names:
+            self._entries.pop(name, None)
+
+
+def ssa_cache(program: TACProgram) -> SSACache:
+    """Caché de SSA asociada al programa"""
+    cache = program.analysis_cache.get("ssa")
+    if cache is None:
+        cache = program.analysis_cache["ssa"] = SSACache()
+    return cache
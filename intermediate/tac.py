@@ -2,7 +2,7 @@
 Three-Address Code (TAC) - Definiciones e instrucciones
 """
 from dataclasses import dataclass
-from typing import Optional, Union, List
+from typing import Optional, Union, List, Dict
 from enum import Enum
 
 class TACOp(Enum):
@@ -172,6 +172,16 @@ class TACInstruction:
             return f"{self.op.value} {self.result} {self.arg1} {self.arg2}"
 
 
+def is_string_concat(inst: TACInstruction) -> bool:
+    """ADD cuyo operando es string (concatenación, no suma entera)"""
+    if inst.op != TACOp.ADD:
+        return False
+    for arg in (inst.arg1, inst.arg2):
+        if arg is not None and str(getattr(arg, "typ", None)) == "string":
+            return True
+    return False
+
+
 # --- TempPool simple -------------------------------------------
 class TempPool:
     def __init__(self):
@@ -203,6 +213,8 @@ class TACProgram:
         self.temp_counter = 0
         self.label_counter = 0
         self._temp_pool = TempPool()
+        # Análisis reutilizables entre pases del optimizador (p.ej. liveness)
+        self.analysis_cache: Dict[str, object] = {}
         
      # Reemplaza tu new_temp() anterior por:
     def new_temp(self) -> str:
@@ -12,12 +12,14 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 
-from antlr4 import FileStream, CommonTokenStream
+from antlr4 import FileStream
 from antlr4.error.ErrorListener import ErrorListener
 
-from program.gen.CompiscriptLexer import CompiscriptLexer
-from program.gen.CompiscriptParser import CompiscriptParser
+from program.parsing import parse_program
 from intermediate.runner import generate_intermediate_code
+from intermediate.tac_vm import run_tac, format_stats
+from intermediate.cfg import build_cfgs, format_cfg
+from intermediate.ssa import build_ssa, format_ssa
 
 class SyntaxErrorCollector(ErrorListener):
     """Colector de errores sintácticos"""
@@ -59,10 +61,20 @@ def main():
     )
     parser.add_argument(
         '--format',
-        choices=['tac', 'json', 'debug'],
+        choices=['tac', 'json', 'debug', 'cfg', 'ssa'],
         default='tac',
         help='Formato de salida'
     )
+    parser.add_argument(
+        '--run',
+        action='store_true',
+        help='Ejecutar el TAC generado con el intérprete (sin MIPS)'
+    )
+    parser.add_argument(
+        '--run-stats',
+        action='store_true',
+        help='Con --run: mostrar conteos dinámicos por operación TAC (en stderr)'
+    )
     
     args = parser.parse_args()
     
@@ -82,17 +94,13 @@ def main():
     try:
         # Fase 1: Análisis léxico y sintáctico
         input_stream = FileStream(str(input_path), encoding='utf-8')
-        lexer = CompiscriptLexer(input_stream)
-        token_stream = CommonTokenStream(lexer)
-        parser = CompiscriptParser(token_stream)
         
         # Configurar listener de errores
         syntax_collector = SyntaxErrorCollector()
-        parser.removeErrorListeners()
-        parser.addErrorListener(syntax_collector)
         
-        # Parsear
-        tree = parser.program()
+        # Parsear (SLL primero, LL completo solo si SLL falla)
+        parsed = parse_program(input_stream, [syntax_collector])
+        tree = parsed.tree
         
         # Verificar errores sintácticos
         if syntax_collector.errors:
@@ -103,7 +111,7 @@ def main():
             sys.exit(1)
         
         if args.verbose:
-            print("✓ Análisis sintáctico completado")
+            print(f"✓ Análisis sintáctico completado (modo {parsed.mode})")
         
         # Fase 2: Análisis semántico y generación de TAC
         result = generate_intermediate_code(tree)
@@ -122,6 +130,17 @@ def main():
             print(f"  Temporales usados: {result.tac_program.temp_counter}")
             print(f"  Etiquetas usadas: {result.tac_program.label_counter}")
         
+        # Ejecutar el TAC directamente
+        if args.run:
+            run_result = run_tac(result.tac_program, result.global_scope)
+            sys.stdout.write(run_result.output)
+            if args.run_stats:
+                print("\n" + format_stats(run_result), file=sys.stderr)
+            if run_result.error:
+                print(f"Error de ejecución: {run_result.error}", file=sys.stderr)
+                sys.exit(1)
+            sys.exit(0)
+        
         # Generar salida según formato
         if args.format == 'tac':
             output = result.get_tac_code()
@@ -130,15 +149,23 @@ def main():
             output = json.dumps({
                 'instructions': result.get_tac_lines(),
                 'temp_count': result.tac_program.temp_counter,
-                'label_count': result.tac_program.label_counter
+                'label_count': result.tac_program.label_counter,
+                'parse_mode': parsed.mode
             }, indent=2)
         elif args.format == 'debug':
             output = f"# Código TAC generado desde {input_path.name}\n"
             output += f"# Temporales: {result.tac_program.temp_counter}\n"
             output += f"# Etiquetas: {result.tac_program.label_counter}\n"
             output += f"# Instrucciones: {len(result.tac_program.instructions)}\n"
+            output += f"# Modo de parsing: {parsed.mode}\n"
             output += "#" + "="*50 + "\n\n"
             output += result.tac_program.to_string(numbered=True)  # usamos la versión numerada
+        elif args.format == 'cfg':
+            cfgs = build_cfgs(result.tac_program.instructions)
+            output = "\n\n".join(format_cfg(cfg) for cfg in cfgs)
+        elif args.format == 'ssa':
+            cfgs = build_cfgs(result.tac_program.instructions)
+            output = "\n\n".join(format_ssa(build_ssa(cfg)) for cfg in cfgs)
 
         else:
             output = result.get_tac_code()
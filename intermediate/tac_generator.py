@@ -213,45 +213,39 @@ class TACGenerator(CompiscriptVisitor):
         return None
     
 
+    def _store_target(self, var_name: str) -> TACOperand:
+        """Operando donde se guarda una variable: FP[k] (local/param), 0x... (global) o el nombre"""
+        sym = self.current_scope.resolve(var_name)
+        
+        # --- ***** INICIO DE CORRECCIÓN ***** ---
+        is_local = False
+        if sym and hasattr(sym, 'offset') and sym.offset is not None:
+            if self.in_function:
+                is_local = True # Es un local/param de FUNCIÓN
+            elif sym.offset >= 0:
+                # Es un local de MAIN (como 'fk')
+                is_local = True
+        
+        if is_local:
+            offset = sym.offset
+            if offset >= 0:
+                mips_offset = -(offset + 4)
+            elif self.current_class:
+                mips_offset = (-offset) + 8
+            else:
+                mips_offset = (-offset) + 4
+            return TACOperand(f"FP[{mips_offset}]")
+        if var_name in self.global_addrs:
+            return TACOperand(self.global_addrs[var_name])
+        return self._make_variable(var_name)
+        # --- ***** FIN DE CORRECCIÓN ***** ---
+
     def visitAssignment(self, ctx: CompiscriptParser.AssignmentContext):
         """Maneja asignaciones"""
         if len(ctx.expression()) == 1:
             var_name = self._id(ctx)
             value = self.visit(ctx.expression(0))
-            
-            sym = self.current_scope.resolve(var_name)
-            
-            # --- ***** INICIO DE CORRECCIÓN ***** ---
-            is_local = False
-            if sym and hasattr(sym, 'offset') and sym.offset is not None:
-                if self.in_function:
-                    is_local = True # Es un local/param de FUNCIÓN
-                elif sym.offset >= 0:
-                    # Es un local de MAIN (como 'fk')
-                    is_local = True
-            
-            if is_local:
-                offset = sym.offset
-                if offset >= 0:
-                    mips_offset = -(offset + 4)
-                    fp_ref = TACOperand(f"FP[{mips_offset}]")
-                else:
-                    if self.current_class:
-                        mips_offset = (-offset) + 8
-                    else:
-                        mips_offset = (-offset) + 4
-                    fp_ref = TACOperand(f"FP[{mips_offset}]")
-                
-                self.program.emit(TACOp.ASSIGN, result=fp_ref, arg1=value)
-
-            elif var_name in self.global_addrs:
-                addr_op = TACOperand(self.global_addrs[var_name])
-                self.program.emit(TACOp.ASSIGN, result=addr_op, arg1=value)
-            else:
-                var_op = self._make_variable(var_name)
-                self.program.emit(TACOp.ASSIGN, result=var_op, arg1=value)
-            # --- ***** FIN DE CORRECCIÓN ***** ---
-            
+            self.program.emit(TACOp.ASSIGN, result=self._store_target(var_name), arg1=value)
             self._free_if_temp(value)
         else:
             # Asignación a propiedad (this.nombre = ...)
@@ -594,20 +588,8 @@ class TACGenerator(CompiscriptVisitor):
         # Caso A: asignación a índice de arreglo:  <id> '[' expr ']'
         if suffixes and suffixes[-1].getChild(0).getText() == '[':
             array_name = self._id(base_atom)  # nombre del arreglo
-            sym = self.current_scope.resolve(array_name)
-            
-            # --- LÓGICA DE RESOLUCIÓN (NUEVA) ---
-            array_op = None
-            if self.in_function and sym and hasattr(sym, 'offset') and sym.offset is not None:
-                # Es local/param (ej: FP[40])
-                array_op = TACOperand(f"FP[{sym.offset}]")
-            elif array_name in self.global_addrs:
-                # Es global (ej: 0x1028)
-                array_op = TACOperand(self.global_addrs[array_name])
-            else:
-                # Fallback (aunque no debería pasar si el type-checker funcionó)
-                array_op = self._make_variable(array_name) 
-            # --- FIN LÓGICA NUEVA ---
+            # Mismo slot que las lecturas: FP[k] (local/param/main), 0x... (global) o el nombre
+            array_op = self._store_target(array_name)
 
             index = self.visit(suffixes[-1].expression())
             
@@ -630,7 +612,7 @@ class TACGenerator(CompiscriptVisitor):
         # Caso B: identificador simple
         if not suffixes and hasattr(base_atom, "Identifier"):
             var_name = self._id(base_atom)
-            var_op = self._make_variable(var_name)
+            var_op = self._store_target(var_name)   # mismo slot que visitAssignment (update del for)
             self.program.emit(TACOp.ASSIGN, var_op, rhs)
             self._free_if_temp(rhs)
             return var_op
@@ -0,0 +1,614 @@
+"""
+Intérprete de TAC (máquina virtual)
+Ejecuta un TACProgram (optimizado o no) directamente, sin pasar por MIPS.
+
+Modelo de memoria (el mismo que asume el MIPSGenerator):
+  - Globales (0x...): direcciones fijas.
+  - FP[k]: palabra en $fp + k (params en FP[8+], 'this' en FP[8], locales en FP[-k]).
+  - PUSH/CALL/ADD_SP: los argumentos viven en el stack; ENTER guarda el $fp
+    anterior en 0($fp) y reserva los locales.
+  - NEW: bloque en el heap (4 bytes por elemento en arrays; en objetos una
+    palabra de cabecera con el id de clase y después los campos).
+  - Temporales (tK): un arreglo por activación (no ocupan memoria).
+
+Cada instrucción se pre-compila a un closure que retorna el índice de la
+siguiente, así el loop de despacho no interpreta strings de operandos.
+Los valores son enteros (32 bits), strings de Python para los strings y
+referencias a función para las direcciones de métodos.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .tac import TACProgram, TACInstruction, TACOp
+from semantic.symbols import ClassSymbol, OBJECT_HEADER_SIZE, class_ids
+
+DEFAULT_MAX_STEPS = 50_000_000
+
+STACK_BASE = 0x7FFFEFFC
+HEAP_BASE = 0x10040000
+
+_HALT = -1
+
+
+class TACVMError(Exception):
+    """Error de ejecución del intérprete de TAC"""
+    pass
+
+
+def _wrap(x: int) -> int:
+    """Aritmética de 32 bits con signo (como MIPS)"""
+    return ((x + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+
+
+def _trunc_div(a: int, b: int) -> int:
+    if b == 0:
+        raise TACVMError("división por cero")
+    q = abs(a) // abs(b)
+    return _wrap(q if (a < 0) == (b < 0) else -q)
+
+
+def _trunc_mod(a: int, b: int) -> int:
+    if b == 0:
+        raise TACVMError("módulo por cero")
+    return _wrap(a - b * _trunc_div(a, b))
+
+
+def _is_temp_name(name: str) -> bool:
+    """Misma regla que el generador: empieza con 't' y no es 'true'/'this'"""
+    return name.startswith("t") and name not in ("true", "this")
+
+
+def _is_string_add(inst: TACInstruction) -> bool:
+    """El generador decide la concatenación por el tipo estático de arg1/arg2"""
+    for arg in (inst.arg1, inst.arg2):
+        if arg is not None and str(getattr(arg, "typ", None)) == "string":
+            return True
+    return False
+
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "0": "\0", '"': '"', "\\": "\\", "'": "'"}
+
+
+def _unescape(text: str) -> str:
+    """Los literales llegan crudos ("a\\n"); .asciiz interpreta los escapes"""
+    if "\\" not in text:
+        return text
+    out = []
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if ch == "\\" and i + 1 < len(text) and text[i + 1] in _ESCAPES:
+            out.append(_ESCAPES[text[i + 1]])
+            i += 2
+            continue
+        out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+def _func_key(name: str) -> str:
+    """Point.constructor y Point_constructor son la misma etiqueta en MIPS"""
+    return name.replace(".", "_")
+
+
+def _as_str(v) -> str:
+    """Operando de concatenación/print: null (0) es el string vacío"""
+    if isinstance(v, str):
+        return v
+    return "" if v == 0 else str(v)
+
+
+class FunctionRef:
+    """Dirección de una función del programa (resultado de obj."metodo")"""
+    __slots__ = ("name", "entry", "n_temps")
+
+    def __init__(self, name: str, entry: int, n_temps: int):
+        self.name = name
+        self.entry = entry
+        self.n_temps = n_temps
+
+    def __repr__(self):
+        return f"<func {self.name}>"
+
+
+@dataclass
+class TACRunResult:
+    """Resultado de una ejecución"""
+    output: str
+    steps: int
+    counts: Dict[str, int] = field(default_factory=dict)        # TACOp -> ejecuciones
+    instruction_counts: List[int] = field(default_factory=list)  # por índice de program.instructions
+    heap_bytes: int = 0
+    max_call_depth: int = 0
+    error: Optional[str] = None
+
+
+class TACVM:
+    """Compila el TAC a closures y lo ejecuta"""
+
+    _ARITH = {
+        TACOp.ADD: lambda a, b: _wrap(a + b),
+        TACOp.SUB: lambda a, b: _wrap(a - b),
+        TACOp.MUL: lambda a, b: _wrap(a * b),
+        TACOp.DIV: _trunc_div,
+        TACOp.MOD: _trunc_mod,
+        TACOp.LT: lambda a, b: 1 if a < b else 0,
+        TACOp.LE: lambda a, b: 1 if a <= b else 0,
+        TACOp.GT: lambda a, b: 1 if a > b else 0,
+        TACOp.GE: lambda a, b: 1 if a >= b else 0,
+        TACOp.EQ: lambda a, b: 1 if a == b else 0,
+        TACOp.NE: lambda a, b: 1 if a != b else 0,
+        TACOp.AND: lambda a, b: a & b,
+        TACOp.OR: lambda a, b: a | b,
+    }
+
+    def __init__(self, program: TACProgram, global_scope=None,
+                 max_steps: int = DEFAULT_MAX_STEPS):
+        self.program = program
+        self.global_scope = global_scope
+        self.max_steps = max_steps
+
+        # --- Estado de ejecución ---
+        self.mem: Dict[int, Any] = {}
+        self.sp = STACK_BASE
+        self.fp = STACK_BASE
+        self.heap = HEAP_BASE
+        self.temps: List[Any] = []
+        self.call_stack: List[Tuple[int, Optional[Callable], List[Any]]] = []
+        self.max_depth = 0
+        self.output: List[str] = []
+
+        # --- Código compilado ---
+        self.code: List[Callable[[], int]] = []
+        self.origin: List[int] = []          # código -> índice en program.instructions
+        self.functions: Dict[str, FunctionRef] = {}
+        self.entry = 0
+        self._compile()
+
+    # --- Compilación ---
+
+    def _compile(self):
+        insts = self.program.instructions
+
+        # Regiones: script (todo lo que está fuera de funciones) primero,
+        # luego cada función, igual que el layout del MIPSGenerator
+        main_idx: List[int] = []
+        func_regions: List[List[int]] = []
+        current: Optional[List[int]] = None
+        for i, inst in enumerate(insts):
+            if inst.op == TACOp.FUNC_START:
+                current = []
+                func_regions.append(current)
+            if current is not None:
+                current.append(i)
+            else:
+                main_idx.append(i)
+            if inst.op == TACOp.FUNC_END:
+                current = None
+
+        layout: List[Tuple[int, Optional[int]]] = [(i, 0) for i in main_idx]
+        layout.append((-1, 0))                      # HALT al terminar el script
+        for r, region in enumerate(func_regions, start=1):
+            layout.extend((i, r) for i in region)
+
+        # Tabla de temporales por región y posición de etiquetas/funciones
+        temp_tables: Dict[int, Dict[str, int]] = {}
+        labels: Dict[str, int] = {}
+        pending_funcs: List[Tuple[str, int, int]] = []
+        for pc, (i, region) in enumerate(layout):
+            table = temp_tables.setdefault(region, {})
+            if i < 0:
+                continue
+            inst = insts[i]
+            for op in (inst.result, inst.arg1, inst.arg2):
+                if op is None or getattr(op, "is_constant", False):
+                    continue
+                name = str(op)
+                if _is_temp_name(name) and name not in table:
+                    table[name] = len(table)
+            if inst.op == TACOp.LABEL:
+                labels[str(inst.arg1)] = pc
+            elif inst.op == TACOp.FUNC_START:
+                pending_funcs.append((str(inst.arg1), pc + 1, region))
+        for name, entry, region in pending_funcs:
+            self.functions[_func_key(name)] = FunctionRef(name, entry, len(temp_tables[region]))
+
+        self.temps = [0] * len(temp_tables.get(0, {}))
+
+        # Frame del script: sus locales FP[-k] quedan debajo de $fp (como el
+        # 'subu $sp, $sp, __MAIN_FRAME_SIZE__' del generador)
+        main_locals = getattr(self.global_scope, "main_locals_size", 0) or 0
+        for i in main_idx:
+            for op in (insts[i].result, insts[i].arg1, insts[i].arg2):
+                name = str(op) if op is not None else ""
+                if name.startswith("FP[-"):
+                    main_locals = max(main_locals, -int(name[3:-1]))
+        self.sp = self.fp - main_locals
+        for pc, (i, region) in enumerate(layout):
+            self.origin.append(i)
+            if i < 0:
+                self.code.append(lambda: _HALT)
+                continue
+            self.code.append(self._compile_inst(insts[i], pc + 1, temp_tables[region], labels))
+
+    def _getter(self, op, temps: Dict[str, int]) -> Callable[[], Any]:
+        """Closure que lee el VALOR de un operando"""
+        vm = self
+        mem = self.mem
+        if op is None:
+            return lambda: 0
+        if getattr(op, "is_constant", False):
+            v = op.value
+            if v is None:
+                v = 0
+            elif isinstance(v, bool):
+                v = 1 if v else 0
+            elif isinstance(v, str):
+                v = _unescape(v)
+            return lambda: v
+        name = str(op)
+        if name == "this":
+            return lambda: mem.get(vm.fp + 8, 0)
+        if _is_temp_name(name):
+            k = temps[name]
+            return lambda: vm.temps[k]
+        if name.startswith("FP["):
+            off = int(name[3:-1])
+            return lambda: mem.get(vm.fp + off, 0)
+        if name.startswith("0x"):
+            addr = int(name, 16)
+            return lambda: mem.get(addr, 0)
+        raise TACVMError(f"no se sabe cómo leer el operando '{name}'")
+
+    def _setter(self, op, temps: Dict[str, int]) -> Optional[Callable[[Any], None]]:
+        """Closure que guarda un valor en la UBICACIÓN de un operando"""
+        vm = self
+        mem = self.mem
+        if op is None:
+            return None
+        name = str(op)
+        if _is_temp_name(name):
+            k = temps[name]
+
+            def set_temp(v):
+                vm.temps[k] = v
+            return set_temp
+        if name.startswith("FP["):
+            off = int(name[3:-1])
+
+            def set_frame(v):
+                mem[vm.fp + off] = v
+            return set_frame
+        if name.startswith("0x"):
+            addr = int(name, 16)
+
+            def set_global(v):
+                mem[addr] = v
+            return set_global
+        raise TACVMError(f"no se sabe cómo guardar en '{name}'")
+
+    def _resolve_method(self, class_name: str, member: str) -> Optional[FunctionRef]:
+        """Sube por la herencia hasta la clase que implementa el método"""
+        cls = class_name
+        seen = set()
+        while cls and cls not in seen:
+            seen.add(cls)
+            ref = self.functions.get(_func_key(f"{cls}.{member}"))
+            if ref is not None:
+                return ref
+            symbol = self.global_scope.symbols.get(cls) if self.global_scope else None
+            cls = getattr(symbol, "base_name", None)
+        # Sin tabla de símbolos: único método con ese nombre
+        matches = [f for f in self.functions.values() if f.name.endswith(f".{member}")]
+        return matches[0] if len(matches) == 1 else None
+
+    def _compile_inst(self, inst: TACInstruction, nxt: int,
+                      temps: Dict[str, int], labels: Dict[str, int]) -> Callable[[], int]:
+        vm = self
+        mem = self.mem
+        op = inst.op
+        get = lambda o: self._getter(o, temps)
+        put = lambda o: self._setter(o, temps)
+
+        def target(label) -> int:
+            pc = labels.get(str(label))
+            if pc is None:
+                raise TACVMError(f"etiqueta no definida: {label}")
+            return pc
+
+        # --- Aritméticas / relacionales / lógicas ---
+        if op == TACOp.ADD and _is_string_add(inst):
+            g1, g2, s = get(inst.arg1), get(inst.arg2), put(inst.result)
+
+            def concat():
+                s(_as_str(g1()) + _as_str(g2()))
+                return nxt
+            return concat
+
+        if op in self._ARITH:
+            fn = self._ARITH[op]
+            g1, g2, s = get(inst.arg1), get(inst.arg2), put(inst.result)
+
+            def binary():
+                s(fn(g1(), g2()))
+                return nxt
+            return binary
+
+        if op == TACOp.NEG:
+            g1, s = get(inst.arg1), put(inst.result)
+
+            def neg():
+                s(_wrap(-g1()))
+                return nxt
+            return neg
+
+        if op == TACOp.NOT:
+            g1, s = get(inst.arg1), put(inst.result)
+
+            def not_():
+                s(1 if g1() == 0 else 0)
+                return nxt
+            return not_
+
+        # --- Asignación y memoria ---
+        if op in (TACOp.ASSIGN, TACOp.DEREF):
+            g1, s = get(inst.arg1), put(inst.result)
+
+            def assign():
+                s(g1())
+                return nxt
+            return assign
+
+        if op == TACOp.ARRAY_ACCESS:
+            gb, gi, s = get(inst.arg1), get(inst.arg2), put(inst.result)
+
+            def array_access():
+                s(mem.get(gb() + 4 * gi(), 0))
+                return nxt
+            return array_access
+
+        if op == TACOp.ARRAY_ASSIGN:
+            gb, gi, gv = get(inst.result), get(inst.arg1), get(inst.arg2)
+
+            def array_assign():
+                mem[gb() + 4 * gi()] = gv()
+                return nxt
+            return array_assign
+
+        if op == TACOp.FIELD_ACCESS:
+            prop = inst.arg2
+            gb, s = get(inst.arg1), put(inst.result)
+            if prop.is_constant and isinstance(prop.value, int):
+                off = prop.value
+
+                def field_access():
+                    s(mem.get(gb() + off, 0))
+                    return nxt
+                return field_access
+            ref = self._resolve_method(str(inst.arg1.typ), str(prop.value))
+            if ref is None:
+                msg = f"no se encontró el método {inst.arg1.typ}.{prop.value}"
+
+                def unresolved():
+                    raise TACVMError(msg)
+                return unresolved
+
+            def method_address():
+                s(ref)
+                return nxt
+            return method_address
+
+        if op == TACOp.FIELD_ASSIGN:
+            prop = inst.arg1
+            if not (prop.is_constant and isinstance(prop.value, int)):
+                raise TACVMError(f"FIELD_ASSIGN a '{prop}' (no es un offset)")
+            off = prop.value
+            gb, gv = get(inst.result), get(inst.arg2)
+
+            def field_assign():
+                mem[gb() + off] = gv()
+                return nxt
+            return field_assign
+
+        # --- Control de flujo ---
+        if op == TACOp.GOTO:
+            dest = target(inst.arg1)
+            return lambda: dest
+
+        if op in (TACOp.IF_TRUE, TACOp.IF_FALSE):
+            dest = target(inst.arg2)
+            g1 = get(inst.arg1)
+            if op == TACOp.IF_TRUE:
+                return lambda: dest if g1() != 0 else nxt
+            return lambda: dest if g1() == 0 else nxt
+
+        if op in (TACOp.LABEL, TACOp.FUNC_START, TACOp.PARAM):
+            return lambda: nxt
+
+        # --- Frames y llamadas ---
+        if op == TACOp.ENTER:
+            size = inst.arg1.value
+
+            def enter():
+                sp = vm.sp - 8
+                mem[sp] = vm.fp
+                vm.fp = sp
+                vm.sp = sp - size
+                return nxt
+            return enter
+
+        if op in (TACOp.RETURN, TACOp.LEAVE, TACOp.FUNC_END):
+            g1 = get(inst.arg1) if op == TACOp.RETURN and inst.arg1 is not None else None
+
+            def ret():
+                value = g1() if g1 is not None else 0
+                if not vm.call_stack:
+                    return _HALT
+                fp = vm.fp
+                vm.sp = fp + 8
+                vm.fp = mem.get(fp, 0)
+                ret_pc, s, caller_temps = vm.call_stack.pop()
+                vm.temps = caller_temps
+                if s is not None:
+                    s(value)
+                return ret_pc
+            return ret
+
+        if op == TACOp.PUSH:
+            g1 = get(inst.arg1)
+
+            def push():
+                vm.sp -= 4
+                mem[vm.sp] = g1()
+                return nxt
+            return push
+
+        if op == TACOp.ADD_SP:
+            n = inst.arg1.value
+
+            def add_sp():
+                vm.sp += n
+                return nxt
+            return add_sp
+
+        if op == TACOp.POP:
+            s = put(inst.result)
+
+            def pop():
+                s(mem.get(vm.sp, 0))
+                vm.sp += 4
+                return nxt
+            return pop
+
+        if op == TACOp.CALL:
+            callee = inst.arg1
+            name = str(callee)
+            s = put(inst.result)
+
+            if "toString" in name:
+                # Igual que el generador: se intercepta hacia _int_to_string
+                def to_string():
+                    v = mem.get(vm.sp, 0)
+                    if s is not None:
+                        s(str(v))
+                    return nxt
+                return to_string
+
+            def invoke(ref: FunctionRef) -> int:
+                vm.call_stack.append((nxt, s, vm.temps))
+                if len(vm.call_stack) > vm.max_depth:
+                    vm.max_depth = len(vm.call_stack)
+                vm.temps = [0] * ref.n_temps
+                return ref.entry
+
+            if callee.is_temp:
+                g1 = get(callee)
+
+                def call_indirect():
+                    ref = g1()
+                    if not isinstance(ref, FunctionRef):
+                        raise TACVMError(f"llamada indirecta a un valor que no es función: {ref!r}")
+                    return invoke(ref)
+                return call_indirect
+
+            ref = self.functions.get(_func_key(name))
+            if ref is None:
+                raise TACVMError(f"función no definida: {name}")
+            return lambda: invoke(ref)
+
+        # --- Helpers (PRINT, NEW) ---
+        if op == TACOp.PRINT:
+            g1 = get(inst.arg1)
+            typ = inst.arg1.typ
+            out = self.output
+            if typ == "string":
+                return lambda: (out.append(_as_str(g1()) + "\n"), nxt)[1]
+            if typ == "boolean":
+                return lambda: (out.append("true\n" if g1() != 0 else "false\n"), nxt)[1]
+            return lambda: (out.append(f"{g1()}\n"), nxt)[1]
+
+        if op == TACOp.NEW:
+            arg = inst.arg1
+            s = put(inst.result)
+            if arg.is_constant and isinstance(arg.value, int):
+                size = arg.value * 4
+
+                def new():
+                    addr = vm.heap
+                    vm.heap += size
+                    s(addr)
+                    return nxt
+                return new
+
+            # Objeto: mismo layout que el MIPSGenerator (cabecera con el id de clase)
+            symbols = self.global_scope.symbols if self.global_scope else {}
+            csym = symbols.get(str(arg.value))
+            size = csym.object_size if isinstance(csym, ClassSymbol) else OBJECT_HEADER_SIZE
+            class_id = class_ids(symbols).get(str(arg.value), 0)
+
+            def new_object():
+                addr = vm.heap
+                vm.heap += size
+                mem[addr] = class_id
+                s(addr + OBJECT_HEADER_SIZE)
+                return nxt
+            return new_object
+
+        raise TACVMError(f"instrucción no soportada: {inst}")
+
+    # --- Ejecución ---
+
+    def run(self) -> TACRunResult:
+        code = self.code
+        counts = [0] * len(code)
+        max_steps = self.max_steps
+        pc = self.entry
+        steps = 0
+        error = None
+        try:
+            while pc != _HALT:
+                counts[pc] += 1
+                steps += 1
+                if steps > max_steps:
+                    raise TACVMError(f"límite de pasos excedido ({max_steps})")
+                pc = code[pc]()
+        except TACVMError as e:
+            error = f"{e} (en '{self.program.instructions[self.origin[pc]]}')"
+        except (TypeError, ValueError) as e:
+            error = f"operación inválida: {e} (en '{self.program.instructions[self.origin[pc]]}')"
+
+        by_op: Dict[str, int] = {}
+        per_inst = [0] * len(self.program.instructions)
+        for pc_i, n in enumerate(counts):
+            i = self.origin[pc_i]
+            if n and i >= 0:
+                per_inst[i] += n
+                name = self.program.instructions[i].op.value
+                by_op[name] = by_op.get(name, 0) + n
+
+        return TACRunResult(
+            output="".join(self.output),
+            steps=sum(per_inst),
+            counts=by_op,
+            instruction_counts=per_inst,
+            heap_bytes=self.heap - HEAP_BASE,
+            max_call_depth=self.max_depth,
+            error=error,
+        )
+
+
+def run_tac(program: TACProgram, global_scope=None,
+            max_steps: int = DEFAULT_MAX_STEPS) -> TACRunResult:
+    """Compila y ejecuta un TACProgram"""
+    return TACVM(program, global_scope, max_steps).run()
+
+
+def format_stats(result: TACRunResult) -> str:
+    """Tabla de conteos dinámicos por operación TAC"""
+    lines = [f"Instrucciones TAC ejecutadas: {result.steps}",
+             f"  heap: {result.heap_bytes} bytes   profundidad máx. de llamadas: {result.max_call_depth}",
+             "Conteo dinámico por operación:"]
+    for name, n in sorted(result.counts.items(), key=lambda kv: (-kv[1], kv[0])):
+        pct = 100.0 * n / result.steps if result.steps else 0.0
+        lines.append(f"  {name:<13} {n:>12}  {pct:5.1f}%")
+    return "\n".join(lines)
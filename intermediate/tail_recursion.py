@@ -0,0 +1,143 @@
+"""
+Recursión de cola a loop
+
+Dentro de una función 'f', una llamada a sí misma cuyo resultado se retorna
+directamente
+
+    push aN ... push a1
+    t = call f, N
+    SP = SP + 4N
+    return t            (o 'leave' si f no retorna nada)
+
+se reemplaza por la asignación de los argumentos a los slots de parámetros
+y un salto a una etiqueta nueva justo después del 'enter':
+
+    tA1 = a1 ...        (solo si el argumento lee un slot del frame)
+    FP[8] = a1 ... FP[4+4N] = aN
+    goto Lf
+
+Así la recursión corre en el mismo frame (profundidad de stack constante) y
+no paga prólogo/epílogo por iteración. Los argumentos que leen el frame se
+copian antes a temporales para que la asignación sea "en paralelo".
+"""
+import re
+from typing import Dict, List, Optional, Sequence
+
+from .tac import TACInstruction, TACOp, TACOperand, TACProgram
+
+_TEMP_RE = re.compile(r"t(\d+)$")
+
+
+def _max_temp(instructions: Sequence[TACInstruction]) -> int:
+    top = 0
+    for inst in instructions:
+        for op in (inst.result, inst.arg1, inst.arg2):
+            if op is None or getattr(op, "is_constant", False):
+                continue
+            m = _TEMP_RE.match(str(op))
+            if m:
+                top = max(top, int(m.group(1)))
+    return top
+
+
+def _tail_call(body: Sequence[TACInstruction], i: int, name: str) -> Optional[int]:
+    """Cantidad de argumentos si body[i] es una auto-llamada en posición de cola"""
+    call = body[i]
+    if call.op != TACOp.CALL or call.arg1 is None or getattr(call.arg1, "is_temp", False):
+        return None
+    if str(call.arg1) != name:
+        return None
+    count = call.arg2
+    if not (getattr(count, "is_constant", False) and isinstance(count.value, int)):
+        return None
+    n = count.value
+    if i < n or any(body[k].op != TACOp.PUSH for k in range(i - n, i)):
+        return None
+    j = i + 1
+    if n:
+        if j >= len(body) or body[j].op != TACOp.ADD_SP or \
+                getattr(body[j].arg1, "value", None) != 4 * n:
+            return None
+        j += 1
+    if j >= len(body):
+        return None
+    after = body[j]
+    if after.op == TACOp.LEAVE:
+        return n
+    if after.op == TACOp.RETURN and (after.arg1 is None or
+                                     (call.result is not None and str(after.arg1) == str(call.result))):
+        return n
+    return None
+
+
+class TailRecursion:
+    """Convierte auto-llamadas en posición de cola en saltos"""
+
+    def __init__(self, program: TACProgram):
+        self.program = program
+        self.stats: Dict[str, int] = {}      # función -> llamadas convertidas
+        self._next_temp = 0
+
+    def run(self, instructions: List[TACInstruction]) -> List[TACInstruction]:
+        self._next_temp = _max_temp(instructions) + 1
+        result: List[TACInstruction] = []
+        i = 0
+        while i < len(instructions):
+            inst = instructions[i]
+            if inst.op != TACOp.FUNC_START:
+                result.append(inst)
+                i += 1
+                continue
+            end = i
+            while end < len(instructions) and instructions[end].op != TACOp.FUNC_END:
+                end += 1
+            body = instructions[i:end + 1]
+            result.extend(self._function(str(inst.arg1), body))
+            i = end + 1
+        return result
+
+    def _function(self, name: str, body: List[TACInstruction]) -> List[TACInstruction]:
+        if "toString" in name:
+            return body
+        enter = next((k for k, inst in enumerate(body) if inst.op == TACOp.ENTER), None)
+        if enter is None or any(inst.op == TACOp.FUNC_START for inst in body[1:]):
+            return body
+        sites = [k for k in range(enter + 1, len(body)) if _tail_call(body, k, name) is not None]
+        if not sites:
+            return body
+
+        entry = self.program.new_label()
+        out: List[TACInstruction] = list(body[:enter + 1])
+        out.append(TACInstruction(TACOp.LABEL, arg1=entry))
+        k = enter + 1
+        while k < len(body):
+            n = _tail_call(body, k, name) if k in sites else None
+            if n is None:
+                out.append(body[k])
+                k += 1
+                continue
+            # El último push es el primer argumento
+            args = [p.arg1 for p in reversed(out[len(out) - n:])]
+            del out[len(out) - n:]
+            out.extend(self._rebind(args))
+            out.append(TACInstruction(TACOp.GOTO, arg1=entry))
+            k += (2 if n else 1) + 1          # call, SP = SP + 4N, return/leave
+            self.stats[name] = self.stats.get(name, 0) + 1
+        return out
+
+    def _rebind(self, args: List) -> List[TACInstruction]:
+        """Asignación en paralelo de los argumentos a FP[8], FP[12], ..."""
+        code: List[TACInstruction] = []
+        values = []
+        for arg in args:
+            if not getattr(arg, "is_constant", False) and not getattr(arg, "is_temp", False) \
+                    and not _TEMP_RE.match(str(arg)):
+                copy = TACOperand(self._next_temp, is_temp=True, typ=getattr(arg, "typ", None))
+                self._next_temp += 1
+                code.append(TACInstruction(TACOp.ASSIGN, copy, arg))
+                arg = copy
+            values.append(arg)
+        for k, value in enumerate(values):
+            slot = TACOperand(f"FP[{8 + 4 * k}]", typ=getattr(value, "typ", None))
+            code.append(TACInstruction(TACOp.ASSIGN, slot, value))
+        return code
@@ -0,0 +1,247 @@
+"""
+Desenrollado de loops con cantidad de iteraciones constante
+
+Se reconocen los loops que visitForStatement/visitWhileStatement dejan con
+esta forma (después de propagar constantes):
+
+    i = c0                      (en el preheader)
+    Lh: t = i < N               (cualquier relacional entre i y una constante)
+        ifFalse t goto Lexit    (o 'if t goto Lexit')
+        ...cuerpo...
+    Lc: ...; i = i + c          (único incremento, ejecutado en toda vuelta)
+        goto Lh
+    Lexit:
+
+Con c0, N y c constantes la cantidad de iteraciones T se calcula simulando
+el contador con la semántica de 32 bits de la VM. Si T * tamaño del cuerpo
+entra en el umbral el loop se desenrolla completo: T copias seguidas del
+cuerpo sin comparación ni salto de vuelta. Si no, se desenrolla por un
+factor F: T % F copias antes del loop y F copias dentro, así la condición se
+evalúa una vez cada F vueltas.
+
+Cada copia tiene sus propias etiquetas: el 'continue' de un for (salto a
+Lc) queda dentro de su copia, un salto a Lh pasa a la copia siguiente y el
+'break' (salto a Lexit) no cambia. La comparación se mantiene en cada copia
+(su temporal podría leerse) y la borra DCE.
+"""
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .tac import TACInstruction, TACOp, TACOperand
+from .cfg import FunctionCFG, dominates, jump_target
+from .loops import Loop, LoopForest, find_loops
+from .ssa import var_name
+from .induction import basic_ivs, loop_defs
+
+DEFAULT_UNROLL_FACTOR = 4
+DEFAULT_UNROLL_THRESHOLD = 64    # instrucciones del cuerpo desenrollado
+MAX_TRIP_COUNT = 4096
+
+_RELATIONAL = {
+    TACOp.LT: lambda a, b: a < b,
+    TACOp.LE: lambda a, b: a <= b,
+    TACOp.GT: lambda a, b: a > b,
+    TACOp.GE: lambda a, b: a >= b,
+    TACOp.EQ: lambda a, b: a == b,
+    TACOp.NE: lambda a, b: a != b,
+}
+# i REL N <=> N SWAP[REL] i
+_SWAPPED = {TACOp.LT: TACOp.GT, TACOp.LE: TACOp.GE, TACOp.GT: TACOp.LT,
+            TACOp.GE: TACOp.LE, TACOp.EQ: TACOp.EQ, TACOp.NE: TACOp.NE}
+
+NewLabel = Callable[[], TACOperand]
+
+
+@dataclass
+class Unrolling:
+    """Cambios sobre una región: el loop entero se reemplaza desde su primera instrucción"""
+    replace: Dict[int, List[TACInstruction]] = field(default_factory=dict)
+    remove: Set[int] = field(default_factory=set)
+    full: int = 0
+    partial: int = 0
+
+
+def _wrap(v: int) -> int:
+    return ((v + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+
+
+def _int_const(op) -> Optional[int]:
+    if getattr(op, "is_constant", False) and isinstance(op.value, int) and not isinstance(op.value, bool):
+        return op.value
+    return None
+
+
+def _trip_count(cfg: FunctionCFG, forest: LoopForest, loop: Loop) -> Optional[int]:
+    """Cantidad de veces que se ejecuta el cuerpo, o None si no es constante"""
+    blocks = cfg.blocks
+    header = blocks[loop.header].instructions
+    code = [inst for inst in header if inst.op != TACOp.LABEL]
+    if len(code) != 2 or code[0].op not in _RELATIONAL or code[1].op not in (TACOp.IF_TRUE, TACOp.IF_FALSE):
+        return None
+    cmp, branch = code
+    if str(branch.arg1) != str(cmp.result) or var_name(cmp.result) is None:
+        return None
+    if cfg.label_to_block.get(jump_target(branch)) in loop.blocks:
+        return None
+
+    rel, var, bound = cmp.op, var_name(cmp.arg1), _int_const(cmp.arg2)
+    if var is None or bound is None:
+        rel, var, bound = _SWAPPED[cmp.op], var_name(cmp.arg2), _int_const(cmp.arg1)
+    if var is None or bound is None:
+        return None
+
+    # Un solo incremento, en un bloque que se ejecuta en toda vuelta
+    if len(loop.latches) != 1:
+        return None
+    increments = basic_ivs(cfg, loop, loop_defs(cfg, loop)).get(var)
+    if not increments or len(increments) != 1:
+        return None
+    (inc_id, step), = increments.items()
+    inc_block = next(b for b in loop.blocks if any(id(i) == inc_id for i in blocks[b].instructions))
+    if step == 0 or not dominates(forest.idom, inc_block, loop.latches[0]):
+        return None
+
+    # Valor inicial: última asignación constante en el preheader
+    start = None
+    for inst in reversed(blocks[loop.header - 1].instructions):
+        if var_name(inst.result) == var and inst.op not in (TACOp.ARRAY_ASSIGN, TACOp.FIELD_ASSIGN):
+            start = _int_const(inst.arg1) if inst.op == TACOp.ASSIGN else None
+            break
+    if start is None:
+        return None
+
+    continues = _RELATIONAL[rel]
+    if branch.op == TACOp.IF_TRUE:          # if t goto Lexit: sigue mientras sea falso
+        continues = lambda a, b, f=continues: not f(a, b)
+    trips, value = 0, start
+    while continues(value, bound):
+        trips += 1
+        value = _wrap(value + step)
+        if trips > MAX_TRIP_COUNT:
+            return None
+    return trips
+
+
+class _Copier:
+    """Copias del cuerpo con etiquetas nuevas"""
+
+    def __init__(self, body: List[TACInstruction], header_labels: Set[str], new_label: NewLabel):
+        self.body = body
+        self.header_labels = header_labels
+        self.local_labels = {str(inst.arg1) for inst in body if inst.op == TACOp.LABEL}
+        self.new_label = new_label
+
+    def copy(self, next_label: Optional[TACOperand]) -> List[TACInstruction]:
+        """Una vuelta; los saltos a la cabecera van a next_label (None: quedan igual)"""
+        labels: Dict[str, TACOperand] = {}
+
+        def remap(op):
+            name = str(op)
+            if name in self.local_labels:
+                if name not in labels:
+                    labels[name] = self.new_label()
+                return labels[name]
+            if name in self.header_labels and next_label is not None:
+                return next_label
+            return op
+
+        out: List[TACInstruction] = []
+        for inst in self.body:
+            if inst.op in (TACOp.LABEL, TACOp.GOTO):
+                out.append(TACInstruction(inst.op, inst.result, remap(inst.arg1), inst.arg2))
+            elif inst.op in (TACOp.IF_TRUE, TACOp.IF_FALSE):
+                out.append(TACInstruction(inst.op, inst.result, inst.arg1, remap(inst.arg2)))
+            else:
+                out.append(TACInstruction(inst.op, inst.result, inst.arg1, inst.arg2))
+        # Etiquetas a las que no salta nadie en esta copia (el 'continue' sin usar)
+        targets = {jump_target(inst) for inst in out}
+        return [inst for inst in out if inst.op != TACOp.LABEL or str(inst.arg1) in targets]
+
+
+def _straight(copier: _Copier, cmp: TACInstruction, trips: int) -> List[TACInstruction]:
+    """'trips' vueltas seguidas: comparación + cuerpo, sin saltar a la cabecera"""
+    out: List[TACInstruction] = []
+    for _ in range(trips):
+        out.append(TACInstruction(cmp.op, cmp.result, cmp.arg1, cmp.arg2))
+        nxt = copier.new_label()
+        body = copier.copy(nxt)
+        if body and body[-1].op == TACOp.GOTO and body[-1].arg1 is nxt:
+            body.pop()                        # el salto de vuelta cae en la copia siguiente
+        if any(jump_target(inst) == str(nxt) for inst in body):
+            body.append(TACInstruction(TACOp.LABEL, arg1=nxt))
+        out.extend(body)
+    return out
+
+
+def _unroll_loop(cfg: FunctionCFG, loop: Loop, trips: int, factor: int, threshold: int,
+                 new_label: NewLabel) -> Optional[Tuple[List[TACInstruction], bool]]:
+    blocks = cfg.blocks
+    header = blocks[loop.header].instructions
+    body = [inst for b in range(loop.header + 1, loop.latches[0] + 1) for inst in blocks[b].instructions]
+    header_labels = {str(inst.arg1) for inst in header if inst.op == TACOp.LABEL}
+    size = sum(1 for inst in body if inst.op not in (TACOp.LABEL, TACOp.GOTO)) + 1
+    cmp, branch = [inst for inst in header if inst.op != TACOp.LABEL]
+    copier = _Copier(body, header_labels, new_label)
+    exit_label = branch.arg2
+
+    if trips * size <= threshold:
+        out = _straight(copier, cmp, trips)
+        out.append(TACInstruction(cmp.op, cmp.result, cmp.arg1, cmp.arg2))
+        out.append(TACInstruction(TACOp.GOTO, arg1=exit_label))
+        return out, True
+
+    if factor < 2 or factor * size > threshold or trips < factor:
+        return None
+    out = _straight(copier, cmp, trips % factor)
+    out.extend(TACInstruction(i.op, i.result, i.arg1, i.arg2) for i in header)
+    for k in range(factor):
+        last = k == factor - 1
+        nxt = None if last else new_label()
+        copy = copier.copy(nxt)
+        if not last:
+            if copy and copy[-1].op == TACOp.GOTO and copy[-1].arg1 is nxt:
+                copy.pop()
+            if any(jump_target(inst) == str(nxt) for inst in copy):
+                copy.append(TACInstruction(TACOp.LABEL, arg1=nxt))
+        out.extend(copy)
+    return out, False
+
+
+def unroll_loops(cfg: FunctionCFG, new_label: NewLabel,
+                 factor: int = DEFAULT_UNROLL_FACTOR,
+                 threshold: int = DEFAULT_UNROLL_THRESHOLD) -> Unrolling:
+    """Desenrolla los loops más internos de una región con iteraciones constantes"""
+    result = Unrolling()
+    if threshold <= 0:
+        return result
+    forest = find_loops(cfg)
+    inner = {id(l.parent) for l in forest.loops if l.parent is not None}
+    for loop in forest.loops:
+        if id(loop) in inner or forest.preheader_pred(loop) is None:
+            continue
+        latch = max(loop.blocks)
+        span = set(range(loop.header, latch + 1))
+        if loop.latches != [latch] or not loop.blocks <= span:
+            continue
+        # Los bloques del medio que no son del loop ('goto Lexit' de un break) se copian igual
+        if any(p not in span for b in span - loop.blocks for p in cfg.blocks[b].preds):
+            continue
+        term = cfg.blocks[latch].terminator
+        if term is None or term.op != TACOp.GOTO or \
+                cfg.label_to_block.get(jump_target(term)) != loop.header:
+            continue
+        trips = _trip_count(cfg, forest, loop)
+        if trips is None:
+            continue
+        unrolled = _unroll_loop(cfg, loop, trips, factor, threshold, new_label)
+        if unrolled is None:
+            continue
+        code, full = unrolled
+        old = [inst for b in range(loop.header, latch + 1) for inst in cfg.blocks[b].instructions]
+        result.replace[id(old[0])] = code
+        result.remove.update(id(inst) for inst in old[1:])
+        if full:
+            result.full += 1
+        else:
+            result.partial += 1
+    return result
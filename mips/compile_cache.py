@@ -0,0 +1,144 @@
+"""
+Caché de compilación en disco por hash de contenido (estilo ccache)
+Uso: cache = CompileCache(); key = cache.make_key(source, flags)
+
+La clave combina:
+  - el hash del código fuente .cps
+  - los flags que cambian la salida (p.ej. --no-optimize)
+  - el hash del propio compilador (gramática + módulos de cada fase)
+Cada entrada guarda el .s y el TAC (optimizado) en un JSON. Al leer una
+entrada se le actualiza el mtime, y al superar el tamaño máximo se
+eliminan las de mtime más viejo (LRU).
+"""
+import os
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Directorios cuyo código determina la salida del compilador
+_COMPILER_DIRS = ("program", "semantic", "intermediate", "mips")
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Contadores globales del proceso
+_CACHE_STATS: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+_COMPILER_HASH: Optional[str] = None
+
+
+def default_cache_dir() -> Path:
+    """Directorio de caché (configurable con COMPISCRIPT_CACHE_DIR)"""
+    env = os.environ.get("COMPISCRIPT_CACHE_DIR")
+    if env:
+        return Path(env)
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg) if xdg else Path.home() / ".cache"
+    return base / "compiscript"
+
+
+def compiler_hash() -> str:
+    """Hash de la gramática y de todos los .py del compilador (se calcula una vez)"""
+    global _COMPILER_HASH
+    if _COMPILER_HASH is None:
+        h = hashlib.sha256()
+        files = [ROOT / "program" / "Compiscript.g4"]
+        for d in _COMPILER_DIRS:
+            files.extend(sorted((ROOT / d).rglob("*.py")))
+        for f in files:
+            if not f.is_file():
+                continue
+            h.update(str(f.relative_to(ROOT)).encode("utf-8"))
+            h.update(b"\0")
+            h.update(f.read_bytes())
+            h.update(b"\0")
+        _COMPILER_HASH = h.hexdigest()
+    return _COMPILER_HASH
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Retorna los contadores de hits/misses de este proceso"""
+    total = _CACHE_STATS["hits"] + _CACHE_STATS["misses"]
+    stats: Dict[str, Any] = dict(_CACHE_STATS)
+    stats["hit_rate"] = (_CACHE_STATS["hits"] / total) if total else 0.0
+    return stats
+
+
+def reset_cache_stats():
+    """Reinicia los contadores de la caché"""
+    for k in _CACHE_STATS:
+        _CACHE_STATS[k] = 0
+
+
+class CompileCache:
+    """Caché de resultados de compilación con evicción LRU por tamaño"""
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def make_key(self, source: str, flags: Dict[str, Any]) -> str:
+        """Clave = sha256(fuente, flags, compilador)"""
+        h = hashlib.sha256()
+        h.update(hashlib.sha256(source.encode("utf-8")).digest())
+        h.update(json.dumps(flags, sort_keys=True).encode("utf-8"))
+        h.update(compiler_hash().encode("utf-8"))
+        return h.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        """Retorna la entrada {'asm', 'tac'} o None; un hit refresca su mtime"""
+        path = self._entry_path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path, None)
+        except (OSError, ValueError):
+            _CACHE_STATS["misses"] += 1
+            return None
+        _CACHE_STATS["hits"] += 1
+        return entry
+
+    def put(self, key: str, entry: Dict[str, str]):
+        """Guarda la entrada (escritura atómica) y aplica la evicción LRU"""
+        path = self._entry_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # tmp + replace: varios workers del batch pueden escribir a la vez
+            fd, tmp = tempfile.mkstemp(dir=str(path.parent), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp, path)
+        except OSError:
+            return  # la caché nunca debe romper la compilación
+        _CACHE_STATS["stores"] += 1
+        self.evict()
+
+    def evict(self):
+        """Elimina las entradas menos recientemente usadas hasta caber en max_bytes"""
+        entries = []
+        total = 0
+        for f in self.cache_dir.glob("*/*.json"):
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, f))
+            total += st.st_size
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, f in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                f.unlink()
+            except OSError:
+                continue
+            total -= size
+            _CACHE_STATS["evictions"] += 1
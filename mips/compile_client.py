@@ -0,0 +1,93 @@
+"""
+Cliente liviano del servidor de compilación persistente
+Uso: python -m mips.compile_client [--socket=PATH] archivo.cps [opciones de mips_driver]
+
+Reenvía los argumentos (estilo mips_driver) al servidor, escribe los
+archivos que éste devuelve y reproduce su stdout/stderr y código de salida.
+Este módulo NO importa ANTLR ni el pipeline: solo si el servidor no está
+disponible se compila localmente (en frío) como fallback.
+"""
+import sys
+import os
+import json
+import socket
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+def default_socket_path() -> str:
+    """Ruta del Unix socket (configurable con COMPISCRIPT_SOCKET)"""
+    env = os.environ.get("COMPISCRIPT_SOCKET")
+    if env:
+        return env
+    return f"/tmp/compiscript-{os.getuid()}.sock"
+
+
+def send_request(request: Dict[str, Any], socket_path: Optional[str] = None,
+                 timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Envía una petición JSON (una línea) y retorna la respuesta decodificada"""
+    path = socket_path or default_socket_path()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        chunks = []
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                break
+            chunks.append(data)
+            if data.endswith(b"\n"):
+                break
+    return json.loads(b"".join(chunks).decode("utf-8"))
+
+
+def _apply_response(response: Dict[str, Any]) -> int:
+    """Escribe los archivos devueltos y reproduce la salida del servidor"""
+    for path, text in (response.get("outputs") or {}).items():
+        if path == "-":
+            sys.stdout.write(text + "\n")     # '-o -': el .s va limpio a stdout
+        else:
+            Path(path).write_text(text, encoding="utf-8")
+    if response.get("stdout"):
+        sys.stdout.write(response["stdout"])
+    if response.get("stderr"):
+        sys.stderr.write(response["stderr"])
+    return int(response.get("exit_code", 1))
+
+
+def main(argv: Optional[List[str]] = None):
+    """Función principal del cliente"""
+    argv = list(sys.argv[1:] if argv is None else argv)
+
+    # Opciones propias del cliente (se consumen antes de reenviar)
+    socket_path = None
+    fallback = True
+    forwarded: List[str] = []
+    for a in argv:
+        if a.startswith("--socket="):
+            socket_path = a.split("=", 1)[1]
+        elif a == "--no-fallback":
+            fallback = False
+        else:
+            forwarded.append(a)
+
+    request = {"argv": forwarded, "cwd": os.getcwd()}
+    try:
+        response = send_request(request, socket_path)
+    except (FileNotFoundError, ConnectionRefusedError, socket.timeout) as e:
+        if not fallback:
+            print(f"Error: servidor de compilación no disponible ({e})", file=sys.stderr)
+            sys.exit(1)
+        # Fallback: compilar en este proceso (paga el arranque en frío)
+        ROOT = Path(__file__).resolve().parents[1]
+        if str(ROOT) not in sys.path:
+            sys.path.insert(0, str(ROOT))
+        from mips.mips_driver import run
+        sys.exit(run(forwarded))
+
+    sys.exit(_apply_response(response))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Servidor de compilación persistente ("warm daemon")
+Uso:
+    python -m mips.compile_server [--socket PATH]   # escucha en un Unix socket
+    python -m mips.compile_server --stdio           # peticiones por stdin/stdout
+
+Mantiene cargados el runtime de ANTLR, el lexer/parser generados (con el ATN
+ya deserializado y la caché de DFA caliente) y los módulos semántico, TAC,
+optimizador y MIPS. Cada petición ejecuta mips_driver.run() en este proceso,
+así que solo se paga el costo de la compilación en sí.
+
+Protocolo: una línea JSON por petición y una por respuesta.
+    {"argv": [...], "cwd": "/ruta"}   -> compila como mips_driver
+    {"cmd": "ping"} | {"cmd": "stats"} | {"cmd": "shutdown"}
+La respuesta de compilación incluye exit_code, stdout, stderr y 'outputs'
+({ruta: contenido}) con los archivos generados (.s, TAC optimizado), que
+escribe el cliente. Con '-o -' el ensamblador viene en outputs['-'] y todo
+el texto de progreso/debug del compilador en stderr.
+"""
+import sys
+import os
+import io
+import json
+import time
+import tempfile
+import argparse
+import threading
+import socketserver
+from contextlib import redirect_stdout, redirect_stderr
+from pathlib import Path
+from typing import Any, Dict
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# Importar TODO el pipeline una sola vez (esto es lo que queda "caliente")
+from program.parsing import get_parse_stats
+from mips.compile_cache import get_cache_stats
+from mips import mips_driver
+from mips.compile_client import default_socket_path
+
+# Programa pequeño para calentar las DFA del parser (SLL y fallback LL)
+WARMUP_SOURCE = mips_driver.WARMUP_SOURCE
+
+
+class CompileService:
+    """Atiende peticiones de compilación dentro del proceso caliente"""
+
+    def __init__(self):
+        self.requests = 0
+        self.failures = 0
+        self.compile_time = 0.0
+        self.started = time.time()
+        self._lock = threading.Lock()  # os.chdir y stdout son globales
+
+    def warmup(self):
+        """Compila un programa de ejemplo para calentar las DFA del parser"""
+        with tempfile.TemporaryDirectory() as tmp:
+            src = Path(tmp) / "warmup.cps"
+            src.write_text(WARMUP_SOURCE, encoding="utf-8")
+            self._run([str(src), "-o", str(Path(tmp) / "warmup.s"), "--no-cache"], tmp)
+
+    def _run(self, argv, cwd) -> Dict[str, Any]:
+        out, err = io.StringIO(), io.StringIO()
+        outputs: Dict[str, str] = {}
+        with self._lock:
+            prev_cwd = os.getcwd()
+            t0 = time.perf_counter()
+            try:
+                os.chdir(cwd)
+                with redirect_stdout(out), redirect_stderr(err):
+                    try:
+                        code = mips_driver.run(argv, outputs=outputs)
+                    except SystemExit as e:
+                        # argparse termina con SystemExit ante argumentos inválidos
+                        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 2)
+            finally:
+                os.chdir(prev_cwd)
+            elapsed = time.perf_counter() - t0
+        return {
+            "exit_code": code,
+            "stdout": out.getvalue(),
+            "stderr": err.getvalue(),
+            "outputs": outputs,
+            "elapsed": elapsed,
+        }
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Procesa una petición ya decodificada y retorna la respuesta"""
+        cmd = request.get("cmd", "compile")
+        if cmd == "ping":
+            return {"ok": True, "pid": os.getpid()}
+        if cmd == "stats":
+            return {
+                "ok": True,
+                "pid": os.getpid(),
+                "uptime": time.time() - self.started,
+                "requests": self.requests,
+                "failures": self.failures,
+                "compile_time": self.compile_time,
+                "parse": get_parse_stats(),
+                "cache": get_cache_stats(),
+            }
+        if cmd == "shutdown":
+            return {"ok": True, "shutdown": True}
+        if cmd != "compile":
+            return {"ok": False, "exit_code": 2, "stderr": f"Comando desconocido: {cmd}\n"}
+
+        argv = [str(a) for a in request.get("argv", [])]
+        response = self._run(argv, request.get("cwd") or os.getcwd())
+        self.requests += 1
+        self.compile_time += response["elapsed"]
+        if response["exit_code"] != 0:
+            self.failures += 1
+        response["ok"] = response["exit_code"] == 0
+        return response
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Una conexión puede enviar varias peticiones (una por línea)"""
+
+    def handle(self):
+        for raw in self.rfile:
+            line = raw.decode("utf-8").strip()
+            if not line:
+                continue
+            try:
+                response = self.server.service.handle(json.loads(line))
+            except Exception as e:
+                response = {"ok": False, "exit_code": 1, "stderr": f"Error del servidor: {e}\n"}
+            self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+            self.wfile.flush()
+            if response.get("shutdown"):
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+
+class _UnixServer(socketserver.UnixStreamServer):
+    def __init__(self, path: str, service: CompileService):
+        self.service = service
+        super().__init__(path, _Handler)
+
+
+def serve_unix(socket_path: str, service: CompileService, verbose: bool = False):
+    """Atiende peticiones en un Unix socket hasta recibir 'shutdown'"""
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)  # socket viejo de una ejecución anterior
+    server = _UnixServer(socket_path, service)
+    if verbose:
+        print(f"✓ Servidor de compilación escuchando en {socket_path} (pid {os.getpid()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def serve_stdio(service: CompileService):
+    """Atiende peticiones JSON por stdin y responde por stdout"""
+    real_stdout = sys.stdout
+    for raw in sys.stdin:
+        line = raw.strip()
+        if not line:
+            continue
+        try:
+            response = service.handle(json.loads(line))
+        except Exception as e:
+            response = {"ok": False, "exit_code": 1, "stderr": f"Error del servidor: {e}\n"}
+        real_stdout.write(json.dumps(response) + "\n")
+        real_stdout.flush()
+        if response.get("shutdown"):
+            break
+
+
+def main():
+    """Función principal del servidor"""
+    parser = argparse.ArgumentParser(
+        description='Servidor de compilación persistente para Compiscript'
+    )
+    parser.add_argument(
+        '--socket',
+        help='Ruta del Unix socket (default: $COMPISCRIPT_SOCKET o /tmp/compiscript-<uid>.sock)',
+        default=None
+    )
+    parser.add_argument(
+        '--stdio',
+        action='store_true',
+        help='Atender peticiones JSON por stdin/stdout en lugar de un socket'
+    )
+    parser.add_argument(
+        '--no-warmup',
+        action='store_true',
+        help='No compilar el programa de calentamiento al iniciar'
+    )
+    parser.add_argument(
+        '-v', '--verbose',
+        action='store_true',
+        help='Mostrar información del servidor'
+    )
+    args = parser.parse_args()
+
+    service = CompileService()
+    if not args.no_warmup:
+        service.warmup()
+
+    if args.stdio:
+        serve_stdio(service)
+    else:
+        serve_unix(args.socket or default_socket_path(), service, args.verbose)
+
+
+if __name__ == "__main__":
+    main()
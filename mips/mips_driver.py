@@ -1,30 +1,50 @@
 """
 Driver CLI para generar código MIPS (Fase 3)
 Uso: python -m mips.driver archivo.cps [opciones]
+     python -m mips.driver a.cps b.cps dir/ --jobs N   (modo batch)
 """
 import sys
 import os
+import io
+import time
+import tempfile
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout, redirect_stderr
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 # Configurar path para imports
 # Esto asume que 'mips/' está en la raíz del proyecto
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 
-from antlr4 import FileStream, CommonTokenStream
+from antlr4 import InputStream
 from antlr4.error.ErrorListener import ErrorListener
 
-from program.gen.CompiscriptLexer import CompiscriptLexer
-from program.gen.CompiscriptParser import CompiscriptParser
+from program.parsing import parse_program
 from intermediate.runner import generate_intermediate_code
 # --- NUEVOS IMPORTS ---
-from intermediate.optimizer import TACOptimizer
+from intermediate.optimizer import TACOptimizer, OPT_LEVELS, DEFAULT_OPT_LEVEL
+from intermediate.tac import TACProgram
+from intermediate.inliner import DEFAULT_INLINE_THRESHOLD
+from intermediate.unroll import DEFAULT_UNROLL_FACTOR, DEFAULT_UNROLL_THRESHOLD
 # (Estos archivos los crearemos a continuación)
 from .mips_generator import MIPSGenerator
 from .runtime import get_data_preamble, get_text_preamble, get_syscall_helpers
+from .compile_cache import CompileCache, get_cache_stats
 # --- FIN NUEVOS IMPORTS ---
 
+# Programa pequeño para calentar las DFA del parser (SLL y fallback LL)
+WARMUP_SOURCE = """
+function f(n: integer): integer { if (n <= 1) { return n; } return f(n - 1) + 1; }
+class A { let x: integer; function constructor(x: integer) { this.x = x; } }
+let a: A = new A(1);
+let i: integer = 0;
+while (i < 3) { i = i + f(i); }
+print("ok " + "warm");
+"""
+
 class SyntaxErrorCollector(ErrorListener):
     """Colector de errores sintácticos (igual que en tac_driver.py)"""
     def __init__(self):
@@ -38,20 +58,24 @@ class SyntaxErrorCollector(ErrorListener):
             'message': msg
         })
 
-def main():
-    """Función principal del driver MIPS"""
+def build_arg_parser() -> argparse.ArgumentParser:
+    """Construye el parser de argumentos del driver MIPS"""
     # --- ARGPARSE MODIFICADO ---
     parser = argparse.ArgumentParser(
         description='Generador de código MIPS para Compiscript (Fase 3)'
     )
     parser.add_argument(
-        'input_file',
-        help='Archivo fuente Compiscript (.cps)'
+        'input_files',
+        nargs='+',
+        metavar='input_file',
+        help='Archivo(s) fuente Compiscript (.cps) o directorios con .cps. '
+             'Con más de uno (o un directorio) se compila en modo batch'
     )
     parser.add_argument(
         '-o', '--output',
         help='Archivo de salida para el código MIPS (.s). '
-             'Si no se especifica, se usa el nombre de entrada con extensión .s',
+             'Si no se especifica, se usa el nombre de entrada con extensión .s. '
+             'Con "-" el .s se escribe en stdout y los mensajes del compilador en stderr',
         default=None
     )
     parser.add_argument(
@@ -59,51 +83,245 @@ def main():
         action='store_true',
         help='Mostrar información detallada del proceso'
     )
+    parser.add_argument(
+        '-O',
+        dest='opt_level',
+        type=int,
+        choices=OPT_LEVELS,
+        default=None,
+        metavar='N',
+        help='Nivel de optimización: -O0 ninguna, -O1 pases locales, -O2 dataflow global '
+             '(default), -O3 + inlining, loops y asignación de registros'
+    )
     parser.add_argument(
         '--no-optimize',
         action='store_true',
-        help='Desactivar el pase de optimización de TAC'
+        help='Desactivar el pase de optimización de TAC (equivale a -O0)'
+    )
+    parser.add_argument(
+        '--regalloc',
+        action='store_true',
+        help='Asignar temporales a registros ($t3-$t9, $s0-$s7) en vez de '
+             'un slot de stack por temporal'
+    )
+    parser.add_argument(
+        '--inline-threshold',
+        type=int,
+        default=DEFAULT_INLINE_THRESHOLD,
+        metavar='N',
+        help='(-O3) Inlinear funciones de hasta N instrucciones '
+             f'(default: {DEFAULT_INLINE_THRESHOLD}; 0 desactiva el inlining)'
+    )
+    parser.add_argument(
+        '--unroll-factor',
+        type=int,
+        default=DEFAULT_UNROLL_FACTOR,
+        metavar='N',
+        help='(-O3) Copias del cuerpo por vuelta al desenrollar parcialmente un loop '
+             f'(default: {DEFAULT_UNROLL_FACTOR}; 1 desactiva el desenrollado parcial)'
+    )
+    parser.add_argument(
+        '--unroll-threshold',
+        type=int,
+        default=DEFAULT_UNROLL_THRESHOLD,
+        metavar='N',
+        help='(-O3) Máximo de instrucciones de un loop desenrollado; si todas las vueltas '
+             f'entran se desenrolla completo (default: {DEFAULT_UNROLL_THRESHOLD}; 0 lo desactiva)'
+    )
+    parser.add_argument(
+        '--time-passes',
+        action='store_true',
+        help='Mostrar ejecuciones, instrucciones eliminadas y tiempo de cada pase del optimizador'
+    )
+    parser.add_argument(
+        '--print-after',
+        action='append',
+        metavar='PASE',
+        default=[],
+        help='Imprimir el TAC después del pase dado (repetible o separado por comas; "all" = todos)'
     )
     parser.add_argument(
         '--optimized-tac-out',
         help='(Debug) Guardar el TAC optimizado en un archivo separado',
         default=None
     )
+    parser.add_argument(
+        '--cache-dir',
+        help='Directorio de la caché de compilación '
+             '(default: $COMPISCRIPT_CACHE_DIR o ~/.cache/compiscript)',
+        default=None
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='No leer ni escribir la caché de compilación'
+    )
+    parser.add_argument(
+        '--cache-stats',
+        action='store_true',
+        help='Mostrar los contadores de hits/misses de la caché'
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        help='(Batch) Número de procesos worker (default: número de CPUs)',
+        default=None
+    )
+    parser.add_argument(
+        '--out-dir',
+        help='(Batch) Directorio donde escribir los .s (default: junto a cada .cps)',
+        default=None
+    )
     # --- FIN ARGPARSE MODIFICADO ---
+    return parser
+
+
+def _write_text(path: Path, text: str, outputs: Optional[Dict[str, str]]):
+    """
+    Escribe 'text' en 'path', o lo guarda en 'outputs' si se pasó un dict
+    (modo servidor: el cliente es quien escribe los archivos).
+    """
+    if outputs is not None:
+        outputs[str(path)] = text
+    else:
+        path.write_text(text, encoding='utf-8')
+
+
+def _opt_level(args: argparse.Namespace) -> int:
+    """Nivel efectivo: --no-optimize es -O0; sin -O se usa el default"""
+    if args.no_optimize:
+        return 0
+    return DEFAULT_OPT_LEVEL if args.opt_level is None else args.opt_level
+
+
+def _cache_flags(args: argparse.Namespace) -> Dict[str, Any]:
+    """Flags que cambian la salida y por lo tanto forman parte de la clave de caché"""
+    level = _opt_level(args)
+    return {
+        'opt_level': level,
+        'regalloc': bool(args.regalloc) or level >= 3,
+        'inline_threshold': args.inline_threshold if level >= 3 else None,
+        'unroll': (args.unroll_factor, args.unroll_threshold) if level >= 3 else None,
+    }
+
+
+def _emit_outputs(args: argparse.Namespace, input_path: Path, mips_code: str,
+                  tac_text: str, outputs: Optional[Dict[str, str]], asm_stream=None):
+    """
+    Escribe el TAC (si se pidió) y el código MIPS según -o. Con '-o -' el .s
+    va a asm_stream (el stdout real), o a outputs['-'] en modo servidor.
+    """
+    #  Guardar TAC optimizado 
+    if args.optimized_tac_out:
+        opt_out_path = Path(args.optimized_tac_out)
+        _write_text(opt_out_path, tac_text, outputs)
+        if args.verbose:
+            print(f"  (Debug) TAC optimizado guardado en: {opt_out_path}")
+
+    # "-o -" escribe el ensamblador en stdout
+    if args.output == '-':
+        if outputs is not None:
+            outputs['-'] = mips_code
+        else:
+            (asm_stream or sys.stdout).write(mips_code + "\n")
+        return
+    
+    # Determinar path de salida
+    if args.output:
+        output_path = Path(args.output)
+    else:
+        output_path = input_path.with_suffix('.s')
+    
+    # Escribir salida MIPS
+    _write_text(output_path, mips_code, outputs)
+    if args.verbose:
+        print(f"\n✓ Compilación exitosa: Código MIPS escrito en: {output_path}")
+
+
+def _print_cache_stats():
+    stats = get_cache_stats()
+    print(f"[CACHE] hits={stats['hits']} misses={stats['misses']} "
+          f"stores={stats['stores']} evictions={stats['evictions']}")
+
+
+def run(argv: Optional[List[str]] = None, outputs: Optional[Dict[str, str]] = None) -> int:
+    """
+    Ejecuta el driver MIPS con 'argv' (sin el nombre del programa) y
+    retorna el código de salida. No llama a sys.exit, para poder usarse
+    desde el servidor de compilación persistente.
+    """
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
     
-    args = parser.parse_args()
+    if (len(args.input_files) > 1 or args.jobs is not None
+            or any(Path(p).is_dir() for p in args.input_files)):
+        return run_batch(args)
     
-    input_path = Path(args.input_file)
+    input_path = Path(args.input_files[0])
     if not input_path.exists():
         print(f"Error: El archivo '{input_path}' no existe", file=sys.stderr)
-        sys.exit(1)
+        return 1
     
+    if args.output == '-':
+        # El .s va a stdout: todo lo demás (verbose, debug de los pases) a stderr
+        asm_stream = sys.stdout
+        with redirect_stdout(sys.stderr):
+            return _compile_single(args, input_path, outputs, asm_stream)
+    return _compile_single(args, input_path, outputs, None)
+
+
+def _compile_single(args: argparse.Namespace, input_path: Path,
+                    outputs: Optional[Dict[str, str]], asm_stream) -> int:
+    """Compila un archivo; con '-o -' el .s se escribe en asm_stream (o en outputs['-'])"""
     if args.verbose:
         print(f"Iniciando compilación MIPS para: {input_path}")
         print(f"=" * 50)
     
     try:
+        source = input_path.read_text(encoding='utf-8')
+        
+        print_after = _print_after_names(args)
+        error = _check_print_after(print_after, args)
+        if error:
+            print(f"Error: {error}", file=sys.stderr)
+            return 1
+        
+        # --- CACHÉ: misma fuente + flags + compilador => misma salida ---
+        # (--time-passes / --print-after necesitan correr el optimizador)
+        use_cache = not (args.no_cache or args.time_passes or print_after)
+        cache = CompileCache(args.cache_dir) if use_cache else None
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.make_key(source, _cache_flags(args))
+            entry = cache.get(cache_key)
+            if entry is not None:
+                if args.verbose:
+                    print(f"✓ Caché: hit ({cache_key[:12]}), se omiten todas las fases")
+                _emit_outputs(args, input_path, entry['asm'], entry['tac'], outputs, asm_stream)
+                if args.cache_stats:
+                    _print_cache_stats()
+                return 0
+            if args.verbose:
+                print(f"  Caché: miss ({cache_key[:12]})")
+        
         # --- FASE 1: ANÁLISIS SINTÁCTICO (Igual) ---
-        input_stream = FileStream(str(input_path), encoding='utf-8')
-        lexer = CompiscriptLexer(input_stream)
-        token_stream = CommonTokenStream(lexer)
-        parser = CompiscriptParser(token_stream)
+        input_stream = InputStream(source)
         
         syntax_collector = SyntaxErrorCollector()
-        parser.removeErrorListeners()
-        parser.addErrorListener(syntax_collector)
         
-        tree = parser.program()
+        # SLL primero; LL completo solo si SLL falla
+        parsed = parse_program(input_stream, [syntax_collector])
+        tree = parsed.tree
         
         if syntax_collector.errors:
             print("Errores sintácticos encontrados:", file=sys.stderr)
             for error in syntax_collector.errors:
                 print(f"  [{error['line']}:{error['column']}] {error['message']}", 
                       file=sys.stderr)
-            sys.exit(1)
+            return 1
         
         if args.verbose:
-            print("✓ Fase 1: Análisis sintáctico completado")
+            print(f"✓ Fase 1: Análisis sintáctico completado (modo {parsed.mode})")
         
         # --- FASE 2: ANÁLISIS SEMÁNTICO Y GEN. TAC  ---
         result = generate_intermediate_code(tree)
@@ -113,65 +331,261 @@ def main():
             for error in result.errors:
                 print(f"  [{error.code}] ({error.line}:{error.col}) {error.msg}", 
                       file=sys.stderr)
-            sys.exit(1)
+            return 1
         
         if args.verbose:
             print(f"✓ Fase 2: Semántica y Gen. TAC completada ({len(result.tac_program.instructions)} inst.)")
 
         # --- FASE 2.5: OPTIMIZACIÓN DE TAC ---
         tac_program = result.tac_program
-        if not args.no_optimize:
+        opt_level = _opt_level(args)
+        if opt_level > 0:
             if args.verbose:
-                print("Iniciando Fase 2.5: Optimización de TAC...")
-            optimizer = TACOptimizer(tac_program)
+                print(f"Iniciando Fase 2.5: Optimización de TAC (-O{opt_level})...")
+            optimizer = TACOptimizer(tac_program, opt_level=opt_level, print_after=print_after,
+                                     inline_threshold=args.inline_threshold,
+                                     unroll_factor=args.unroll_factor,
+                                     unroll_threshold=args.unroll_threshold)
             optimized_tac = optimizer.optimize()
             tac_program = optimized_tac
             
             if args.verbose:
                 print(f"✓ Fase 2.5: Optimización completada ({len(tac_program.instructions)} inst. restantes)")
+            if args.time_passes:
+                print(optimizer.format_timing(), file=sys.stderr)
         else:
             if args.verbose:
                 print("Saltando Fase 2.5: Optimización de TAC")
         
-        #  Guardar TAC optimizado 
-        if args.optimized_tac_out:
-            opt_out_path = Path(args.optimized_tac_out)
-            opt_out_path.write_text(tac_program.to_string(), encoding='utf-8')
-            if args.verbose:
-                print(f"  (Debug) TAC optimizado guardado en: {opt_out_path}")
-
         # --- FASE 3: GENERACIÓN DE CÓDIGO MIPS  ---
         if args.verbose:
             print("Iniciando Fase 3: Generación de código MIPS...")
         
        
-        mips_gen = MIPSGenerator(tac_program, result.global_scope, result.scopes_by_ctx) 
+        mips_gen = MIPSGenerator(tac_program, result.global_scope, result.scopes_by_ctx,
+                                 register_allocation=args.regalloc, opt_level=opt_level)
         mips_code = mips_gen.generate()
         
         if args.verbose:
             print("✓ Fase 3: Generación MIPS completada")
+            st = mips_gen.stats
+            if mips_gen.register_allocation:
+                print(f"  Registros: {st['temps']} temporales, {st['in_t_regs']} en $t, "
+                      f"{st['in_s_regs']} en $s, {st['spills']} spills, "
+                      f"{st['saved_regs']} $s salvados")
+            if mips_gen.peephole is not None:
+                print(f"  {mips_gen.peephole.report()}")
+            print(f"  Accesos a memoria (estáticos): {st['static_lw']} lw, {st['static_sw']} sw")
 
         # --- ESCRITURA DE SALIDA (MODIFICADO) ---
+        tac_text = tac_program.to_string()
+        if cache is not None:
+            cache.put(cache_key, {'asm': mips_code, 'tac': tac_text})
         
-        # Determinar path de salida
-        if args.output:
-            output_path = Path(args.output)
-        else:
-            output_path = input_path.with_suffix('.s')
-        
-        # Escribir salida MIPS
-        output_path.write_text(mips_code, encoding='utf-8')
-        if args.verbose:
-            print(f"\n✓ Compilación exitosa: Código MIPS escrito en: {output_path}")
+        _emit_outputs(args, input_path, mips_code, tac_text, outputs, asm_stream)
+        if args.cache_stats:
+            _print_cache_stats()
         
-        sys.exit(0)
+        return 0
         
     except Exception as e:
         print(f"\nError inesperado durante la compilación: {e}", file=sys.stderr)
         if args.verbose:
             import traceback
             traceback.print_exc()
-        sys.exit(1)
+        return 1
+
+# ============ MODO BATCH ============
+
+def _print_after_names(args: argparse.Namespace) -> Set[str]:
+    """Nombres de pases de --print-after (repetible o separado por comas)"""
+    return {name.strip() for arg in args.print_after for name in arg.split(',') if name.strip()}
+
+
+def _check_print_after(print_after: Set[str], args: argparse.Namespace) -> Optional[str]:
+    """
+    Valida --print-after antes de parsear (y de consultar la caché): con
+    -O0 no corre ningún pase y los nombres tienen que existir en el
+    pipeline del nivel pedido. Retorna el mensaje de error o None.
+    """
+    if not print_after:
+        return None
+    opt_level = _opt_level(args)
+    if opt_level == 0:
+        return "--print-after no aplica con -O0 (no corre ningún pase)"
+    names = TACOptimizer(TACProgram(), opt_level=opt_level).pass_names()
+    unknown = print_after - set(names) - {'all'}
+    if unknown:
+        return (f"pase(s) desconocido(s) en --print-after: {', '.join(sorted(unknown))}. "
+                f"Disponibles: {', '.join(names)}")
+    return None
+
+
+def _collect_inputs(paths: List[str]) -> List[Tuple[Path, Path]]:
+    """
+    Expande directorios (recursivo, *.cps) y conserva el orden dado.
+    Retorna pares (ruta, ruta relativa) para reflejar la estructura en --out-dir.
+    """
+    files: List[Tuple[Path, Path]] = []
+    for p in paths:
+        path = Path(p)
+        if path.is_dir():
+            files.extend((f, f.relative_to(path)) for f in sorted(path.rglob('*.cps')))
+        else:
+            files.append((path, Path(path.name)))
+    return files
+
+
+def _compile_captured(argv: List[str]) -> Dict[str, Any]:
+    """Ejecuta run(argv) capturando stdout/stderr (los pases imprimen debug)"""
+    out, err = io.StringIO(), io.StringIO()
+    t0 = time.perf_counter()
+    with redirect_stdout(out), redirect_stderr(err):
+        try:
+            code = run(argv)
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else (0 if e.code is None else 2)
+    return {
+        'exit_code': code,
+        'stdout': out.getvalue(),
+        'stderr': err.getvalue(),
+        'elapsed': time.perf_counter() - t0,
+    }
+
+
+def _init_batch_worker():
+    """
+    Initializer de cada worker: el import del módulo ya cargó ANTLR y el
+    parser generado; compilar WARMUP_SOURCE deserializa el ATN y calienta
+    las DFA antes de recibir el primer archivo real.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / 'warmup.cps'
+        src.write_text(WARMUP_SOURCE, encoding='utf-8')
+        _compile_captured([str(src), '-o', str(Path(tmp) / 'warmup.s'), '--no-cache'])
+
+
+def _compile_batch_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Compila un archivo del batch (se ejecuta dentro de un worker)"""
+    before = get_cache_stats()
+    result = _compile_captured(job['argv'])
+    after = get_cache_stats()
+    result['cache_hit'] = after['hits'] > before['hits']
+    result['cache_miss'] = after['misses'] > before['misses']
+    try:
+        with open(job['input'], encoding='utf-8', errors='replace') as f:
+            result['lines'] = sum(1 for _ in f)
+    except OSError:
+        result['lines'] = 0
+    return result
+
+
+def run_batch(args: argparse.Namespace) -> int:
+    """
+    Compila varios archivos repartiendo el pipeline completo
+    (parse -> semántica -> TAC -> optimización -> MIPS) entre procesos.
+    Imprime un resumen por archivo y el throughput agregado.
+    """
+    if args.output or args.optimized_tac_out:
+        print("Error: -o/--optimized-tac-out no aplican en modo batch (usá --out-dir)",
+              file=sys.stderr)
+        return 1
+
+    error = _check_print_after(_print_after_names(args), args)
+    if error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 1
+
+    files = _collect_inputs(args.input_files)
+    if not files:
+        print("Error: no se encontraron archivos .cps", file=sys.stderr)
+        return 1
+
+    out_dir = Path(args.out_dir) if args.out_dir else None
+
+    # Dos entradas distintas no pueden escribir el mismo .s (la última ganaría en silencio)
+    targets: Dict[Path, Path] = {}
+    planned: List[Tuple[Path, Path]] = []
+    for path, rel in files:
+        output_path = out_dir / rel.with_suffix('.s') if out_dir else path.with_suffix('.s')
+        key = output_path.resolve()
+        if key in targets:
+            if targets[key].resolve() == path.resolve():
+                continue            # el mismo archivo pasado dos veces
+            print(f"Error: '{targets[key]}' y '{path}' se compilarían al mismo archivo "
+                  f"'{output_path}'", file=sys.stderr)
+            return 1
+        targets[key] = path
+        planned.append((path, output_path))
+
+    jobs = []
+    for path, output_path in planned:
+        if out_dir:
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+        argv = [str(path), '-o', str(output_path)]
+        argv.append(f'-O{_opt_level(args)}')
+        if args.regalloc:
+            argv.append('--regalloc')
+        if args.inline_threshold != DEFAULT_INLINE_THRESHOLD:
+            argv += ['--inline-threshold', str(args.inline_threshold)]
+        if args.unroll_factor != DEFAULT_UNROLL_FACTOR:
+            argv += ['--unroll-factor', str(args.unroll_factor)]
+        if args.unroll_threshold != DEFAULT_UNROLL_THRESHOLD:
+            argv += ['--unroll-threshold', str(args.unroll_threshold)]
+        if args.time_passes:
+            argv.append('--time-passes')
+        for name in args.print_after:
+            argv += ['--print-after', name]
+        if args.verbose:
+            argv.append('-v')
+        if args.no_cache:
+            argv.append('--no-cache')
+        if args.cache_dir:
+            argv += ['--cache-dir', args.cache_dir]
+        jobs.append({'input': str(path), 'output': str(output_path), 'argv': argv})
+
+    workers = max(1, min(args.jobs or os.cpu_count() or 1, len(jobs)))
+    print(f"[BATCH] {len(jobs)} archivo(s), {workers} proceso(s)")
+
+    t0 = time.perf_counter()
+    if workers == 1:
+        _init_batch_worker()
+        results = [_compile_batch_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker) as pool:
+            results = list(pool.map(_compile_batch_job, jobs))
+    wall = time.perf_counter() - t0
+
+    ok = 0
+    total_lines = 0
+    for job, res in zip(jobs, results):
+        total_lines += res['lines']
+        info = f"({res['lines']} líneas, {res['elapsed']:.3f} s{', caché' if res['cache_hit'] else ''})"
+        if res['exit_code'] == 0:
+            ok += 1
+            print(f"  ✓ {job['input']} -> {job['output']}  {info}")
+        else:
+            reason = next((ln.strip() for ln in res['stderr'].splitlines() if ln.strip()), "error")
+            print(f"  ✗ {job['input']}  {info}: {reason}")
+        if args.verbose:
+            for stream in ('stdout', 'stderr'):
+                for ln in res[stream].splitlines():
+                    print(f"      {ln}")
+
+    rate_files = len(jobs) / wall if wall > 0 else 0.0
+    rate_lines = total_lines / wall if wall > 0 else 0.0
+    print(f"{'✓' if ok == len(jobs) else '✗'} {ok}/{len(jobs)} compilados en {wall:.2f} s "
+          f"({rate_files:.1f} archivos/s, {rate_lines:.1f} líneas/s)")
+    if not args.no_cache:
+        hits = sum(1 for r in results if r['cache_hit'])
+        misses = sum(1 for r in results if r['cache_miss'])
+        print(f"[CACHE] hits={hits} misses={misses}")
+    return 0 if ok == len(jobs) else 1
+
+
+def main():
+    """Función principal del driver MIPS"""
+    sys.exit(run())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,7 +3,7 @@ Generador de Código MIPS (Fase 3)
 Traduce un TACProgram (optimizado) a código MIPS.
 """
 import sys
-from typing import List, Dict, Set
+from typing import List, Dict, Set, Optional, Tuple
 
 # Asegurar que podamos importar desde carpetas hermanas
 from pathlib import Path
@@ -13,8 +13,12 @@ if str(ROOT) not in sys.path:
 
 from intermediate.tac import TACProgram, TACInstruction, TACOp, TACOperand
 from mips.runtime import get_data_preamble, get_text_preamble, get_syscall_helpers
+from mips.register_allocator import RegisterAllocator, Allocation, is_string_concat
+from mips.peephole import PeepholeOptimizer
+from intermediate.cfg import build_cfg
+from intermediate.liveness import compute_liveness, temp_name
 from semantic.scope import Scope
-from semantic.symbols import ClassSymbol, FunctionSymbol 
+from semantic.symbols import ClassSymbol, FunctionSymbol, OBJECT_HEADER_SIZE, class_ids
 
 def _is_const(x) -> bool:
     return getattr(x, "is_constant", False)
@@ -22,6 +26,56 @@ def _is_const(x) -> bool:
 def _const_val(x):
     return getattr(x, "value", x)
 
+def _const_index(x) -> Optional[int]:
+    """Índice constante de un acceso a array si 4*índice entra en el offset de lw/sw"""
+    v = getattr(x, "value", None)
+    if _is_const(x) and isinstance(v, int) and not isinstance(v, bool) and -8192 <= v < 8192:
+        return v
+    return None
+
+# Tamaño del frame de una función (se completa en _patch_frame_size)
+FRAME_SIZE_PLACEHOLDER = "__FRAME_SIZE__"
+
+# Relacional -> branch que salta si se cumple, y su negación (para ifFalse)
+_BRANCH_ON = {
+    TACOp.LT: "blt", TACOp.LE: "ble", TACOp.GT: "bgt",
+    TACOp.GE: "bge", TACOp.EQ: "beq", TACOp.NE: "bne",
+}
+_NEGATED = {TACOp.LT: TACOp.GE, TACOp.LE: TACOp.GT, TACOp.GT: TACOp.LE,
+            TACOp.GE: TACOp.LT, TACOp.EQ: TACOp.NE, TACOp.NE: TACOp.EQ}
+
+def _fusable_compares(insts: List[TACInstruction]) -> Set[int]:
+    """
+    ids de los relacionales 't = a REL b' seguidos de 'if/ifFalse t goto L'
+    con 't' muerto después del salto: se traducen como un solo branch, sin
+    calcular el 0/1 en un registro.
+    """
+    fused: Set[int] = set()
+    info = compute_liveness(build_cfg("<region>", insts))
+    for b, block in enumerate(info.cfg.blocks):
+        code = block.instructions
+        if len(code) < 2:
+            continue
+        cmp, branch = code[-2], code[-1]
+        if cmp.op in _BRANCH_ON and branch.op in (TACOp.IF_TRUE, TACOp.IF_FALSE) \
+                and temp_name(cmp.result) is not None and str(branch.arg1) == str(cmp.result) \
+                and not info.bit(str(cmp.result)) & info.live_out[b]:
+            fused.add(id(cmp))
+    return fused
+
+def _imm_value(x) -> Optional[int]:
+    """Valor entero de una constante int/bool (None si no es una)"""
+    v = getattr(x, "value", None)
+    if not _is_const(x) or not isinstance(v, int):
+        return None
+    return int(v)
+
+def _fits_simm(v: int) -> bool:
+    """Entra en el inmediato con signo de 16 bits de addiu/slti"""
+    return -32768 <= v <= 32767
+
+_COMMUTATIVE_OPS = {"add", "mul", "and", "or"}
+
 def _is_temp_name(x_val) -> bool:
     """
     Chequea si un operando (o su string) es un temporal.
@@ -39,11 +93,15 @@ class MIPSGenerator:
     - Variables Globales (0x...): Viven en la sección .data.
     - Parámetros (FP[neg_offset]): Viven en el stack, accedidos por $fp.
     - Variables Locales (ENTER size): Viven en el stack, accedidos por $fp.
-    - Temporales (tK): Se alocan dinámicamente en el stack por esta clase.
+    - Temporales (tK): Se alocan dinámicamente en el stack por esta clase,
+      o en registros $t3-$t9/$s0-$s7 si 'register_allocation' está activo
+      (ver mips/register_allocator.py); solo los spills van al frame.
     """
     
-    def __init__(self, program: TACProgram, global_scope: Scope, scopes_by_ctx: dict):
+    def __init__(self, program: TACProgram, global_scope: Scope, scopes_by_ctx: dict,
+                 register_allocation: bool = False, opt_level: int = 0):
         self.program = program
+        self.opt_level = opt_level
         self.global_scope = global_scope
         self.scopes_by_ctx = scopes_by_ctx 
         self.mips_code: List[str] = []
@@ -56,6 +114,9 @@ class MIPSGenerator:
 
         # --- Mapa de Clases ---
         self.class_layouts: Dict[str, ClassSymbol] = {}
+        self.class_ids: Dict[str, int] = {}   # Clase -> id en la cabecera del objeto
+        self.alloc_sites = 0                  # NEW con camino rápido inline
+        self.alloc_stubs: List[str] = []      # sus caminos lentos, al final de la región
         
         # .text (estado por función)
         self.temp_map: Dict[str, int] = {}    # Mapa de 'tK' -> offset_stack
@@ -64,6 +125,20 @@ class MIPSGenerator:
         self.in_function = False # Flag para saber si estamos en _script_start o en una función
         self.main_max_temp_offset = 0 # Offset máximo para temporales en main
         
+        # --- Asignación de registros (opcional; siempre en -O3) ---
+        self.register_allocation = register_allocation or opt_level >= 3
+        self.alloc: Optional[Allocation] = None   # asignación de la región actual
+        self.spill_base = 0                       # bytes del frame antes de los spills
+        self.peephole: Optional[PeepholeOptimizer] = None
+        
+        # --- Compare-and-branch fusionados (desde -O1) ---
+        self.fused_compares: Set[int] = set()          # ids de relacionales de la región
+        self.pending_compare: Optional[TACInstruction] = None
+        self.stats: Dict[str, int] = {
+            "temps": 0, "in_t_regs": 0, "in_s_regs": 0, "spills": 0,
+            "saved_regs": 0, "static_lw": 0, "static_sw": 0,
+        }
+        
     def _emit(self, line: str, indent: int = 1):
         """Añade una línea de MIPS al buffer."""
         self.mips_code.append(f"{'    ' * indent}{line}")
@@ -75,6 +150,7 @@ class MIPSGenerator:
         for name, symbol in self.global_scope.symbols.items():
             if isinstance(symbol, ClassSymbol):
                 self.class_layouts[name] = symbol
+        self.class_ids = class_ids(self.global_scope.symbols)
 
     def generate(self) -> str:
         """Punto de entrada principal. Orquesta la generación."""
@@ -110,43 +186,57 @@ class MIPSGenerator:
         self._emit("subu $sp, $sp, __MAIN_FRAME_SIZE__", indent=1) 
         self._emit("j _script_start          # Saltar sobre definiciones de funciones", indent=1)
         self._emit("", indent=0) # Línea en blanco para separar
+        code_start = len(self.mips_code)
         
         # 5. Traducir cada instrucción TAC
-        self.in_function = False
-        script_start_emitted = False
+        # Las funciones se emiten primero y todo el código del script después
+        # de '_script_start', aunque en el TAC estén intercaladas (si no, el
+        # script caería dentro del cuerpo de la función siguiente).
+        functions, main_insts = self._split_regions()
+        
+        for region in functions:
+            start = len(self.mips_code)
+            self.in_function = True
+            self._begin_region(region)
+            for inst in region:
+                self._emit(f"# {inst}", indent=1)
+                self._translate_instruction(inst)
+            self._flush_alloc_stubs()
+            self._patch_frame_size(start)
+            self.in_function = False
+            self._emit("", indent=0) 
+
+        self._emit("_script_start:", indent=0)
+        if main_insts:
+            self._emit("# Reseteando estado de frame para main", indent=2)
+        self.temp_map = {}
+        # --- ***** INICIO DE CORRECCIÓN ***** ---
+        # Usar el tamaño de locales de main que ya guardamos
+        self.current_frame_size = getattr(self.global_scope, "main_locals_size", 0)
+        # --- ***** FIN DE CORRECCIÓN ***** ---
+        self.current_temp_offset = 0 
+        self._begin_region(main_insts, frame_base=self.current_frame_size)
         
-        for inst in self.program.instructions:
-            if inst.op == TACOp.FUNC_START:
-                self.in_function = True
-            
-            if not self.in_function and not script_start_emitted:
-                self._emit("_script_start:", indent=0)
-                script_start_emitted = True
-                self._emit("# Reseteando estado de frame para main", indent=2)
-                self.temp_map = {}
-                # --- ***** INICIO DE CORRECCIÓN ***** ---
-                # Usar el tamaño de locales de main que ya guardamos
-                self.current_frame_size = getattr(self.global_scope, "main_locals_size", 0)
-                # --- ***** FIN DE CORRECCIÓN ***** ---
-                self.current_temp_offset = 0 
-            
+        for inst in main_insts:
             self._emit(f"# {inst}", indent=1)
             self._translate_instruction(inst)
-            
-            if inst.op == TACOp.FUNC_END:
-                self.in_function = False
-                self._emit("", indent=0) 
-
-        if not script_start_emitted:
-             self._emit("_script_start:", indent=0)
-             self.temp_map = {}
-             # --- ***** INICIO DE CORRECCIÓN ***** ---
-             self.current_frame_size = getattr(self.global_scope, "main_locals_size", 0)
-             # --- ***** FIN DE CORRECCIÓN ***** ---
-             self.current_temp_offset = 0
                  
         self._emit("\n# Terminar programa", indent=1)
         self._emit("jal _exit", indent=1)
+        self._flush_alloc_stubs()
+
+        # Peephole sobre el código traducido (no toca el preámbulo ni el runtime)
+        if self.opt_level >= 1:
+            self.peephole = PeepholeOptimizer()
+            self.mips_code[code_start:] = self.peephole.run(self.mips_code[code_start:])
+        
+        # Accesos a memoria estáticos del código generado (sin el runtime)
+        for line in self.mips_code:
+            text = line.strip()
+            if text.startswith("lw "):
+                self.stats["static_lw"] += 1
+            elif text.startswith("sw "):
+                self.stats["static_sw"] += 1
         
         # 6. Añadir helpers (syscalls) al final
         self.mips_code.append("\n# === HELPERS DEL RUNTIME ===")
@@ -164,6 +254,88 @@ class MIPSGenerator:
         return final_code
         # --- ***** FIN DE CORRECCIÓN FINAL ***** ---
 
+    # --- REGIONES Y ASIGNACIÓN DE REGISTROS ---
+
+    def _split_regions(self) -> Tuple[List[List[TACInstruction]], List[TACInstruction]]:
+        """Separa el TAC en funciones (FUNC_START..FUNC_END) y código del script"""
+        functions: List[List[TACInstruction]] = []
+        main_insts: List[TACInstruction] = []
+        current: Optional[List[TACInstruction]] = None
+        for inst in self.program.instructions:
+            if inst.op == TACOp.FUNC_START:
+                current = []
+                functions.append(current)
+            if current is not None:
+                current.append(inst)
+            else:
+                main_insts.append(inst)
+            if inst.op == TACOp.FUNC_END:
+                current = None
+        return functions, main_insts
+
+    def _begin_region(self, insts: List[TACInstruction], frame_base: Optional[int] = None):
+        """
+        Corre el asignador sobre la región (si está activo). Los spills viven
+        justo debajo de los locales: -(frame_base + 4*(slot+1))($fp).
+        """
+        self.alloc = None
+        self.fused_compares = _fusable_compares(insts) if self.opt_level >= 1 else set()
+        self.pending_compare = None
+        if not self.register_allocation:
+            return
+        if frame_base is None:
+            # Funciones: el tamaño de locales viene del ENTER
+            enter = next((i for i in insts if i.op == TACOp.ENTER), None)
+            frame_base = enter.arg1.value if enter is not None else 0
+        self.spill_base = frame_base
+        self.alloc = RegisterAllocator(insts).allocate()
+        
+        regs = self.alloc.registers.values()
+        self.stats["temps"] += len(self.alloc.intervals)
+        self.stats["in_t_regs"] += sum(1 for r in regs if r.startswith("$t"))
+        self.stats["in_s_regs"] += sum(1 for r in regs if r.startswith("$s"))
+        self.stats["spills"] += self.alloc.spill_count
+        self.stats["saved_regs"] += len(self.alloc.callee_saved)
+        
+        if not self.in_function:
+            self.main_max_temp_offset = max(self.main_max_temp_offset, 4 * self.alloc.spill_count)
+        self._emit(f"# (Registros: {len(self.alloc.registers)} temporales en registro, "
+                   f"{self.alloc.spill_count} spills, salvados: {' '.join(self.alloc.callee_saved) or '-'})")
+
+    def _reg_of(self, op) -> Optional[str]:
+        """Registro asignado a un temporal, o None si vive en memoria"""
+        if self.alloc is None or op is None or getattr(op, "is_constant", False):
+            return None
+        return self.alloc.registers.get(str(op))
+
+    def _spill_offset(self, op_name: str) -> Optional[int]:
+        if self.alloc is None or op_name not in self.alloc.spills:
+            return None
+        return self.spill_base + 4 * (self.alloc.spills[op_name] + 1)
+
+    def _saved_reg_slots(self) -> List[Tuple[str, int]]:
+        """(registro $s, offset desde $fp) de los callee-saved de la función actual"""
+        if self.alloc is None:
+            return []
+        base = self.spill_base + 4 * self.alloc.spill_count
+        return [(reg, base + 4 * (k + 1)) for k, reg in enumerate(self.alloc.callee_saved)]
+
+    def _emit_restore_callee_saved(self):
+        for reg, offset in self._saved_reg_slots():
+            self._emit(f"lw {reg}, -{offset}($fp)")
+
+    def _src(self, op, scratch: str) -> str:
+        """Registro que contiene el valor de 'op' (lo carga en 'scratch' si hace falta)"""
+        reg = self._reg_of(op)
+        if reg is not None:
+            return reg
+        self._load_op(scratch, op)
+        return scratch
+
+    def _dst(self, op, scratch: str) -> str:
+        """Registro donde calcular el resultado 'op' (luego _store_op lo ubica)"""
+        return self._reg_of(op) or scratch
+
     # --- FASE 1: ESCANEO DE DATOS ---
 
     def _scan_for_data(self):
@@ -211,18 +383,15 @@ class MIPSGenerator:
         
         op = inst.op
         
+        if id(inst) in self.fused_compares:
+            # Lo emite el IF siguiente como un solo branch
+            self.pending_compare = inst
+            return
+        
         # --- Aritméticas ---
         if op == TACOp.ADD:
-            # HACK: Verificar si es concatenación de strings
-            is_str_op = False
-            # Verificar tipo en arg1
-            if inst.arg1 and hasattr(inst.arg1, 'typ') and str(inst.arg1.typ) == 'string':
-                is_str_op = True
-            # O verificar tipo en arg2
-            elif inst.arg2 and hasattr(inst.arg2, 'typ') and str(inst.arg2.typ) == 'string':
-                is_str_op = True
-            
-            if is_str_op:
+            # HACK: Verificar si es concatenación de strings (tipo de arg1 o arg2)
+            if is_string_concat(inst):
                 self._emit("# Concatenación de strings detectada")
                 self._load_op("$a0", inst.arg1)  # Cargar str1 en argumento 1
                 self._load_op("$a1", inst.arg2)  # Cargar str2 en argumento 2
@@ -241,9 +410,10 @@ class MIPSGenerator:
         elif op == TACOp.MOD:
             self._translate_binary_op(inst, "rem")
         elif op == TACOp.NEG:
-            self._load_op("$t0", inst.arg1)
-            self._emit("neg $t0, $t0")
-            self._store_op("$t0", inst.result)
+            rs = self._src(inst.arg1, "$t0")
+            rd = self._dst(inst.result, "$t0")
+            self._emit(f"neg {rd}, {rs}")
+            self._store_op(rd, inst.result)
             
         # --- Relacionales ---
         elif op == TACOp.LT:
@@ -265,48 +435,72 @@ class MIPSGenerator:
         elif op == TACOp.OR:
             self._translate_binary_op(inst, "or")
         elif op == TACOp.NOT:
-            self._load_op("$t0", inst.arg1)
-            self._emit("seq $t0, $t0, $zero") # t0 = (t0 == 0)
-            self._store_op("$t0", inst.result)
+            rs = self._src(inst.arg1, "$t0")
+            rd = self._dst(inst.result, "$t0")
+            self._emit(f"seq {rd}, {rs}, $zero") # t0 = (t0 == 0)
+            self._store_op(rd, inst.result)
 
         # --- Asignación y Memoria ---
         elif op == TACOp.ASSIGN:
-            self._load_op("$t0", inst.arg1)
-            self._store_op("$t0", inst.result)
+            rd = self._reg_of(inst.result)
+            if rd is not None:
+                self._load_op(rd, inst.arg1)   # directo al registro asignado
+            else:
+                rs = self._src(inst.arg1, "$t0")
+                self._store_op(rs, inst.result)
         
+        elif op == TACOp.DEREF and self.opt_level >= 1 and str(inst.arg1).startswith("FP["):
+            rd = self._dst(inst.result, "$t1")
+            self._load_op(rd, inst.arg1)      # lw rd, k($fp): el offset va en el lw
+            self._store_op(rd, inst.result)
+
         elif op == TACOp.DEREF: # t1 = @0x1000  o  t1 = @FP[-4]
             self._get_addr("$t0", inst.arg1) # t0 = dirección (0x1000 o FP-4)
-            self._emit(f"lw $t1, 0($t0)")    # t1 = Mem[t0]
-            self._store_op("$t1", inst.result) # t1 (stack) = t1
+            rd = self._dst(inst.result, "$t1")
+            self._emit(f"lw {rd}, 0($t0)")    # t1 = Mem[t0]
+            self._store_op(rd, inst.result) # t1 (stack) = t1
+
+        elif op == TACOp.ARRAY_ACCESS and _const_index(inst.arg2) is not None:
+            base = self._src(inst.arg1, "$t0")    # índice constante: lw directo con offset
+            rd = self._dst(inst.result, "$t2")
+            self._emit(f"lw {rd}, {4 * _const_index(inst.arg2)}({base})")
+            self._store_op(rd, inst.result)
 
         elif op == TACOp.ARRAY_ACCESS: # result = arg1[arg2] (base[index])
-            self._load_op("$t0", inst.arg1)    # t0 = base address
-            self._load_op("$t1", inst.arg2)    # t1 = index
-            self._emit("sll $t1, $t1, 2")      # t1 = index * 4 (word size)
-            self._emit("add $t0, $t0, $t1")    # t0 = base + (index * 4)
-            self._emit("lw $t2, 0($t0)")      # t2 = Mem[t0]
-            self._store_op("$t2", inst.result) # result = t2
-        
+            base = self._src(inst.arg1, "$t0")    # t0 = base address
+            index = self._src(inst.arg2, "$t1")   # t1 = index
+            self._emit(f"sll $t1, {index}, 2")      # t1 = index * 4 (word size)
+            self._emit(f"add $t0, {base}, $t1")    # t0 = base + (index * 4)
+            rd = self._dst(inst.result, "$t2")
+            self._emit(f"lw {rd}, 0($t0)")      # t2 = Mem[t0]
+            self._store_op(rd, inst.result) # result = t2
+        
+        elif op == TACOp.ARRAY_ASSIGN and _const_index(inst.arg1) is not None:
+            base = self._src(inst.result, "$t0")
+            value = self._src(inst.arg2, "$t2")
+            self._emit(f"sw {value}, {4 * _const_index(inst.arg1)}({base})")
+
         elif op == TACOp.ARRAY_ASSIGN: # result[arg1] = arg2 (base[index] = value)
-            self._load_op("$t0", inst.result)  # t0 = base address
-            self._load_op("$t1", inst.arg1)    # t1 = index
-            self._load_op("$t2", inst.arg2)    # t2 = value
-            self._emit("sll $t1, $t1, 2")      # t1 = index * 4
-            self._emit("add $t0, $t0, $t1")    # t0 = base + (index * 4)
-            self._emit("sw $t2, 0($t0)")      # Mem[t0] = t2
+            base = self._src(inst.result, "$t0")  # t0 = base address
+            index = self._src(inst.arg1, "$t1")   # t1 = index
+            value = self._src(inst.arg2, "$t2")   # t2 = value
+            self._emit(f"sll $t1, {index}, 2")      # t1 = index * 4
+            self._emit(f"add $t0, {base}, $t1")    # t0 = base + (index * 4)
+            self._emit(f"sw {value}, 0($t0)")      # Mem[t0] = t2
 
         elif op == TACOp.FIELD_ACCESS: # result = arg1.arg2 (obj.prop)
             obj_op = inst.arg1
             prop_op = inst.arg2 # ¡Este es el operando clave!
             
-            self._load_op("$t0", obj_op) # t0 = base address
+            base = self._src(obj_op, "$t0") # t0 = base address
             
             if prop_op.is_constant and isinstance(prop_op.value, int):
                 # --- CASO 1: Es un CAMPO. prop_op ES el offset ---
                 offset = prop_op.value
                 self._emit(f"# (Accediendo a campo en offset {offset})")
-                self._emit(f"lw $t1, {offset}($t0)") # t1 = Mem[base + offset]
-                self._store_op("$t1", inst.result) # result = t1
+                rd = self._dst(inst.result, "$t1")
+                self._emit(f"lw {rd}, {offset}({base})") # t1 = Mem[base + offset]
+                self._store_op(rd, inst.result) # result = t1
             
             elif prop_op.is_constant and isinstance(prop_op.value, str):
                 # --- CASO 2: Es un MÉTODO. prop_op ES el nombre ---
@@ -316,8 +510,9 @@ class MIPSGenerator:
                 method_label = self._sanitize_label(f"{implementation_class}.{member_name}") 
                 
                 self._emit(f"# (Resolviendo dirección de método {method_label})")
-                self._emit(f"la $t0, {method_label}")
-                self._store_op("$t0", inst.result) # result = addr(getX)
+                rd = self._dst(inst.result, "$t0")
+                self._emit(f"la {rd}, {method_label}")
+                self._store_op(rd, inst.result) # result = addr(getX)
             
             else:
                 self._emit(f"# ERROR: FIELD_ACCESS no sabe qué hacer con {prop_op}")    
@@ -331,9 +526,9 @@ class MIPSGenerator:
                 # --- Es un CAMPO. prop_op ES el offset ---
                 offset = prop_op.value
                 self._emit(f"# (Asignando a campo en offset {offset})")
-                self._load_op("$t0", obj_op)    # t0 = base address
-                self._load_op("$t1", value_op)  # t1 = value
-                self._emit(f"sw $t1, {offset}($t0)") # Mem[base + offset] = value
+                base = self._src(obj_op, "$t0")      # t0 = base address
+                value = self._src(value_op, "$t1")   # t1 = value
+                self._emit(f"sw {value}, {offset}({base})") # Mem[base + offset] = value
             else:
                 # No deberías poder asignar a un método
                 self._emit(f"# ERROR: FIELD_ASSIGN no puede asignar a {prop_op} (no es un offset int)")
@@ -341,12 +536,14 @@ class MIPSGenerator:
         # --- Control de Flujo ---
         elif op == TACOp.GOTO:
             self._emit(f"j {inst.arg1}")
+        elif op in (TACOp.IF_TRUE, TACOp.IF_FALSE) and self.pending_compare is not None:
+            self._translate_compare_branch(self.pending_compare, inst)
         elif op == TACOp.IF_TRUE:
-            self._load_op("$t0", inst.arg1)
-            self._emit(f"bne $t0, $zero, {inst.arg2}") # Branch if t0 != 0
+            cond = self._src(inst.arg1, "$t0")
+            self._emit(f"bne {cond}, $zero, {inst.arg2}") # Branch if t0 != 0
         elif op == TACOp.IF_FALSE:
-            self._load_op("$t0", inst.arg1)
-            self._emit(f"beq $t0, $zero, {inst.arg2}") # Branch if t0 == 0
+            cond = self._src(inst.arg1, "$t0")
+            self._emit(f"beq {cond}, $zero, {inst.arg2}") # Branch if t0 == 0
         elif op == TACOp.LABEL:
             self._emit(f"{inst.arg1}:", indent=0)
 
@@ -367,6 +564,9 @@ class MIPSGenerator:
 
         elif op == TACOp.ENTER: # Prolog
             size = inst.arg1.value
+            if self.alloc is not None:
+                # Espacio extra para spills y registros callee-saved
+                size += 4 * (self.alloc.spill_count + len(self.alloc.callee_saved))
             self.current_frame_size = size 
             
             self._emit("subu $sp, $sp, 8")
@@ -374,14 +574,16 @@ class MIPSGenerator:
             self._emit("sw $fp, 0($sp)")
             self._emit("move $fp, $sp")
             
-            if size > 0:
-                self._emit(f"subu $sp, $sp, {size}")
+            # Locales + temporales en el stack: el total se conoce al terminar la región
+            self._emit(f"subu $sp, $sp, {FRAME_SIZE_PLACEHOLDER}")
+            for reg, offset in self._saved_reg_slots():
+                self._emit(f"sw {reg}, -{offset}($fp)")
 
         elif op == TACOp.LEAVE: # Epilog
             # Este código AHORA solo se usará si la función
             # termina sin un 'return' explícito.
-            if self.current_frame_size > 0:
-                self._emit(f"addu $sp, $sp, {self.current_frame_size}")
+            self._emit_restore_callee_saved()
+            self._emit(f"addu $sp, $sp, {FRAME_SIZE_PLACEHOLDER}")
             
             self._emit("lw $ra, 4($sp)")
             self._emit("lw $fp, 0($sp)")
@@ -400,8 +602,8 @@ class MIPSGenerator:
                 self._load_op("$v0", inst.arg1) # $v0 = valor de retorno
             
             # 2. Emitir el EPÍLOGO (LEAVE) aquí mismo
-            if self.current_frame_size > 0:
-                self._emit(f"addu $sp, $sp, {self.current_frame_size}")
+            self._emit_restore_callee_saved()
+            self._emit(f"addu $sp, $sp, {FRAME_SIZE_PLACEHOLDER}")
             
             self._emit("lw $ra, 4($sp)") # Restaurar $ra
             self._emit("lw $fp, 0($sp)") # Restaurar $fp
@@ -412,9 +614,9 @@ class MIPSGenerator:
 
         # --- Llamadas ---
         elif op == TACOp.PUSH: # Poner en el stack
-            self._load_op("$t0", inst.arg1)
+            value = self._src(inst.arg1, "$t0")
             self._emit("subu $sp, $sp, 4")
-            self._emit("sw $t0, 0($sp)")
+            self._emit(f"sw {value}, 0($sp)")
 
         elif op == TACOp.CALL:
             op_operand = inst.arg1
@@ -436,8 +638,8 @@ class MIPSGenerator:
             # (el temporal CONTIENE la dirección de la función)
             elif op_operand.is_temp:
                 self._emit(f"# Llamada indirecta a puntero en temporal '{op_name}'")
-                self._load_op("$t0", op_operand) # Cargar la dirección desde el stack a $t0
-                self._emit("jalr $t0")          # Jump And Link Register
+                target = self._src(op_operand, "$t0") # Cargar la dirección desde el stack a $t0
+                self._emit(f"jalr {target}")          # Jump And Link Register
             
             # SI NO es temporal, es una etiqueta (llamada DIRECTA)
             else:
@@ -455,9 +657,10 @@ class MIPSGenerator:
             self._emit(f"addu $sp, $sp, {inst.arg1.value}")
 
         elif op == TACOp.POP: # Sacar de stack y guardar en resultado
-            self._emit("lw $t0, 0($sp)")
+            rd = self._dst(inst.result, "$t0")
+            self._emit(f"lw {rd}, 0($sp)")
             self._emit("addu $sp, $sp, 4")
-            self._store_op("$t0", inst.result)
+            self._store_op(rd, inst.result)
             
         # --- Helpers (PRINT, NEW) ---
         elif op == TACOp.PRINT:
@@ -483,31 +686,147 @@ class MIPSGenerator:
                 num_elements = arg1_op.value
                 size = num_elements * 4 # 4 bytes por elemento (int)
                 self._emit(f"# Alocando {size} bytes para array[{num_elements}]")
-                self._emit(f"li $a0, {size}")
+                self._emit_alloc(size)
 
             elif isinstance(arg1_op.value, str):
-                # --- Es una CLASE (AQUÍ ESTÁ EL HACK) ---
+                # --- Es una CLASE: cabecera (id de clase) + campos heredados y propios ---
                 class_name = str(arg1_op.value)
-
-                size = 64 # Reservar 64 bytes para CUALQUIER objeto
-                self._emit(f"# Alocando {size} bytes (hack) para {class_name}")
-                self._emit(f"li $a0, {size}")
+                csym = self.class_layouts.get(class_name)
+                size = csym.object_size if csym is not None else OBJECT_HEADER_SIZE
+                self._emit(f"# Alocando {size} bytes para {class_name} (cabecera + campos)")
+                self._emit_alloc(size)
+                self._emit(f"li $t0, {self.class_ids.get(class_name, 0)}")
+                self._emit("sw $t0, 0($v0)")               # cabecera: id de clase
+                self._emit(f"addiu $v0, $v0, {OBJECT_HEADER_SIZE}")  # el puntero apunta a los campos
 
             else:
                 self._emit(f"# ERROR: 'NEW' no sabe qué hacer con {arg1_op}")
-                self._emit(f"li $a0, 0")
+                self._emit_alloc(0)
 
-            self._emit("jal _alloc")
             self._store_op("$v0", inst.result) # result = new object ptr
 
+    def _emit_alloc(self, size: int):
+        """
+        $v0 = bloque de 'size' bytes del heap. Desde -O1 el bump del puntero
+        de _heap_state va inline; si no entra en el arena se salta a un stub
+        al final de la región que llama a _alloc (que lo rellena con sbrk).
+        Modifica $v0, $v1, $a0 y $at.
+        """
+        if self.opt_level < 1 or size % 4 or not _fits_simm(size):
+            self._emit(f"li $a0, {size}")
+            self._emit("jal _alloc")
+            return
+        self.alloc_sites += 1
+        slow, done = f"_alloc_slow_{self.alloc_sites}", f"_alloc_done_{self.alloc_sites}"
+        self._emit("la $at, _heap_state")
+        self._emit("lw $v0, 0($at)")             # siguiente byte libre
+        self._emit(f"addiu $v1, $v0, {size}")     # nuevo tope
+        self._emit("lw $a0, 4($at)")             # fin del arena
+        self._emit("slt $a0, $v1, $a0")
+        self._emit(f"beq $a0, $zero, {slow}")    # no entra: camino lento
+        self._emit("sw $v1, 0($at)")
+        self._emit("lw $v1, 8($at)")             # contador de asignaciones
+        self._emit("addiu $v1, $v1, 1")
+        self._emit("sw $v1, 8($at)")
+        self._emit(f"{done}:", indent=0)
+        self.alloc_stubs += [f"{slow}:", f"    li $a0, {size}", "    jal _alloc", f"    j {done}"]
+
+    def _flush_alloc_stubs(self):
+        """Emite los caminos lentos de los NEW inline de la región"""
+        if self.alloc_stubs:
+            self._emit("# Caminos lentos de alocación (rellenar el arena)")
+            for line in self.alloc_stubs:
+                self._emit(line, indent=0)
+            self.alloc_stubs = []
+
     # --- HELPERS DE TRADUCCIÓN ---
 
     def _translate_binary_op(self, inst: TACInstruction, mips_op: str):
         """Helper genérico para t3 = t1 op t2"""
-        self._load_op("$t0", inst.arg1)
-        self._load_op("$t1", inst.arg2)
-        self._emit(f"{mips_op} $t2, $t0, $t1")
-        self._store_op("$t2", inst.result)
+        if self.opt_level >= 1 and self._translate_immediate_op(inst, mips_op):
+            return
+        rs = self._src(inst.arg1, "$t0")
+        rt = self._src(inst.arg2, "$t1")
+        rd = self._dst(inst.result, "$t2")
+        self._emit(f"{mips_op} {rd}, {rs}, {rt}")
+        self._store_op(rd, inst.result)
+
+    def _translate_immediate_op(self, inst: TACInstruction, mips_op: str) -> bool:
+        """
+        Selección con operando constante (False si no aplica y hay que usar
+        la forma de tres registros):
+          x + c, x - c, x < c, x <= c   -> addiu / slti  (c de 16 bits con signo)
+          x & c, x | c                  -> andi / ori    (c de 16 bits sin signo)
+          x * 2^k                       -> sll
+          x / 2^k, x % 2^k              -> sra / andi con corrección de signo
+                                           (la división trunca hacia cero)
+        """
+        a, c = inst.arg1, _imm_value(inst.arg2)
+        if c is None and mips_op in _COMMUTATIVE_OPS and _imm_value(inst.arg1) is not None:
+            a, c = inst.arg2, _imm_value(inst.arg1)
+        if c is None or _imm_value(a) is not None:
+            return False
+        k = c.bit_length() - 1 if c > 0 and c & (c - 1) == 0 else None
+
+        if mips_op == "add" and _fits_simm(c):
+            lines = [f"addiu {{rd}}, {{rs}}, {c}"]
+        elif mips_op == "sub" and _fits_simm(-c):
+            lines = [f"addiu {{rd}}, {{rs}}, {-c}"]
+        elif mips_op == "slt" and _fits_simm(c):
+            lines = [f"slti {{rd}}, {{rs}}, {c}"]
+        elif mips_op == "sle" and _fits_simm(c + 1):
+            lines = [f"slti {{rd}}, {{rs}}, {c + 1}"]
+        elif mips_op in ("and", "or") and 0 <= c <= 0xFFFF:
+            lines = [f"{mips_op}i {{rd}}, {{rs}}, {c}"]
+        elif mips_op == "mul" and k is not None and k < 31:
+            lines = [f"sll {{rd}}, {{rs}}, {k}"]
+        elif mips_op == "div" and k is not None and 1 <= k < 31:
+            # Negativos: sumar 2^k - 1 antes del shift para truncar hacia cero
+            lines = ["sra $at, {rs}, 31",
+                     f"srl $at, $at, {32 - k}",
+                     "addu $at, {rs}, $at",
+                     f"sra {{rd}}, $at, {k}"]
+        elif mips_op == "rem" and k is not None and 1 <= k <= 16:
+            # x % 2^k = ((x + b) & (2^k - 1)) - b, con b = 2^k - 1 si x < 0 (si no 0)
+            lines = ["sra $at, {rs}, 31",
+                     f"srl $at, $at, {32 - k}",
+                     "addu $t1, {rs}, $at",
+                     f"andi $t1, $t1, {c - 1}",
+                     "subu {rd}, $t1, $at"]
+        else:
+            return False
+
+        rs = self._src(a, "$t0")
+        rd = self._dst(inst.result, "$t2")
+        for line in lines:
+            self._emit(line.format(rs=rs, rd=rd))
+        self._store_op(rd, inst.result)
+        return True
+
+    def _translate_compare_branch(self, cmp: TACInstruction, branch: TACInstruction):
+        """'t = a REL b; if[False] t goto L' -> 'bREL a, b, L' (o la negación)"""
+        self.pending_compare = None
+        rel = cmp.op if branch.op == TACOp.IF_TRUE else _NEGATED[cmp.op]
+        rs = self._src(cmp.arg1, "$t0")
+        if _is_const(cmp.arg2) and _const_val(cmp.arg2) in (0, False, None):
+            rt = "$zero"
+        else:
+            rt = self._src(cmp.arg2, "$t1")
+        self._emit(f"{_BRANCH_ON[rel]} {rs}, {rt}, {branch.arg2}")
+
+    def _patch_frame_size(self, start: int):
+        """
+        Reemplaza el tamaño del frame en el prólogo/epílogos de la función
+        emitida desde 'start': locales (+ spills y $s salvados) más los
+        temporales que se alocaron en el stack al traducirla. Así los
+        temporales quedan dentro del frame y un PUSH/jal no los pisa.
+        """
+        size = self.current_frame_size + self.current_temp_offset
+        adjust = (f"subu $sp, $sp, {FRAME_SIZE_PLACEHOLDER}", f"addu $sp, $sp, {FRAME_SIZE_PLACEHOLDER}")
+        code = self.mips_code[start:]
+        if size == 0:
+            code = [line for line in code if line.strip() not in adjust]
+        self.mips_code[start:] = [line.replace(FRAME_SIZE_PLACEHOLDER, str(size)) for line in code]
 
     def _get_temp_offset(self, op_name: str) -> int:    
         """
@@ -567,7 +886,14 @@ class MIPSGenerator:
             self._emit(f"lw {reg}, 8($fp)")
         
         elif _is_temp_name(op_name): # <-- FIX: Usar _is_temp_name(op_name)
-            offset = self._get_temp_offset(op_name) # <-- FIX: Usar op_name
+            allocated = self._reg_of(op)
+            if allocated is not None:
+                if allocated != reg:
+                    self._emit(f"move {reg}, {allocated}")
+                return
+            offset = self._spill_offset(op_name)
+            if offset is None:
+                offset = self._get_temp_offset(op_name) # <-- FIX: Usar op_name
             self._emit(f"lw {reg}, -{offset}($fp)") # Cargar desde stack
         
         elif op_name.startswith("FP["): # <-- FIX: Usar op_name
@@ -606,7 +932,14 @@ class MIPSGenerator:
         op_name = str(op) # <-- FIX: Usar str(op) como el nombre/llave
 
         if _is_temp_name(op_name): # <-- FIX: Usar _is_temp_name(op_name)
-            offset = self._get_temp_offset(op_name) # <-- FIX: Usar op_name
+            allocated = self._reg_of(op)
+            if allocated is not None:
+                if allocated != reg:
+                    self._emit(f"move {allocated}, {reg}")
+                return
+            offset = self._spill_offset(op_name)
+            if offset is None:
+                offset = self._get_temp_offset(op_name) # <-- FIX: Usar op_name
             self._emit(f"sw {reg}, -{offset}($fp)") # Guardar en stack
         
         elif op_name.startswith("0x"): # <-- FIX: Usar op_name
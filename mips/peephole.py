@@ -0,0 +1,231 @@
+"""
+Optimizador peephole sobre el MIPS generado
+
+MIPSGenerator traduce cada instrucción TAC por separado, así que en los
+bordes entre instrucciones quedan patrones como
+
+    sw $t2, -8($fp)            lw $t0, -8($fp)      (guardar y recargar)
+    la $at, global_X ... la $at, global_X           (dirección ya cargada)
+    j L1                       L1:                  (salto a la línea siguiente)
+
+El código se parsea a una lista de AsmLine (etiqueta / instrucción /
+comentario) y se le aplica una tabla de reglas (RULES). Cada regla mira la
+instrucción actual y las siguientes del mismo bloque (los comentarios se
+saltean, una etiqueta corta la ventana) y devuelve los reemplazos. Se
+itera hasta que ninguna regla aplica; stats cuenta cuántas veces aplicó
+cada una.
+
+Agregar una regla:
+    def _mi_regla(code, i) -> Optional[Dict[int, Optional[AsmLine]]]: ...
+    RULES.append(Rule("mi_regla", _mi_regla))
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set
+
+_LABEL_RE = re.compile(r"^\s*([A-Za-z_.$][\w.$]*):\s*(#.*)?$")
+
+# Instrucciones cuyo primer operando es el registro destino
+_WRITES_FIRST = {
+    "add", "addu", "addi", "addiu", "sub", "subu", "mul", "mulo", "rem", "remu",
+    "and", "andi", "or", "ori", "xor", "xori", "nor", "slt", "slti", "sltu", "sltiu",
+    "sll", "srl", "sra", "sllv", "srlv", "srav", "li", "la", "lw", "lb", "lbu", "lh", "lhu",
+    "move", "neg", "negu", "not", "abs", "seq", "sne", "sge", "sgt", "sle", "sgeu", "sgtu",
+    "sleu", "mflo", "mfhi",
+}
+_STORES = {"sw", "sb", "sh"}
+
+
+@dataclass
+class AsmLine:
+    """Una línea del .s: etiqueta, instrucción (op + operandos) u otra cosa"""
+    text: str
+    kind: str                      # 'label' | 'inst' | 'other'
+    op: str = ""
+    args: List[str] = field(default_factory=list)
+    label: str = ""
+
+    @staticmethod
+    def parse(text: str) -> "AsmLine":
+        m = _LABEL_RE.match(text)
+        if m:
+            return AsmLine(text, "label", label=m.group(1))
+        code = text.split("#", 1)[0].strip()
+        if not code or code.startswith("."):
+            return AsmLine(text, "other")
+        parts = code.split(None, 1)
+        args = [a.strip() for a in parts[1].split(",")] if len(parts) > 1 else []
+        return AsmLine(text, "inst", parts[0], args)
+
+    @staticmethod
+    def make(op: str, *args: str) -> "AsmLine":
+        return AsmLine(f"    {op} {', '.join(args)}", "inst", op, list(args))
+
+    def writes(self) -> Optional[Set[str]]:
+        """Registros que escribe; None si puede escribir cualquiera o cambia el flujo"""
+        if self.op in _WRITES_FIRST and self.args:
+            return {self.args[0]}
+        if self.op in _STORES or self.op == "nop":
+            return set()
+        if self.op in ("div", "divu", "mult", "multu") and len(self.args) == 2:
+            return {"lo", "hi"}
+        if self.op in ("div", "divu") and len(self.args) == 3:
+            return {self.args[0], "lo", "hi"}
+        return None
+
+
+Replacements = Dict[int, Optional[AsmLine]]     # índice -> nueva línea (None: borrar)
+
+
+@dataclass
+class Rule:
+    name: str
+    apply: Callable[[List[AsmLine], int], Optional[Replacements]]
+
+
+def _next_inst(code: List[AsmLine], i: int) -> Optional[int]:
+    """Siguiente instrucción del mismo bloque (None si antes hay una etiqueta)"""
+    for k in range(i + 1, len(code)):
+        if code[k].kind == "inst":
+            return k
+        if code[k].kind == "label":
+            return None
+    return None
+
+
+def _copy(dst: str, src: str) -> Optional[AsmLine]:
+    return None if dst == src else AsmLine.make("move", dst, src)
+
+
+def _store_load(code: List[AsmLine], i: int) -> Optional[Replacements]:
+    """sw $a, X ; lw $b, X  ->  sw $a, X ; move $b, $a"""
+    st = code[i]
+    if st.op != "sw" or len(st.args) != 2:
+        return None
+    j = _next_inst(code, i)
+    if j is None or code[j].op != "lw" or code[j].args[1:] != st.args[1:]:
+        return None
+    return {j: _copy(code[j].args[0], st.args[0])}
+
+
+def _load_load(code: List[AsmLine], i: int) -> Optional[Replacements]:
+    """lw $a, X ; lw $b, X  ->  lw $a, X ; move $b, $a  (si $a no es la base de X)"""
+    ld = code[i]
+    if ld.op != "lw" or len(ld.args) != 2 or f"({ld.args[0]})" in ld.args[1]:
+        return None
+    j = _next_inst(code, i)
+    if j is None or code[j].op != "lw" or code[j].args[1:] != ld.args[1:]:
+        return None
+    return {j: _copy(code[j].args[0], ld.args[0])}
+
+
+def _dead_store(code: List[AsmLine], i: int) -> Optional[Replacements]:
+    """sw $a, X ; sw $b, X  ->  sw $b, X"""
+    st = code[i]
+    if st.op != "sw" or len(st.args) != 2:
+        return None
+    j = _next_inst(code, i)
+    if j is None or code[j].op != "sw" or code[j].args[1:] != st.args[1:]:
+        return None
+    return {i: None}
+
+
+_CONST_WINDOW = 8
+
+
+def _redundant_const(code: List[AsmLine], i: int) -> Optional[Replacements]:
+    """'la/li $r, X' cuando $r ya tiene X (cargado antes en el bloque y no pisado)"""
+    inst = code[i]
+    if inst.op not in ("la", "li") or len(inst.args) != 2:
+        return None
+    reg, seen = inst.args[0], 0
+    for k in range(i - 1, -1, -1):
+        prev = code[k]
+        if prev.kind == "label":
+            return None
+        if prev.kind != "inst":
+            continue
+        if prev.op == inst.op and prev.args == inst.args:
+            return {i: None}
+        written = prev.writes()
+        if written is None or reg in written:
+            return None
+        seen += 1
+        if seen >= _CONST_WINDOW:
+            return None
+    return None
+
+
+def _jump_next(code: List[AsmLine], i: int) -> Optional[Replacements]:
+    """j L ; L:  ->  L:"""
+    inst = code[i]
+    if inst.op not in ("j", "b") or len(inst.args) != 1:
+        return None
+    for k in range(i + 1, len(code)):
+        line = code[k]
+        if line.kind == "label":
+            if line.label == inst.args[0]:
+                return {i: None}
+            continue
+        if line.kind == "inst":
+            return None
+    return None
+
+
+def _move_self(code: List[AsmLine], i: int) -> Optional[Replacements]:
+    """move $a, $a"""
+    inst = code[i]
+    if inst.op == "move" and len(inst.args) == 2 and inst.args[0] == inst.args[1]:
+        return {i: None}
+    return None
+
+
+RULES: List[Rule] = [
+    Rule("redundant_const", _redundant_const),
+    Rule("store_load", _store_load),
+    Rule("load_load", _load_load),
+    Rule("dead_store", _dead_store),
+    Rule("jump_next", _jump_next),
+    Rule("move_self", _move_self),
+]
+
+
+class PeepholeOptimizer:
+    """Aplica RULES sobre las líneas de la sección de código"""
+
+    def __init__(self, rules: Optional[List[Rule]] = None, max_passes: int = 8):
+        self.rules = RULES if rules is None else rules
+        self.max_passes = max_passes
+        self.stats: Dict[str, int] = {rule.name: 0 for rule in self.rules}
+        self.before = 0
+        self.after = 0
+
+    def run(self, lines: List[str]) -> List[str]:
+        code = [AsmLine.parse(t) for text in lines for t in text.split("\n")]
+        self.before = sum(1 for line in code if line.kind == "inst")
+        for _ in range(self.max_passes):
+            changed = False
+            i = 0
+            while i < len(code):
+                if code[i].kind == "inst":
+                    for rule in self.rules:
+                        repl = rule.apply(code, i)
+                        if repl:
+                            self.stats[rule.name] += 1
+                            for k in sorted(repl, reverse=True):
+                                if repl[k] is None:
+                                    del code[k]
+                                else:
+                                    code[k] = repl[k]
+                            changed = True
+                            break
+                i += 1
+            if not changed:
+                break
+        self.after = sum(1 for line in code if line.kind == "inst")
+        return [line.text for line in code]
+
+    def report(self) -> str:
+        hits = ", ".join(f"{name}×{n}" for name, n in self.stats.items() if n)
+        return (f"🔬 Peephole MIPS: {self.before} → {self.after} instrucciones "
+                f"(-{self.before - self.after})" + (f": {hits}" if hits else ""))
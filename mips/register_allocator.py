@@ -0,0 +1,167 @@
+"""
+Asignador de registros para el backend MIPS (linear scan)
+Trabaja sobre una región de TAC: una función (FUNC_START..FUNC_END) o el
+script principal. Toma la liveness por instrucción del dataflow sobre el
+CFG de la región (intermediate/liveness.py), construye un intervalo de
+vida por temporal y los asigna así:
+
+  - temporales que NO están vivos a través de un 'jal' -> $t3-$t9
+  - temporales vivos a través de un 'jal'              -> $s0-$s7 (callee-saved)
+  - sin registros libres -> spill a un slot del frame del $fp
+
+$t0-$t2, $at, $a0/$a1 y $v0 quedan reservados como registros scratch del
+generador. Un 'jal' aparece en CALL, PRINT, NEW y en el ADD de strings
+(llamada a _string_concat).
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from intermediate.tac import TACInstruction, TACOp, is_string_concat
+from intermediate.cfg import build_cfg
+from intermediate.liveness import compute_liveness
+
+# Registros asignables (los scratch del generador quedan fuera)
+CALLER_SAVED_REGS = ["$t3", "$t4", "$t5", "$t6", "$t7", "$t8", "$t9"]
+CALLEE_SAVED_REGS = ["$s0", "$s1", "$s2", "$s3", "$s4", "$s5", "$s6", "$s7"]
+
+
+def is_call_point(inst: TACInstruction) -> bool:
+    """Instrucciones que el generador traduce con un 'jal' (destruyen $t*)"""
+    return inst.op in (TACOp.CALL, TACOp.PRINT, TACOp.NEW) or is_string_concat(inst)
+
+
+@dataclass
+class LiveInterval:
+    """Intervalo [start, end] (índices de instrucción de la región)"""
+    temp: str
+    start: int
+    end: int
+    crosses_call: bool = False
+    starts_at_def: bool = False     # nace en 'start' (no estaba vivo antes)
+    dies_at_end: bool = True        # su último uso es 'end' (no sigue vivo después)
+
+
+@dataclass
+class Allocation:
+    """Resultado de la asignación de una región"""
+    registers: Dict[str, str] = field(default_factory=dict)   # temporal -> registro
+    spills: Dict[str, int] = field(default_factory=dict)      # temporal -> slot (0, 1, ...)
+    callee_saved: List[str] = field(default_factory=list)     # $s* usados (a salvar)
+    intervals: Dict[str, LiveInterval] = field(default_factory=dict)
+
+    @property
+    def spill_count(self) -> int:
+        return len(self.spills)
+
+
+class RegisterAllocator:
+    """Linear scan (Poletto & Sarkar) sobre los intervalos de una región"""
+
+    def __init__(self, instructions: List[TACInstruction],
+                 caller_saved: Optional[List[str]] = None,
+                 callee_saved: Optional[List[str]] = None):
+        self.instructions = instructions
+        self.caller_saved = list(caller_saved if caller_saved is not None else CALLER_SAVED_REGS)
+        self.callee_saved = list(callee_saved if callee_saved is not None else CALLEE_SAVED_REGS)
+
+    # --- Liveness ---
+
+    def compute_liveness(self):
+        """use/def y live_in/live_out por instrucción (a partir del dataflow por bloques)"""
+        info = compute_liveness(build_cfg("<region>", self.instructions))
+        use_def: List[Tuple[Set[str], Set[str]]] = []
+        live_in: List[Set[str]] = []
+        live_out: List[Set[str]] = []
+        for b in range(len(info.cfg.blocks)):
+            outs = info.instruction_live_out(b)
+            for i in range(len(outs)):
+                u, d = info.inst_use[b][i], info.inst_def[b][i]
+                use_def.append((info.to_set(u), info.to_set(d)))
+                live_out.append(info.to_set(outs[i]))
+                live_in.append(info.to_set((outs[i] & ~d) | u))
+        return use_def, live_in, live_out
+
+    def build_intervals(self) -> Dict[str, LiveInterval]:
+        use_def, live_in, live_out = self.compute_liveness()
+        intervals: Dict[str, LiveInterval] = {}
+
+        def touch(t: str, i: int):
+            iv = intervals.get(t)
+            if iv is None:
+                intervals[t] = LiveInterval(t, i, i)
+            else:
+                iv.start = min(iv.start, i)
+                iv.end = max(iv.end, i)
+
+        for i, inst in enumerate(self.instructions):
+            uses, defs = use_def[i]
+            for t in uses | defs | live_in[i]:
+                touch(t, i)
+            for t in live_out[i]:
+                touch(t, i)
+            if is_call_point(inst):
+                # Vivo antes y después del jal (el resultado de la llamada no cuenta)
+                for t in live_out[i] - defs:
+                    touch(t, i)
+                    intervals[t].crosses_call = True
+
+        for t, iv in intervals.items():
+            iv.starts_at_def = t in use_def[iv.start][1] and t not in live_in[iv.start]
+            iv.dies_at_end = t not in live_out[iv.end]
+        return intervals
+
+    # --- Linear scan ---
+
+    def allocate(self) -> Allocation:
+        intervals = self.build_intervals()
+        result = Allocation(intervals=intervals)
+        order = sorted(intervals.values(), key=lambda iv: (iv.start, iv.end, iv.temp))
+
+        free_t = list(self.caller_saved)
+        free_s = list(self.callee_saved)
+        active: List[LiveInterval] = []   # ordenado por 'end'
+        used_s: List[str] = []
+
+        def release(iv: LiveInterval):
+            reg = result.registers[iv.temp]
+            (free_s if reg in self.callee_saved else free_t).append(reg)
+
+        for iv in order:
+            # Expirar intervalos que terminan antes del inicio del actual. Si uno
+            # muere justo donde nace el actual pueden compartir registro: el
+            # generador lee todos los operandos antes de escribir el resultado
+            still = []
+            for a in active:
+                if a.end < iv.start or (a.end == iv.start and iv.starts_at_def and a.dies_at_end):
+                    release(a)
+                else:
+                    still.append(a)
+            active = still
+
+            reg = None
+            if not iv.crosses_call and free_t:
+                reg = free_t.pop(0)
+            elif free_s:
+                reg = free_s.pop(0)
+                if reg not in used_s:
+                    used_s.append(reg)
+
+            if reg is None:
+                # Spill: el activo compatible que termina más tarde, si termina después
+                candidates = [a for a in active
+                              if (not iv.crosses_call or result.registers[a.temp] in self.callee_saved)]
+                victim = max(candidates, key=lambda a: a.end) if candidates else None
+                if victim is not None and victim.end > iv.end:
+                    reg = result.registers.pop(victim.temp)
+                    result.spills[victim.temp] = len(result.spills)
+                    active.remove(victim)
+                else:
+                    result.spills[iv.temp] = len(result.spills)
+                    continue
+
+            result.registers[iv.temp] = reg
+            active.append(iv)
+            active.sort(key=lambda a: a.end)
+
+        result.callee_saved = [r for r in self.callee_saved if r in used_s]
+        return result
@@ -8,7 +8,7 @@ from typing import List, Dict
 
 def get_data_preamble() -> str:
     """
-    Retorna la sección .data estática.
+    Retorna la sección .data estática (incluye el estado del heap por arenas).
     El MIPSGenerator deberá añadir aquí las variables globales dinámicas
     y los literales de string.
     """
@@ -17,6 +17,10 @@ def get_data_preamble() -> str:
         "_newline: .asciiz \"\\n\"   # String para saltos de línea\n"
         "_true:    .asciiz \"true\"   # String para boolean true\n"
         "_false:   .asciiz \"false\"  # String para boolean false\n"
+        "_empty_str: .asciiz \"\"     # String vacío (operando null en concatenación)\n"
+        "# Heap por arenas: siguiente byte libre, fin del arena, asignaciones,\n"
+        "# bytes servidos por arenas ya cerradas, inicio del arena actual\n"
+        "_heap_state: .word 0, 0, 0, 0, 0\n"
     )
 
 def get_text_preamble() -> str:
@@ -150,13 +154,13 @@ _string_concat:
     move $s1, $a1         # $s1 = str2
 
     # --- ***** INICIO DE CORRECCIÓN (Manejo de Nulls) ***** ---
-    # Si $s0 (str1) es 0 (null), apuntarlo a _str_0 (string vacío global)
+    # Si $s0 (str1) es 0 (null), apuntarlo a _empty_str (string vacío global)
     bne $s0, $zero, _sc_s1_ok
-    la $s0, _str_0
+    la $s0, _empty_str
 _sc_s1_ok:
-    # Si $s1 (str2) es 0 (null), apuntarlo a _str_0 (string vacío global)
+    # Si $s1 (str2) es 0 (null), apuntarlo a _empty_str (string vacío global)
     bne $s1, $zero, _sc_s2_ok
-    la $s1, _str_0
+    la $s1, _empty_str
 _sc_s2_ok:
     # --- ***** FIN DE CORRECCIÓN ***** ---
 
@@ -172,8 +176,7 @@ _sc_s2_ok:
 
     # 2. Alocar memoria nueva
     move $a0, $s2
-    li $v0, 9             # syscall sbrk
-    syscall
+    jal _alloc
     move $t0, $v0         # $t0 = puntero destino (nuevo string)
     move $v1, $v0         # Guardar inicio para retornar en $v0 al final
 
@@ -223,12 +226,9 @@ _int_to_string:
     
     move $s0, $a0     # $s0 = n
 
-    # 1. Alocar un buffer temporal pequeño (16 bytes es suficiente para 32-bit int)
-    li $a0, 16
-    li $v0, 9         # sbrk
-    syscall
-    move $s1, $v0     # $s1 = inicio del buffer
-    move $t0, $s1     # <--- ¡ESTA ES LA LÍNEA CORREGIDA!
+    # 1. Buffer temporal en el propio frame (12 bytes alcanzan para un int de 32 bits)
+    move $s1, $sp     # $s1 = inicio del buffer (0..15($sp))
+    move $t0, $s1
 
     # 2. Manejar caso especial 0
     bne $s0, $zero, _its_check_sign
@@ -271,8 +271,7 @@ _its_reverse:
     # 4. Alocar memoria FINAL para el string correcto
     move $a0, $t4
     addi $a0, $a0, 1  # +1 para null terminator
-    li $v0, 9
-    syscall
+    jal _alloc        # (solo toca $v0, $v1, $a0 y $at)
     move $v1, $v0     # $v1 será el resultado final
 
     # 5. Copiar invertido (Buffer -> String Final)
@@ -319,16 +318,57 @@ _print_newline:
 
 # -----------------------------------------------------------------
 # _alloc:
-# Aloca 'n' bytes en el heap usando 'sbrk'.
+# Aloca 'n' bytes (redondeados a múltiplo de 4) del arena actual moviendo
+# el puntero de _heap_state. Si no entran, pide un arena nuevo de
+# n + 64 KiB con un solo sbrk (el resto del anterior se descarta).
+# El MIPSGenerator emite el mismo camino rápido inline para NEW y solo
+# salta acá cuando hay que rellenar. Los bytes servidos se acumulan al
+# cerrar cada arena (más libre - inicio del actual), no por asignación.
 # Args:
 #   $a0: Número de bytes a alocar
 # Returns:
 #   $v0: Puntero al inicio del bloque de memoria alocado
+# Modifica solo $v0, $v1, $a0 y $at
 # -----------------------------------------------------------------
 _alloc:
+    addiu $a0, $a0, 3
+    srl $a0, $a0, 2
+    sll $a0, $a0, 2       # Redondear a múltiplo de 4
+_alloc_retry:
+    la $at, _heap_state
+    lw $v0, 0($at)        # $v0 = siguiente byte libre
+    addu $v1, $v0, $a0    # $v1 = nuevo tope
+    lw $at, 4($at)        # $at = fin del arena
+    slt $at, $v1, $at     # ¿nuevo tope < fin?
+    beq $at, $zero, _alloc_refill
+    la $at, _heap_state
+    sw $v1, 0($at)
+    lw $v1, 8($at)        # Contador de asignaciones
+    addiu $v1, $v1, 1
+    sw $v1, 8($at)
+    jr $ra
+
+_alloc_refill:
+    move $v1, $a0         # Guardar n
+    la $at, _heap_state   # Bytes servidos += libre - inicio del arena que se cierra
+    lw $v0, 0($at)
+    lw $a0, 16($at)
+    subu $v0, $v0, $a0
+    lw $a0, 12($at)
+    addu $a0, $a0, $v0
+    sw $a0, 12($at)
+    move $a0, $v1
+    li $at, 65536
+    addu $a0, $a0, $at    # Arena de n + 64 KiB
     li $v0, 9             # Syscall 9: sbrk
-    syscall               # $a0 tiene el tamaño, $v0 recibe el puntero
-    jr $ra                # Retornar
+    syscall
+    la $at, _heap_state
+    sw $v0, 0($at)
+    sw $v0, 16($at)
+    addu $v0, $v0, $a0
+    sw $v0, 4($at)
+    move $a0, $v1
+    j _alloc_retry
 
 # -----------------------------------------------------------------
 # _exit:
@@ -0,0 +1,84 @@
+"""
+Simulador MIPS32 para el código generado
+Uso: python -m mips.simulator archivo.s [--stats] [--max-jumps N]
+"""
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+from .assembler import AssemblyError
+from .machine import DEFAULT_MAX_JUMPS
+from .runner import simulate, format_stats
+
+
+def main():
+    """Función principal del simulador"""
+    parser = argparse.ArgumentParser(
+        description='Simulador MIPS32 (ejecuta el .s generado sin MARS)'
+    )
+    parser.add_argument(
+        'input_file',
+        help='Archivo ensamblador MIPS (.s)'
+    )
+    parser.add_argument(
+        '--stats',
+        action='store_true',
+        help='Mostrar conteos dinámicos de instrucciones por opcode (en stderr)'
+    )
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='Emitir salida y estadísticas como JSON'
+    )
+    parser.add_argument(
+        '--max-jumps',
+        type=int,
+        default=DEFAULT_MAX_JUMPS,
+        help=f'Límite de saltos tomados antes de abortar (default: {DEFAULT_MAX_JUMPS})'
+    )
+    args = parser.parse_args()
+
+    input_path = Path(args.input_file)
+    if not input_path.exists():
+        print(f"Error: El archivo '{input_path}' no existe", file=sys.stderr)
+        sys.exit(1)
+
+    t0 = time.perf_counter()
+    try:
+        result = simulate(input_path.read_text(encoding='utf-8'), args.max_jumps)
+    except AssemblyError as e:
+        print(f"Error de ensamblado: {e}", file=sys.stderr)
+        sys.exit(2)
+    elapsed = time.perf_counter() - t0
+
+    if args.json:
+        print(json.dumps({
+            "output": result.output,
+            "exit_code": result.exit_code,
+            "error": result.error,
+            "steps": result.steps,
+            "loads": result.loads,
+            "stores": result.stores,
+            "heap_bytes": result.heap_bytes,
+            "alloc_bytes": result.alloc_bytes,
+            "alloc_calls": result.alloc_calls,
+            "counts": result.counts,
+            "elapsed": elapsed,
+        }, ensure_ascii=False, indent=2))
+        sys.exit(result.exit_code)
+
+    sys.stdout.write(result.output)
+    sys.stdout.flush()
+    if result.error:
+        print(f"\nError de ejecución: {result.error}", file=sys.stderr)
+    if args.stats:
+        print("\n" + format_stats(result), file=sys.stderr)
+        rate = result.steps / elapsed if elapsed > 0 else 0.0
+        print(f"Tiempo: {elapsed:.3f} s ({rate:,.0f} inst/s)", file=sys.stderr)
+    sys.exit(result.exit_code)
+
+
+if __name__ == "__main__":
+    main()
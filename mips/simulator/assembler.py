@@ -0,0 +1,415 @@
+"""
+Ensamblador MIPS32 para el simulador
+Traduce el .s que produce MIPSGenerator.generate() (más el runtime) a una
+tabla de instrucciones pre-decodificadas: cada instrucción es una tupla
+(opcode, a, b, c) de enteros, donde a/b/c ya son números de registro,
+inmediatos o índices de instrucción destino. Así el bucle de ejecución no
+vuelve a parsear texto.
+
+Las pseudo-instrucciones que usa el generador (li, la, move, sle, sgt, sge,
+seq, sne, neg, rem, mul, div de 3 operandos, subu/addu con inmediato,
+beqz, blt...) se decodifican directamente a un opcode propio; solo cuando
+un operando inmediato no tiene forma nativa se expande a 'li $at' + op.
+Las variantes sin signo (sltu, sltiu, bltu, divu, multu...) tienen sus
+propios opcodes: comparan y dividen los registros como enteros sin signo.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+# --- Mapa de memoria (igual que MARS) ---
+TEXT_BASE = 0x00400000
+DATA_BASE = 0x10010000
+HEAP_BASE = 0x10040000
+GP_INIT = 0x10008000
+SP_INIT = 0x7FFFEFFC
+
+# Registro "sumidero": las escrituras a $zero se redirigen aquí
+ZERO_SINK = 32
+
+REGISTERS: Dict[str, int] = {
+    "zero": 0, "at": 1, "v0": 2, "v1": 3,
+    "a0": 4, "a1": 5, "a2": 6, "a3": 7,
+    "t0": 8, "t1": 9, "t2": 10, "t3": 11, "t4": 12, "t5": 13, "t6": 14, "t7": 15,
+    "s0": 16, "s1": 17, "s2": 18, "s3": 19, "s4": 20, "s5": 21, "s6": 22, "s7": 23,
+    "t8": 24, "t9": 25, "k0": 26, "k1": 27, "gp": 28, "sp": 29, "fp": 30, "s8": 30,
+    "ra": 31,
+}
+
+# --- Opcodes pre-decodificados ---
+OPCODES = [
+    "lw", "sw", "addi", "add", "move", "li", "beq", "bne", "j", "jal", "jr",
+    "sub", "mul", "div", "rem", "slt", "sle", "sgt", "sge", "seq", "sne",
+    "and", "or", "xor", "nor", "andi", "ori", "xori", "slti",
+    "sll", "srl", "sra", "sllv", "srlv", "srav",
+    "lb", "lbu", "sb", "syscall", "jalr", "divlo", "mult", "mflo", "mfhi",
+    "blt", "ble", "bgt", "bge", "bltz", "blez", "bgtz", "bgez",
+    "neg", "not", "lui", "nop", "halt",
+    # Sin signo: comparan/dividen los registros como enteros de 32 bits sin signo
+    "sltu", "sleu", "sgtu", "sgeu", "sltiu", "bltu", "bleu", "bgtu", "bgeu",
+    "divu", "remu", "divlou", "multu",
+]
+OP = {name: i for i, name in enumerate(OPCODES)}
+
+# Mnemónicos del ensamblador -> opcode (cuando el mapeo es directo)
+_ALU_REG = {
+    "add": "add", "addu": "add", "sub": "sub", "subu": "sub",
+    "mul": "mul", "div": "div", "divu": "divu", "rem": "rem", "remu": "remu",
+    "slt": "slt", "sltu": "sltu", "sle": "sle", "sleu": "sleu", "sgt": "sgt", "sgtu": "sgtu",
+    "sge": "sge", "sgeu": "sgeu", "seq": "seq", "sne": "sne",
+    "and": "and", "or": "or", "xor": "xor", "nor": "nor",
+    "sllv": "sllv", "srlv": "srlv", "srav": "srav",
+}
+_ALU_IMM_NATIVE = {
+    "add": "addi", "addu": "addi", "addi": "addi", "addiu": "addi",
+    "and": "andi", "andi": "andi", "or": "ori", "ori": "ori",
+    "xor": "xori", "xori": "xori", "slt": "slti", "slti": "slti",
+    "sltu": "sltiu", "sltiu": "sltiu",
+}
+_BRANCH_2 = {"beq": "beq", "bne": "bne", "blt": "blt", "ble": "ble", "bgt": "bgt", "bge": "bge",
+             "bltu": "bltu", "bleu": "bleu", "bgtu": "bgtu", "bgeu": "bgeu"}
+_BRANCH_1 = {"bltz": "bltz", "blez": "blez", "bgtz": "bgtz", "bgez": "bgez"}
+
+_MEM_RE = re.compile(r"^(.*)\((\$\w+)\)$")
+
+
+class AssemblyError(Exception):
+    """Error al ensamblar una línea del .s"""
+
+
+@dataclass
+class AssembledProgram:
+    """Resultado del ensamblado"""
+    code: List[Tuple[int, int, int, int]]       # (opcode, a, b, c) por instrucción
+    data: bytearray                              # imagen del segmento .data
+    text_labels: Dict[str, int]                  # etiqueta -> índice de instrucción
+    data_labels: Dict[str, int]                  # etiqueta -> dirección
+    source: List[Tuple[int, str]] = field(default_factory=list)  # (línea, texto) por instrucción
+    entry: int = 0
+
+
+def _strip_comment(line: str) -> str:
+    """Quita el comentario '#' respetando strings entre comillas"""
+    in_str = False
+    prev = ""
+    for i, ch in enumerate(line):
+        if ch == '"' and prev != "\\":
+            in_str = not in_str
+        elif ch == "#" and not in_str:
+            return line[:i]
+        prev = ch
+    return line
+
+
+def _split_operands(rest: str) -> List[str]:
+    return [p.strip() for p in rest.split(",")] if rest.strip() else []
+
+
+def _parse_string(lit: str) -> bytes:
+    """Decodifica un literal "..." de .asciiz con escapes"""
+    lit = lit.strip()
+    if len(lit) < 2 or lit[0] != '"' or lit[-1] != '"':
+        raise AssemblyError(f"literal de string inválido: {lit}")
+    body = lit[1:-1]
+    out = bytearray()
+    i = 0
+    escapes = {"n": 10, "t": 9, "r": 13, "0": 0, '"': 34, "\\": 92, "'": 39}
+    while i < len(body):
+        ch = body[i]
+        if ch == "\\" and i + 1 < len(body):
+            nxt = body[i + 1]
+            if nxt in escapes:
+                out.append(escapes[nxt])
+                i += 2
+                continue
+        out.extend(ch.encode("utf-8"))
+        i += 1
+    return bytes(out)
+
+
+def _reg(tok: str, dest: bool = False) -> int:
+    name = tok.strip()
+    if not name.startswith("$"):
+        raise AssemblyError(f"se esperaba un registro: {tok}")
+    name = name[1:]
+    if name.isdigit():
+        num = int(name)
+        if not 0 <= num < 32:
+            raise AssemblyError(f"registro inválido: {tok}")
+    elif name in REGISTERS:
+        num = REGISTERS[name]
+    else:
+        raise AssemblyError(f"registro desconocido: {tok}")
+    if dest and num == 0:
+        return ZERO_SINK
+    return num
+
+
+def _is_imm(tok: str) -> bool:
+    tok = tok.strip()
+    if tok.startswith("'") and tok.endswith("'") and len(tok) >= 3:
+        return True
+    try:
+        int(tok, 0)
+        return True
+    except ValueError:
+        return False
+
+
+def _imm(tok: str) -> int:
+    tok = tok.strip()
+    if tok.startswith("'") and tok.endswith("'"):
+        return ord(_parse_string('"' + tok[1:-1] + '"').decode("utf-8"))
+    return int(tok, 0)
+
+
+class Assembler:
+    """Ensamblador de dos pasadas (etiquetas, luego decodificación)"""
+
+    def __init__(self):
+        self._word_fixups: List[Tuple[int, str]] = []  # (offset en .data, etiqueta)
+
+    def assemble(self, text: str) -> AssembledProgram:
+        self._word_fixups = []
+        # Pasada 1: separar secciones, ubicar etiquetas y construir .data
+        data = bytearray()
+        data_labels: Dict[str, int] = {}
+        text_labels: Dict[str, int] = {}
+        pending: List[Tuple[int, str, str, List[str]]] = []  # (línea, texto, mnem, ops)
+        n_inst = 0
+        section = "text"
+
+        for lineno, raw in enumerate(text.splitlines(), start=1):
+            line = _strip_comment(raw).strip()
+            # Puede haber varias etiquetas en la misma línea
+            while True:
+                m = re.match(r"^([A-Za-z_.$][\w.$]*)\s*:(.*)$", line)
+                if not m:
+                    break
+                label, line = m.group(1), m.group(2).strip()
+                if label in data_labels or label in text_labels:
+                    raise AssemblyError(f"línea {lineno}: etiqueta duplicada: {label}")
+                if section == "data":
+                    data_labels[label] = DATA_BASE + len(data)
+                else:
+                    text_labels[label] = n_inst
+            if not line:
+                continue
+
+            if line.startswith("."):
+                parts = line.split(None, 1)
+                directive = parts[0]
+                rest = parts[1] if len(parts) > 1 else ""
+                if directive == ".data":
+                    section = "data"
+                elif directive == ".text":
+                    section = "text"
+                elif directive in (".globl", ".global", ".extern", ".ent", ".end"):
+                    pass
+                elif section == "data":
+                    self._data_directive(directive, rest, data, data_labels, lineno)
+                else:
+                    raise AssemblyError(f"línea {lineno}: directiva no soportada en .text: {directive}")
+                continue
+
+            if section != "text":
+                raise AssemblyError(f"línea {lineno}: instrucción fuera de .text: {line}")
+            parts = line.split(None, 1)
+            mnem = parts[0].lower()
+            ops = _split_operands(parts[1] if len(parts) > 1 else "")
+            pending.append((lineno, raw.strip(), mnem, ops))
+            n_inst += self._expansion_size(mnem, ops)
+
+        # Las .word con etiquetas se resuelven ahora que se conocen todas
+        for addr_off, label in self._word_fixups:
+            value = self._label_value(label, text_labels, data_labels)
+            data[addr_off:addr_off + 4] = (value & 0xFFFFFFFF).to_bytes(4, "little")
+
+        # Pasada 2: decodificar
+        code: List[Tuple[int, int, int, int]] = []
+        source: List[Tuple[int, str]] = []
+        for lineno, raw, mnem, ops in pending:
+            try:
+                decoded = self._decode(mnem, ops, text_labels, data_labels)
+            except (AssemblyError, ValueError, KeyError, IndexError) as e:
+                raise AssemblyError(f"línea {lineno}: {raw}: {e}") from None
+            for inst in decoded:
+                code.append(inst)
+                source.append((lineno, raw))
+
+        # Centinela: caer al final del programa termina la ejecución
+        code.append((OP["halt"], 0, 0, 0))
+        source.append((0, "<fin del programa>"))
+
+        entry = text_labels.get("main", 0)
+        return AssembledProgram(code, data, text_labels, data_labels, source, entry)
+
+    # --- .data ---
+
+    def _data_directive(self, directive, rest, data, data_labels, lineno):
+        if directive in (".asciiz", ".ascii"):
+            s = _parse_string(rest)
+            data.extend(s)
+            if directive == ".asciiz":
+                data.append(0)
+        elif directive == ".word":
+            self._align(data, data_labels, 4)
+            for tok in _split_operands(rest):
+                if _is_imm(tok):
+                    data.extend((_imm(tok) & 0xFFFFFFFF).to_bytes(4, "little"))
+                else:
+                    self._word_fixups.append((len(data), tok))
+                    data.extend(b"\0\0\0\0")
+        elif directive == ".half":
+            self._align(data, data_labels, 2)
+            for tok in _split_operands(rest):
+                data.extend((_imm(tok) & 0xFFFF).to_bytes(2, "little"))
+        elif directive == ".byte":
+            for tok in _split_operands(rest):
+                data.append(_imm(tok) & 0xFF)
+        elif directive == ".space":
+            data.extend(bytes(_imm(rest)))
+        elif directive == ".align":
+            self._align(data, data_labels, 1 << _imm(rest))
+        else:
+            raise AssemblyError(f"línea {lineno}: directiva no soportada: {directive}")
+
+    @staticmethod
+    def _align(data, data_labels, n):
+        pad = (-len(data)) % n
+        if pad:
+            # Las etiquetas recién definidas en la posición actual se mueven con el alineamiento
+            here = DATA_BASE + len(data)
+            data.extend(bytes(pad))
+            for k, v in data_labels.items():
+                if v == here:
+                    data_labels[k] = DATA_BASE + len(data)
+
+    # --- .text ---
+
+    @staticmethod
+    def _expansion_size(mnem: str, ops: List[str]) -> int:
+        """Cuántas instrucciones decodificadas genera una línea"""
+        if mnem in _ALU_REG and len(ops) == 3 and _is_imm(ops[2]):
+            if mnem in _ALU_IMM_NATIVE or mnem in ("sub", "subu"):
+                return 1
+            return 2  # li $at, imm + op
+        if mnem in _BRANCH_2 and len(ops) == 3 and _is_imm(ops[1]):
+            return 2
+        return 1
+
+    @staticmethod
+    def _label_value(label, text_labels, data_labels) -> int:
+        label = label.strip()
+        offset = 0
+        m = re.match(r"^([A-Za-z_.$][\w.$]*)\s*([+-]\s*\w+)?$", label)
+        if m and m.group(2):
+            label = m.group(1)
+            offset = int(m.group(2).replace(" ", ""), 0)
+        if label in data_labels:
+            return data_labels[label] + offset
+        if label in text_labels:
+            return TEXT_BASE + 4 * text_labels[label] + offset
+        raise AssemblyError(f"etiqueta no definida: {label}")
+
+    @staticmethod
+    def _target(label, text_labels) -> int:
+        label = label.strip()
+        if label not in text_labels:
+            raise AssemblyError(f"etiqueta de salto no definida: {label}")
+        return text_labels[label]
+
+    def _mem(self, tok, text_labels, data_labels) -> Tuple[int, int]:
+        """'off($reg)' | '($reg)' | 'label' -> (registro base, offset)"""
+        tok = tok.strip()
+        m = _MEM_RE.match(tok)
+        if m:
+            off = m.group(1).strip()
+            base = _reg(m.group(2))
+            if not off:
+                return base, 0
+            if _is_imm(off):
+                return base, _imm(off)
+            return base, self._label_value(off, text_labels, data_labels)
+        return 0, self._label_value(tok, text_labels, data_labels)
+
+    def _decode(self, mnem, ops, text_labels, data_labels) -> List[Tuple[int, int, int, int]]:
+        n = len(ops)
+        at = REGISTERS["at"]
+
+        if mnem in ("lw", "sw", "lb", "lbu", "sb"):
+            base, off = self._mem(ops[1], text_labels, data_labels)
+            dest = mnem in ("lw", "lb", "lbu")
+            return [(OP[mnem], _reg(ops[0], dest=dest), base, off)]
+
+        if mnem in ("li",):
+            return [(OP["li"], _reg(ops[0], True), _imm(ops[1]), 0)]
+        if mnem == "la":
+            tok = ops[1].strip()
+            if _MEM_RE.match(tok):
+                base, off = self._mem(tok, text_labels, data_labels)
+                return [(OP["addi"], _reg(ops[0], True), base, off)]
+            return [(OP["li"], _reg(ops[0], True), self._label_value(tok, text_labels, data_labels), 0)]
+        if mnem == "lui":
+            return [(OP["lui"], _reg(ops[0], True), _imm(ops[1]), 0)]
+        if mnem == "move":
+            return [(OP["move"], _reg(ops[0], True), _reg(ops[1]), 0)]
+        if mnem in ("neg", "negu", "not"):
+            name = "not" if mnem == "not" else "neg"
+            return [(OP[name], _reg(ops[0], True), _reg(ops[1]), 0)]
+
+        if mnem in ("sll", "srl", "sra"):
+            if _is_imm(ops[2]):
+                return [(OP[mnem], _reg(ops[0], True), _reg(ops[1]), _imm(ops[2]) & 31)]
+            return [(OP[mnem + "v"], _reg(ops[0], True), _reg(ops[1]), _reg(ops[2]))]
+
+        if mnem in ("div", "divu") and n == 2:
+            name = "divlo" if mnem == "div" else "divlou"
+            return [(OP[name], _reg(ops[0]), _reg(ops[1]), 0)]
+        if mnem in ("mult", "multu"):
+            return [(OP[mnem], _reg(ops[0]), _reg(ops[1]), 0)]
+        if mnem in ("mflo", "mfhi"):
+            return [(OP[mnem], _reg(ops[0], True), 0, 0)]
+
+        if mnem in _ALU_IMM_NATIVE and mnem not in _ALU_REG:
+            # addi/addiu/andi/ori/xori/slti/sltiu explícitos
+            return [(OP[_ALU_IMM_NATIVE[mnem]], _reg(ops[0], True), _reg(ops[1]), _imm(ops[2]))]
+
+        if mnem in _ALU_REG:
+            if n == 2:  # forma corta: 'add $t0, $t1' == 'add $t0, $t0, $t1'
+                ops = [ops[0], ops[0], ops[1]]
+            rd, rs = _reg(ops[0], True), _reg(ops[1])
+            if _is_imm(ops[2]):
+                imm = _imm(ops[2])
+                if mnem in ("sub", "subu"):
+                    return [(OP["addi"], rd, rs, -imm)]
+                if mnem in _ALU_IMM_NATIVE:
+                    return [(OP[_ALU_IMM_NATIVE[mnem]], rd, rs, imm)]
+                return [(OP["li"], at, imm, 0), (OP[_ALU_REG[mnem]], rd, rs, at)]
+            return [(OP[_ALU_REG[mnem]], rd, rs, _reg(ops[2]))]
+
+        if mnem in _BRANCH_2:
+            target = self._target(ops[2], text_labels)
+            if _is_imm(ops[1]):
+                return [(OP["li"], at, _imm(ops[1]), 0),
+                        (OP[_BRANCH_2[mnem]], _reg(ops[0]), at, target)]
+            return [(OP[_BRANCH_2[mnem]], _reg(ops[0]), _reg(ops[1]), target)]
+        if mnem in ("beqz", "bnez"):
+            name = "beq" if mnem == "beqz" else "bne"
+            return [(OP[name], _reg(ops[0]), 0, self._target(ops[1], text_labels))]
+        if mnem in _BRANCH_1:
+            return [(OP[_BRANCH_1[mnem]], _reg(ops[0]), 0, self._target(ops[1], text_labels))]
+        if mnem in ("b", "j"):
+            return [(OP["j"], self._target(ops[0], text_labels), 0, 0)]
+        if mnem == "jal":
+            return [(OP["jal"], self._target(ops[0], text_labels), 0, 0)]
+        if mnem == "jr":
+            return [(OP["jr"], _reg(ops[0]), 0, 0)]
+        if mnem == "jalr":
+            return [(OP["jalr"], _reg(ops[-1]), 0, 0)]
+        if mnem == "syscall":
+            return [(OP["syscall"], 0, 0, 0)]
+        if mnem == "nop":
+            return [(OP["nop"], 0, 0, 0)]
+
+        raise AssemblyError(f"instrucción no soportada: {mnem}")
@@ -0,0 +1,447 @@
+"""
+Máquina MIPS32 que ejecuta un AssembledProgram
+El bucle de ejecución despacha sobre el opcode entero de cada tupla
+pre-decodificada; los opcodes más frecuentes (lw/sw/addi/add/move/li y
+saltos) se prueban primero. La memoria son dos bytearrays (datos+heap y
+stack) con vistas de palabra de 32 bits para lw/sw alineados.
+
+Syscalls soportadas: 1 (print_int), 4 (print_string), 9 (sbrk),
+10 (exit), 11 (print_char) y 17 (exit2).
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from .assembler import (
+    AssembledProgram, OPCODES, TEXT_BASE, DATA_BASE, HEAP_BASE, GP_INIT, SP_INIT,
+)
+
+# Segmento bajo: .data + heap (sbrk); segmento alto: stack
+LOW_BASE = 0x10000000
+LOW_SIZE = 32 * 1024 * 1024
+STACK_TOP = 0x80000000
+STACK_SIZE = 8 * 1024 * 1024
+STACK_BASE = STACK_TOP - STACK_SIZE
+
+DEFAULT_MAX_JUMPS = 50_000_000
+
+
+class SimulationError(Exception):
+    """Fallo en tiempo de ejecución (acceso inválido, división por cero...)"""
+
+
+@dataclass
+class SimulationResult:
+    """Resultado de una ejecución"""
+    output: str
+    exit_code: int
+    steps: int
+    counts: Dict[str, int]               # opcode -> ejecuciones
+    heap_bytes: int = 0                  # bytes pedidos con sbrk
+    sbrk_calls: int = 0
+    alloc_bytes: int = 0                 # contadores del runtime (_heap_state)
+    alloc_calls: int = 0
+    error: Optional[str] = None
+    pc_counts: List[int] = field(default_factory=list)
+
+    @property
+    def loads(self) -> int:
+        return sum(self.counts.get(k, 0) for k in ("lw", "lb", "lbu"))
+
+    @property
+    def stores(self) -> int:
+        return sum(self.counts.get(k, 0) for k in ("sw", "sb"))
+
+
+def _wrap(x: int) -> int:
+    """Trunca a entero con signo de 32 bits"""
+    return ((x + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+
+
+def _trunc_div(a: int, b: int) -> int:
+    """División entera truncando hacia cero (semántica MIPS)"""
+    q = abs(a) // abs(b)
+    return q if (a < 0) == (b < 0) else -q
+
+
+class Machine:
+    """Estado de la CPU + memoria y bucle de ejecución"""
+
+    def __init__(self, program: AssembledProgram, max_jumps: int = DEFAULT_MAX_JUMPS):
+        self.program = program
+        self.max_jumps = max_jumps
+        self.low = bytearray(LOW_SIZE)
+        self.stack = bytearray(STACK_SIZE)
+        off = DATA_BASE - LOW_BASE
+        self.low[off:off + len(program.data)] = program.data
+        self.heap_ptr = max(HEAP_BASE, (DATA_BASE + len(program.data) + 3) & ~3)
+        self.heap_bytes = 0
+        self.sbrk_calls = 0
+        self.regs = [0] * 34
+        self.regs[28] = GP_INIT
+        self.regs[29] = SP_INIT
+        self.out = bytearray()
+
+    # --- Acceso a memoria fuera del bucle caliente (syscalls) ---
+
+    def _byte_ref(self, addr: int):
+        if addr >= STACK_BASE:
+            return self.stack, addr - STACK_BASE
+        if addr >= LOW_BASE:
+            return self.low, addr - LOW_BASE
+        raise SimulationError(f"acceso a memoria inválido: 0x{addr & 0xFFFFFFFF:08x}")
+
+    def _read_cstring(self, addr: int) -> bytes:
+        buf, off = self._byte_ref(addr)
+        end = buf.find(0, off)
+        if end < 0:
+            raise SimulationError(f"string sin terminador en 0x{addr:08x}")
+        return bytes(buf[off:end])
+
+    def _heap_counter(self, offset: int) -> int:
+        """Palabra de _heap_state (contadores del allocator del runtime)"""
+        addr = self.program.data_labels.get("_heap_state")
+        if addr is None:
+            return 0
+        buf, off = self._byte_ref(addr + offset)
+        return int.from_bytes(buf[off:off + 4], "little")
+
+    def run(self) -> SimulationResult:
+        """Ejecuta desde 'main' hasta exit, halt o error"""
+        code = self.program.code
+        regs = self.regs
+        low, stack = self.low, self.stack
+        low_w = memoryview(low).cast("i")
+        stack_w = memoryview(stack).cast("i")
+        pc_counts = [0] * len(code)
+        max_jumps = self.max_jumps
+        jumps = 0
+        hi = lo = 0
+        exit_code = 0
+        error = None
+
+        (LW, SW, ADDI, ADD, MOVE, LI, BEQ, BNE, J, JAL, JR, SUB, MUL, DIV, REM,
+         SLT, SLE, SGT, SGE, SEQ, SNE, AND, OR, XOR, NOR, ANDI, ORI, XORI, SLTI,
+         SLL, SRL, SRA, SLLV, SRLV, SRAV, LB, LBU, SB, SYSCALL, JALR, DIVLO,
+         MULT, MFLO, MFHI, BLT, BLE, BGT, BGE, BLTZ, BLEZ, BGTZ, BGEZ,
+         NEG, NOT, LUI, NOP, HALT,
+         SLTU, SLEU, SGTU, SGEU, SLTIU, BLTU, BLEU, BGTU, BGEU,
+         DIVU, REMU, DIVLOU, MULTU) = range(len(OPCODES))
+        assert OPCODES[HALT] == "halt" and OPCODES[MULTU] == "multu"
+
+        pc = self.program.entry
+        try:
+            while True:
+                pc_counts[pc] += 1
+                op, a, b, c = code[pc]
+
+                if op == LW:
+                    addr = regs[b] + c
+                    if addr & 3:
+                        raise SimulationError(f"lw no alineado: 0x{addr & 0xFFFFFFFF:08x}")
+                    if addr >= STACK_BASE:
+                        regs[a] = stack_w[(addr - STACK_BASE) >> 2]
+                    elif addr >= LOW_BASE:
+                        regs[a] = low_w[(addr - LOW_BASE) >> 2]
+                    else:
+                        raise SimulationError(f"lw en dirección inválida: 0x{addr & 0xFFFFFFFF:08x}")
+                    pc += 1
+                elif op == SW:
+                    addr = regs[b] + c
+                    if addr & 3:
+                        raise SimulationError(f"sw no alineado: 0x{addr & 0xFFFFFFFF:08x}")
+                    if addr >= STACK_BASE:
+                        stack_w[(addr - STACK_BASE) >> 2] = regs[a]
+                    elif addr >= LOW_BASE:
+                        low_w[(addr - LOW_BASE) >> 2] = regs[a]
+                    else:
+                        raise SimulationError(f"sw en dirección inválida: 0x{addr & 0xFFFFFFFF:08x}")
+                    pc += 1
+                elif op == ADDI:
+                    regs[a] = _wrap(regs[b] + c)
+                    pc += 1
+                elif op == MOVE:
+                    regs[a] = regs[b]
+                    pc += 1
+                elif op == LI:
+                    regs[a] = b
+                    pc += 1
+                elif op == ADD:
+                    regs[a] = _wrap(regs[b] + regs[c])
+                    pc += 1
+                elif op == BEQ:
+                    if regs[a] == regs[b]:
+                        pc = c
+                        jumps += 1
+                        if jumps > max_jumps:
+                            raise SimulationError("límite de saltos excedido")
+                    else:
+                        pc += 1
+                elif op == BNE:
+                    if regs[a] != regs[b]:
+                        pc = c
+                        jumps += 1
+                        if jumps > max_jumps:
+                            raise SimulationError("límite de saltos excedido")
+                    else:
+                        pc += 1
+                elif op == J:
+                    pc = a
+                    jumps += 1
+                    if jumps > max_jumps:
+                        raise SimulationError("límite de saltos excedido")
+                elif op == JAL:
+                    regs[31] = TEXT_BASE + 4 * (pc + 1)
+                    pc = a
+                    jumps += 1
+                    if jumps > max_jumps:
+                        raise SimulationError("límite de saltos excedido")
+                elif op == JR:
+                    target = (regs[a] - TEXT_BASE) >> 2
+                    if not 0 <= target < len(code):
+                        raise SimulationError(f"jr a dirección inválida: 0x{regs[a] & 0xFFFFFFFF:08x}")
+                    pc = target
+                    jumps += 1
+                    if jumps > max_jumps:
+                        raise SimulationError("límite de saltos excedido")
+                elif op == SUB:
+                    regs[a] = _wrap(regs[b] - regs[c])
+                    pc += 1
+                elif op == MUL:
+                    regs[a] = _wrap(regs[b] * regs[c])
+                    pc += 1
+                elif op == SLT:
+                    regs[a] = 1 if regs[b] < regs[c] else 0
+                    pc += 1
+                elif op == SLE:
+                    regs[a] = 1 if regs[b] <= regs[c] else 0
+                    pc += 1
+                elif op == SGT:
+                    regs[a] = 1 if regs[b] > regs[c] else 0
+                    pc += 1
+                elif op == SGE:
+                    regs[a] = 1 if regs[b] >= regs[c] else 0
+                    pc += 1
+                elif op == SEQ:
+                    regs[a] = 1 if regs[b] == regs[c] else 0
+                    pc += 1
+                elif op == SNE:
+                    regs[a] = 1 if regs[b] != regs[c] else 0
+                    pc += 1
+                elif op == LB or op == LBU:
+                    addr = regs[b] + c
+                    if addr >= STACK_BASE:
+                        v = stack[addr - STACK_BASE]
+                    elif addr >= LOW_BASE:
+                        v = low[addr - LOW_BASE]
+                    else:
+                        raise SimulationError(f"lb en dirección inválida: 0x{addr & 0xFFFFFFFF:08x}")
+                    regs[a] = v - 256 if (op == LB and v > 127) else v
+                    pc += 1
+                elif op == SB:
+                    addr = regs[b] + c
+                    if addr >= STACK_BASE:
+                        stack[addr - STACK_BASE] = regs[a] & 0xFF
+                    elif addr >= LOW_BASE:
+                        low[addr - LOW_BASE] = regs[a] & 0xFF
+                    else:
+                        raise SimulationError(f"sb en dirección inválida: 0x{addr & 0xFFFFFFFF:08x}")
+                    pc += 1
+                elif op == SYSCALL:
+                    service = regs[2]
+                    if service == 1:
+                        self.out += str(regs[4]).encode()
+                    elif service == 4:
+                        self.out += self._read_cstring(regs[4])
+                    elif service == 9:
+                        size = regs[4]
+                        if size < 0:
+                            raise SimulationError(f"sbrk con tamaño negativo: {size}")
+                        regs[2] = self.heap_ptr
+                        self.heap_ptr += (size + 3) & ~3
+                        self.heap_bytes += size
+                        self.sbrk_calls += 1
+                        if self.heap_ptr >= LOW_BASE + LOW_SIZE:
+                            raise SimulationError("heap agotado")
+                    elif service == 10:
+                        break
+                    elif service == 11:
+                        self.out.append(regs[4] & 0xFF)
+                    elif service == 17:
+                        exit_code = regs[4]
+                        break
+                    else:
+                        raise SimulationError(f"syscall no soportada: {service}")
+                    pc += 1
+                elif op == DIV or op == REM:
+                    if regs[c] == 0:
+                        raise SimulationError("división por cero")
+                    q = _trunc_div(regs[b], regs[c])
+                    regs[a] = _wrap(q) if op == DIV else regs[b] - q * regs[c]
+                    pc += 1
+                elif op == JALR:
+                    target = (regs[a] - TEXT_BASE) >> 2
+                    if not 0 <= target < len(code):
+                        raise SimulationError(f"jalr a dirección inválida: 0x{regs[a] & 0xFFFFFFFF:08x}")
+                    regs[31] = TEXT_BASE + 4 * (pc + 1)
+                    pc = target
+                    jumps += 1
+                    if jumps > max_jumps:
+                        raise SimulationError("límite de saltos excedido")
+                elif op == SLL:
+                    regs[a] = _wrap(regs[b] << c)
+                    pc += 1
+                elif op == SRA:
+                    regs[a] = regs[b] >> c
+                    pc += 1
+                elif op == SRL:
+                    regs[a] = _wrap((regs[b] & 0xFFFFFFFF) >> c)
+                    pc += 1
+                elif op == SLLV:
+                    regs[a] = _wrap(regs[b] << (regs[c] & 31))
+                    pc += 1
+                elif op == SRAV:
+                    regs[a] = regs[b] >> (regs[c] & 31)
+                    pc += 1
+                elif op == SRLV:
+                    regs[a] = _wrap((regs[b] & 0xFFFFFFFF) >> (regs[c] & 31))
+                    pc += 1
+                elif op == AND:
+                    regs[a] = regs[b] & regs[c]
+                    pc += 1
+                elif op == OR:
+                    regs[a] = regs[b] | regs[c]
+                    pc += 1
+                elif op == XOR:
+                    regs[a] = regs[b] ^ regs[c]
+                    pc += 1
+                elif op == NOR:
+                    regs[a] = ~(regs[b] | regs[c])
+                    pc += 1
+                elif op == ANDI:
+                    regs[a] = regs[b] & (c & 0xFFFF)
+                    pc += 1
+                elif op == ORI:
+                    regs[a] = _wrap(regs[b] | (c & 0xFFFF))
+                    pc += 1
+                elif op == XORI:
+                    regs[a] = _wrap(regs[b] ^ (c & 0xFFFF))
+                    pc += 1
+                elif op == SLTI:
+                    regs[a] = 1 if regs[b] < c else 0
+                    pc += 1
+                elif op == BLT or op == BLE or op == BGT or op == BGE:
+                    x, y = regs[a], regs[b]
+                    taken = (x < y) if op == BLT else (x <= y) if op == BLE else \
+                            (x > y) if op == BGT else (x >= y)
+                    if taken:
+                        pc = c
+                        jumps += 1
+                        if jumps > max_jumps:
+                            raise SimulationError("límite de saltos excedido")
+                    else:
+                        pc += 1
+                elif op == BLTZ or op == BLEZ or op == BGTZ or op == BGEZ:
+                    x = regs[a]
+                    taken = (x < 0) if op == BLTZ else (x <= 0) if op == BLEZ else \
+                            (x > 0) if op == BGTZ else (x >= 0)
+                    if taken:
+                        pc = c
+                        jumps += 1
+                        if jumps > max_jumps:
+                            raise SimulationError("límite de saltos excedido")
+                    else:
+                        pc += 1
+                elif op == DIVLO:
+                    if regs[b] == 0:
+                        raise SimulationError("división por cero")
+                    q = _trunc_div(regs[a], regs[b])
+                    lo, hi = _wrap(q), regs[a] - q * regs[b]
+                    pc += 1
+                elif op == MULT:
+                    p = regs[a] * regs[b]
+                    lo, hi = _wrap(p), _wrap(p >> 32)
+                    pc += 1
+                elif op == MFLO:
+                    regs[a] = lo
+                    pc += 1
+                elif op == MFHI:
+                    regs[a] = hi
+                    pc += 1
+                elif op == NEG:
+                    regs[a] = _wrap(-regs[b])
+                    pc += 1
+                elif op == NOT:
+                    regs[a] = ~regs[b]
+                    pc += 1
+                elif op == LUI:
+                    regs[a] = _wrap(b << 16)
+                    pc += 1
+                elif op == NOP:
+                    pc += 1
+                elif op == HALT:
+                    break
+                elif op == SLTU or op == SLEU or op == SGTU or op == SGEU:
+                    x, y = regs[b] & 0xFFFFFFFF, regs[c] & 0xFFFFFFFF
+                    taken = (x < y) if op == SLTU else (x <= y) if op == SLEU else \
+                            (x > y) if op == SGTU else (x >= y)
+                    regs[a] = 1 if taken else 0
+                    pc += 1
+                elif op == SLTIU:
+                    # El inmediato se extiende con signo y se compara sin signo
+                    regs[a] = 1 if (regs[b] & 0xFFFFFFFF) < (c & 0xFFFFFFFF) else 0
+                    pc += 1
+                elif op == BLTU or op == BLEU or op == BGTU or op == BGEU:
+                    x, y = regs[a] & 0xFFFFFFFF, regs[b] & 0xFFFFFFFF
+                    taken = (x < y) if op == BLTU else (x <= y) if op == BLEU else \
+                            (x > y) if op == BGTU else (x >= y)
+                    if taken:
+                        pc = c
+                        jumps += 1
+                        if jumps > max_jumps:
+                            raise SimulationError("límite de saltos excedido")
+                    else:
+                        pc += 1
+                elif op == DIVU or op == REMU:
+                    x, y = regs[b] & 0xFFFFFFFF, regs[c] & 0xFFFFFFFF
+                    if y == 0:
+                        raise SimulationError("división por cero")
+                    regs[a] = _wrap(x // y if op == DIVU else x % y)
+                    pc += 1
+                elif op == DIVLOU:
+                    x, y = regs[a] & 0xFFFFFFFF, regs[b] & 0xFFFFFFFF
+                    if y == 0:
+                        raise SimulationError("división por cero")
+                    lo, hi = _wrap(x // y), _wrap(x % y)
+                    pc += 1
+                elif op == MULTU:
+                    p = (regs[a] & 0xFFFFFFFF) * (regs[b] & 0xFFFFFFFF)
+                    lo, hi = _wrap(p), _wrap(p >> 32)
+                    pc += 1
+                else:
+                    raise SimulationError(f"opcode desconocido: {op}")
+        except SimulationError as e:
+            line, text = self.program.source[pc]
+            error = f"{e} (instrucción {pc}, línea {line}: {text})"
+            exit_code = 1
+        except IndexError:
+            line, text = self.program.source[pc]
+            error = f"acceso fuera de los segmentos de memoria (instrucción {pc}, línea {line}: {text})"
+            exit_code = 1
+
+        counts: Dict[str, int] = {}
+        for i, n in enumerate(pc_counts):
+            if n:
+                name = OPCODES[code[i][0]]
+                counts[name] = counts.get(name, 0) + n
+        return SimulationResult(
+            output=self.out.decode("utf-8", errors="replace"),
+            exit_code=exit_code,
+            steps=sum(pc_counts),
+            counts=counts,
+            heap_bytes=self.heap_bytes,
+            sbrk_calls=self.sbrk_calls,
+            alloc_bytes=self._heap_counter(12) + self._heap_counter(0) - self._heap_counter(16),
+            alloc_calls=self._heap_counter(8),
+            error=error,
+            pc_counts=pc_counts,
+        )
@@ -0,0 +1,28 @@
+"""
+Runner del simulador MIPS
+Integra ensamblador + máquina y formatea las estadísticas de ejecución
+"""
+from typing import List
+
+from .assembler import Assembler
+from .machine import Machine, SimulationResult, DEFAULT_MAX_JUMPS
+
+
+def simulate(asm_text: str, max_jumps: int = DEFAULT_MAX_JUMPS) -> SimulationResult:
+    """Ensambla y ejecuta el texto de un .s"""
+    program = Assembler().assemble(asm_text)
+    return Machine(program, max_jumps=max_jumps).run()
+
+
+def format_stats(result: SimulationResult) -> str:
+    """Tabla de conteos dinámicos por opcode"""
+    lines: List[str] = []
+    lines.append(f"Instrucciones ejecutadas: {result.steps}")
+    lines.append(f"  loads: {result.loads}   stores: {result.stores}")
+    lines.append(f"  heap: {result.heap_bytes} bytes en {result.sbrk_calls} llamadas a sbrk")
+    lines.append(f"  alocaciones: {result.alloc_calls} ({result.alloc_bytes} bytes del arena)")
+    lines.append("Conteo dinámico por opcode:")
+    for name, n in sorted(result.counts.items(), key=lambda kv: (-kv[1], kv[0])):
+        pct = 100.0 * n / result.steps if result.steps else 0.0
+        lines.append(f"  {name:<8} {n:>12}  {pct:5.1f}%")
+    return "\n".join(lines)
@@ -1,6 +1,6 @@
 import sys
 import os
-from antlr4 import FileStream, CommonTokenStream
+from antlr4 import FileStream
 from antlr4.error.ErrorListener import ErrorListener
 
 # Permitir imports tipo "program.gen.*" y "semantic.*" ejecutando desde la raíz
@@ -8,8 +8,7 @@ ROOT = os.path.dirname(os.path.dirname(__file__))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
-from program.gen.CompiscriptLexer import CompiscriptLexer
-from program.gen.CompiscriptParser import CompiscriptParser
+from program.parsing import parse_program
 
 # -----------------------------
 # Listener para errores sintácticos bonitos
@@ -60,15 +59,21 @@ def main(argv):
         print("Uso: python -m program.Driver <archivo.cps> [opciones]")
         print("Opciones:")
         print("  --tac          Generar código intermedio TAC")
-        print("  --optimize     Aplicar optimizaciones al TAC")
+        print("  --optimize     Aplicar optimizaciones al TAC (equivale a -O2)")
+        print("  -O0..-O3       Nivel de optimización del TAC")
         print("  --output FILE  Guardar TAC en archivo")
+        print("  --parse-stats  Mostrar el modo de predicción usado (SLL/LL)")
         sys.exit(2)
 
     in_path = argv[1]
     
     # Parsear flags opcionales
     generate_tac = "--tac" in argv
-    optimize = "--optimize" in argv
+    opt_level = 2 if "--optimize" in argv else 0
+    for arg in argv[2:]:
+        if arg in ("-O0", "-O1", "-O2", "-O3"):
+            opt_level = int(arg[2])
+    parse_stats = "--parse-stats" in argv
     output_file = None
     
     if "--output" in argv:
@@ -82,15 +87,13 @@ def main(argv):
 
     # 1) Parser
     input_stream = FileStream(in_path, encoding="utf-8")
-    lexer = CompiscriptLexer(input_stream)
-    stream = CommonTokenStream(lexer)
-    parser = CompiscriptParser(stream)
-
     syn_errors = SyntaxErrorCollector()
-    parser.removeErrorListeners()
-    parser.addErrorListener(syn_errors)
 
-    tree = parser.program()  # Regla inicial según tu gramática
+    # SLL primero; LL completo solo si SLL falla
+    parsed = parse_program(input_stream, [syn_errors])
+    tree = parsed.tree
+    if parse_stats:
+        print(f"[PARSE] modo={parsed.mode}")
 
     # 2) Si hubo errores de sintaxis -> exit 1
     if syn_errors.count > 0:
@@ -135,8 +138,8 @@ def main(argv):
                 tac_program = tac_result.tac_program
                 
                 # Aplicar optimizaciones si se pidió
-                if optimize:
-                    optimizer = TACOptimizer(tac_program)
+                if opt_level > 0:
+                    optimizer = TACOptimizer(tac_program, opt_level=opt_level)
                     tac_program = optimizer.optimize()
                     print(f"# TAC optimizado (reducción de {tac_result.tac_program.temp_counter - tac_program.temp_counter} temporales)")
                 
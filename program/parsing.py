@@ -0,0 +1,85 @@
+"""
+Helper compartido de parsing en dos etapas (SLL -> LL)
+Uso: parse_program(input_stream, [listener]) desde cualquier driver
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional
+
+from antlr4 import CommonTokenStream
+from antlr4.atn.PredictionMode import PredictionMode
+from antlr4.error.ErrorStrategy import BailErrorStrategy, DefaultErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
+
+from program.gen.CompiscriptLexer import CompiscriptLexer
+from program.gen.CompiscriptParser import CompiscriptParser
+
+MODE_SLL = "SLL"
+MODE_LL = "LL"
+
+# Contadores globales del proceso (para medir la tasa de acierto de SLL)
+_PARSE_STATS: Dict[str, int] = {MODE_SLL: 0, MODE_LL: 0}
+
+
+@dataclass
+class ParseOutcome:
+    """Resultado del parsing en dos etapas"""
+    tree: Any
+    parser: CompiscriptParser
+    token_stream: CommonTokenStream
+    mode: str  # "SLL" si bastó la primera etapa, "LL" si hubo fallback
+
+
+def parse_program(input_stream, listeners: Optional[Iterable] = None) -> ParseOutcome:
+    """
+    Parsea la regla inicial 'program' primero con predicción SLL y
+    BailErrorStrategy (rápido, sin recuperación de errores). Solo si SLL
+    falla se rebobina el stream y se reintenta con LL completo, que es
+    cuando se reportan los errores sintácticos a los listeners.
+    """
+    listeners = list(listeners or [])
+
+    lexer = CompiscriptLexer(input_stream)
+    token_stream = CommonTokenStream(lexer)
+    parser = CompiscriptParser(token_stream)
+
+    # --- Etapa 1: SLL + bail (sin listeners para no duplicar errores) ---
+    parser.removeErrorListeners()
+    parser._errHandler = BailErrorStrategy()
+    parser._interp.predictionMode = PredictionMode.SLL
+    try:
+        tree = parser.program()
+        _PARSE_STATS[MODE_SLL] += 1
+        for listener in listeners:
+            parser.addErrorListener(listener)
+        return ParseOutcome(tree, parser, token_stream, MODE_SLL)
+    except ParseCancellationException:
+        pass
+
+    # --- Etapa 2: LL completo con recuperación y reporte normal ---
+    token_stream.seek(0)
+    parser.reset()
+    for listener in listeners:
+        parser.addErrorListener(listener)
+    parser._errHandler = DefaultErrorStrategy()
+    parser._interp.predictionMode = PredictionMode.LL
+    tree = parser.program()
+    _PARSE_STATS[MODE_LL] += 1
+    return ParseOutcome(tree, parser, token_stream, MODE_LL)
+
+
+def get_parse_stats() -> Dict[str, Any]:
+    """Retorna los contadores de modo y la tasa de acierto de SLL"""
+    total = _PARSE_STATS[MODE_SLL] + _PARSE_STATS[MODE_LL]
+    hit_rate = (_PARSE_STATS[MODE_SLL] / total) if total else 0.0
+    return {
+        "sll": _PARSE_STATS[MODE_SLL],
+        "ll": _PARSE_STATS[MODE_LL],
+        "total": total,
+        "sll_hit_rate": hit_rate,
+    }
+
+
+def reset_parse_stats():
+    """Reinicia los contadores de modo"""
+    _PARSE_STATS[MODE_SLL] = 0
+    _PARSE_STATS[MODE_LL] = 0
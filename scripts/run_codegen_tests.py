@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests de generación de código: cada tests/codegen/**/X.cps tiene al lado
+X.out con la salida esperada. Se compila en cada nivel -O0..-O3 y se
+compara lo que imprime:
+  - el intérprete de TAC (intermediate/tac_vm.py) sobre el TAC optimizado
+  - el simulador MIPS (mips/simulator) sobre el .s generado
+
+Todo corre en este proceso (sin un subprocess por caso), así la suite
+completa tarda segundos.
+"""
+import argparse, contextlib, io, pathlib, sys
+
+# --- colores ---
+GREEN  = "\033[92m"; RED = "\033[91m"; YELLOW = "\033[93m"; RESET = "\033[0m"
+
+# --- localizar raíz del repo (sube hasta encontrar program/Compiscript.g4) ---
+def find_repo_root(start: pathlib.Path) -> pathlib.Path:
+    p = start.resolve()
+    for d in [p] + list(p.parents):
+        if (d / "program" / "Compiscript.g4").exists():
+            return d
+    return start
+
+ROOT = find_repo_root(pathlib.Path(__file__).parent)
+TESTS_DIR = ROOT / "tests" / "codegen"
+sys.path.insert(0, str(ROOT))
+
+from antlr4 import InputStream
+from program.parsing import parse_program
+from intermediate.runner import generate_intermediate_code
+from intermediate.optimizer import TACOptimizer, OPT_LEVELS
+from intermediate.tac_vm import run_tac
+from mips.mips_generator import MIPSGenerator
+from mips.simulator.runner import simulate
+
+MAX_STEPS = 5_000_000
+
+def compile_at(source: str, level: int):
+    """(TAC optimizado, resultado semántico, .s) para un nivel -O"""
+    # Los pases y el análisis semántico imprimen debug: se descarta
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = generate_intermediate_code(parse_program(InputStream(source)).tree)
+        if result.has_errors:
+            raise RuntimeError("; ".join(f"({e.line}:{e.col}) {e.msg}" for e in result.errors))
+        program = result.tac_program
+        if level > 0:
+            program = TACOptimizer(program, opt_level=level).optimize()
+        asm = MIPSGenerator(program, result.global_scope, result.scopes_by_ctx,
+                            opt_level=level).generate()
+    return program, result, asm
+
+def run_case(path: pathlib.Path, levels) -> bool:
+    expected = path.with_suffix(".out").read_text(encoding="utf-8")
+    source = path.read_text(encoding="utf-8")
+    failures = []
+    for level in levels:
+        try:
+            program, result, asm = compile_at(source, level)
+        except Exception as e:
+            failures.append(f"-O{level}: error de compilación: {e}")
+            continue
+        for name, execute in (("tac_vm", lambda: run_tac(program, result.global_scope, max_steps=MAX_STEPS)),
+                              ("simulador", lambda: simulate(asm, max_jumps=MAX_STEPS))):
+            try:
+                run = execute()
+            except Exception as e:
+                failures.append(f"-O{level} {name}: {type(e).__name__}: {e}")
+                continue
+            if run.error:
+                failures.append(f"-O{level} {name}: {run.error}")
+            elif run.output != expected:
+                failures.append(f"-O{level} {name}: salida distinta\n"
+                                f"    esperado: {expected!r}\n    obtenido: {run.output!r}")
+    ok = not failures
+    mark = GREEN + "✅" if ok else RED + "❌"
+    print(f"{mark} {path.relative_to(TESTS_DIR)} {RESET}")
+    for f in failures:
+        print(YELLOW + "  " + f + RESET)
+    return ok
+
+def main():
+    ap = argparse.ArgumentParser(description="Tests de codegen Compiscript (TAC VM + simulador MIPS)")
+    ap.add_argument("filter", nargs="?", default="",
+                    help="Solo los casos cuya ruta contiene este texto")
+    ap.add_argument("-O", dest="levels", type=int, action="append", choices=OPT_LEVELS,
+                    help="Nivel a probar (repetible; default: todos)")
+    args = ap.parse_args()
+    levels = args.levels or list(OPT_LEVELS)
+
+    cases = [p for p in sorted(TESTS_DIR.rglob("*.cps")) if args.filter in str(p.relative_to(TESTS_DIR))]
+    print(f"\n📂 CODEGEN (-O{', -O'.join(map(str, levels))})")
+    all_ok = True
+    for path in cases:
+        all_ok &= run_case(path, levels)
+
+    print((GREEN if all_ok else RED) +
+          ("\n🏁 Todos los tests pasan\n" if all_ok else "\n💥 Algunos tests fallaron\n") +
+          RESET)
+    sys.exit(0 if all_ok else 1)
+
+if __name__ == "__main__":
+    main()
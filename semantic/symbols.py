@@ -1,7 +1,11 @@
 from dataclasses import dataclass
-from typing import Optional, List
+from typing import Dict, Optional, List
 from .types import Type
 
+# Palabra de cabecera de cada objeto (id de clase), justo antes del primer campo:
+# el puntero a la instancia apunta a los campos, así sus offsets empiezan en 0
+OBJECT_HEADER_SIZE = 4
+
 @dataclass
 class Symbol:
     name: str
@@ -26,4 +30,15 @@ class ClassSymbol(Symbol):
     base: Optional["ClassSymbol"] = None
     fields: dict = None
     methods: dict = None
-    instance_size: int = 0           
\ No newline at end of file
+    instance_size: int = 0
+
+    @property
+    def object_size(self) -> int:
+        """Bytes que se reservan por instancia: cabecera + campos (propios y heredados)"""
+        return OBJECT_HEADER_SIZE + self.instance_size
+
+
+def class_ids(symbols: dict) -> Dict[str, int]:
+    """Id de cada clase (orden de declaración, desde 1) para la cabecera de sus objetos"""
+    names = [name for name, sym in symbols.items() if isinstance(sym, ClassSymbol)]
+    return {name: k + 1 for k, name in enumerate(names)}